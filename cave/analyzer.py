@@ -8,7 +8,7 @@ import operator
 import copy
 
 import numpy as np
-from pandas import DataFrame
+from pandas import DataFrame, concat
 
 from smac.configspace import Configuration
 from smac.epm.rf_with_instances import RandomForestWithInstances
@@ -27,7 +27,10 @@ from cave.html.html_builder import HTMLBuilder
 from cave.plot.plotter import Plotter
 from cave.plot.algorithm_footprint import AlgorithmFootprint
 from cave.smacrun import SMACrun
-from cave.utils.helpers import get_cost_dict_for_config, get_timeout
+from cave.utils.bootstrap import bootstrap_ci, paired_permutation_test
+from cave.utils.helpers import get_cost_matrix
+from cave.utils.metrics import PerformanceMetrics
+from cave.utils.portfolio import greedy_portfolio, marginal_contributions, virtual_best
 from cave.utils.timing import timing
 
 __author__ = "Joshua Marben"
@@ -84,14 +87,49 @@ class Analyzer(object):
                                 # importances, so it can be used by analysis
         self.feat_importance = None  # Used to store dictionary w feat_imp
 
-        conf1_runs = get_cost_dict_for_config(self.validated_rh, self.default)
-        conf2_runs = get_cost_dict_for_config(self.validated_rh, self.incumbent)
-        self.plotter = Plotter(self.scenario, self.train_test, conf1_runs,
-                conf2_runs, output=self.output)
+        self.plotter = self._get_plotter()
         self.max_pimp_samples = max_pimp_samples
         self.fanova_pairwise = fanova_pairwise
 
-    def get_timeouts(self, config):
+    def update_data(self, validated_rh, incumbent, runs_changed=True):
+        """Use new data (e.g. of SMAC-runs that are still running).
+
+        Parameters
+        ----------
+        validated_rh: RunHistory
+            new validated runhistory
+        incumbent: Configuration
+            new incumbent
+        runs_changed: bool
+            whether runs were added to the original runhistory, if so results
+            that depend on it (parameter importance) are discarded (as they
+            are if the incumbent changed)
+        """
+        self.validated_rh = validated_rh
+        incumbent_changed = incumbent != self.incumbent
+        self.incumbent = incumbent
+        if runs_changed or incumbent_changed:
+            self.pimp = None
+            self.evaluators = []
+            self.importance = None
+            self.feat_importance = None
+        self.plotter = self._get_plotter()
+
+    def _get_plotter(self):
+        """ Plotter with the per-instance costs of default and incumbent. """
+        costs, insts = get_cost_matrix(self.validated_rh,
+                                       [self.default, self.incumbent])
+        conf1_runs, conf2_runs = [{i: c for i, c in zip(insts, row) if not np.isnan(c)}
+                                  for row in costs]
+        return Plotter(self.scenario, self.train_test, conf1_runs,
+                       conf2_runs, output=self.output)
+
+    def get_metrics(self, configs):
+        """ PerformanceMetrics of configs on the validated runhistory. """
+        return PerformanceMetrics(self.validated_rh, configs, self.scenario.cutoff,
+                                  self.scenario.train_insts, self.scenario.test_insts)
+
+    def get_timeouts(self, config, metrics=None):
         """ Get number of timeouts in config per runs in total (not per
         instance)
 
@@ -99,31 +137,29 @@ class Analyzer(object):
         ----------
         config: Configuration
             configuration from which to calculate the timeouts
+        metrics: PerformanceMetrics
+            metrics containing config, computed if not passed
 
         Returns
         -------
         timeouts: tuple(int, int)
             tuple (timeouts, total runs)
         """
-        cutoff = self.scenario.cutoff
-        timeouts = get_timeout(self.validated_rh, config, cutoff)
+        metrics = metrics if metrics else self.get_metrics([config])
+        row = metrics.index(config)
         if self.train_test:
-            if not cutoff:
+            if not self.scenario.cutoff:
                 return (("N","A"),("N","A"))
-            train_timeout = len([i for i in timeouts if (timeouts[i] == False
-                                  and i in self.scenario.train_insts)])
-            test_timeout = len([i for i in timeouts if (timeouts[i] == False
-                                  and i in self.scenario.test_insts)])
-            return ((train_timeout, len(self.scenario.train_insts)),
-                    (test_timeout, len(self.scenario.test_insts)))
+            return ((metrics.n_timeouts('train')[row], metrics.n_insts['train']),
+                    (metrics.n_timeouts('test')[row], metrics.n_insts['test']))
         else:
-            if not cutoff:
+            if not self.scenario.cutoff:
                 return ("N","A")
-            timeout = len([i for i in timeouts if timeouts[i] == False])
-            no_timeout = len([i for i in timeouts if timeouts[i] == True])
+            timeout = metrics.n_timeouts()[row]
+            no_timeout = metrics.n_evaluated()[row] - timeout
             return (timeout, no_timeout)
 
-    def get_parX(self, config, par=10):
+    def get_parX(self, config, par=10, metrics=None):
         """Calculate parX-values of default and incumbent configs.
         First determine PAR-timeouts for each run on each instances,
         Second average over train/test if available, else just average.
@@ -134,6 +170,8 @@ class Analyzer(object):
             config to be calculated
         par: int
             par-factor to use
+        metrics: PerformanceMetrics
+            metrics containing config, computed if not passed
 
         Returns
         -------
@@ -141,26 +179,15 @@ class Analyzer(object):
             PAR10 values for train- and test-instances, if available as tuple
             else the general average
         """
-        runs = get_cost_dict_for_config(self.validated_rh, config)
-        # Penalize
-        if self.scenario.cutoff:
-            runs = [(k, runs[k]) if runs[k] < self.scenario.cutoff
-                        else (k, self.scenario.cutoff*par)
-                        for k in runs]
-        else:
-            runs = [(k, runs[k]) for k in runs]
+        metrics = metrics if metrics else self.get_metrics([config])
+        row = metrics.index(config)
+        if not self.scenario.cutoff:
             self.logger.info("Calculating penalized average runtime without "
                              "cutoff...")
-
-        # Average
         if self.train_test:
-            train = np.mean([c for i, c in runs if i in
-                             self.scenario.train_insts])
-            test = np.mean([c for i, c in runs if i in
-                            self.scenario.test_insts])
-            return (train, test)
+            return (metrics.par(par, 'train')[row], metrics.par(par, 'test')[row])
         else:
-            return np.mean([c for i, c in runs])
+            return metrics.par(par)[row]
 
 ####################################### TABLES #######################################
 
@@ -194,32 +221,83 @@ class Analyzer(object):
         table = df.to_html(escape=False, header=False, index=False, justify='left')
         return table
 
-    def create_performance_table(self, default, incumbent):
+    def create_performance_table(self, default, incumbent, racing=None,
+                                 n_resamples=1000, n_jobs=1):
         """Create table, compare default against incumbent on train-,
         test- and combined instances. Listing PAR10, PAR1 and timeouts.
-        Distinguishes between train and test, if available."""
+        Distinguishes between train and test, if available.
+
+        Parameters
+        ----------
+        default, incumbent: Configuration
+            configurations to compare
+        racing: tuple(float, int)
+            confidence of the paired test and number of instances, if the
+            data was completed by racing (listed in the table)
+        n_resamples: int
+            number of bootstrap-resamples for 95%-confidence intervals and of
+            permutations for the paired test between default and incumbent
+            on PAR10 (0 to only list point estimates)
+        n_jobs: int
+            number of processes for resampling
+        """
         self.logger.info("... create performance table")
-        def_timeout, inc_timeout = self.get_timeouts(default), self.get_timeouts(incumbent)
-        def_par10, inc_par10 = self.get_parX(default, 10), self.get_parX(incumbent, 10)
-        def_par1, inc_par1 = self.get_parX(default, 1), self.get_parX(incumbent, 1)
+        metrics = self.get_metrics([default, incumbent])
+        def_timeout = self.get_timeouts(default, metrics)
+        inc_timeout = self.get_timeouts(incumbent, metrics)
+        def_par10 = self.get_parX(default, 10, metrics)
+        inc_par10 = self.get_parX(incumbent, 10, metrics)
+        def_par1 = self.get_parX(default, 1, metrics)
+        inc_par1 = self.get_parX(incumbent, 1, metrics)
         dec_place = 3
+        index = ['PAR10', 'PAR1', 'Timeouts']
+        subsets = ['train', 'test'] if self.train_test else ['all']
+        cis, p_values = self._resample_performance(metrics, subsets,
+                                                   n_resamples, n_jobs)
+        if n_resamples:
+            index.append('p-value (permutation, PAR10)')
+        if racing:
+            racing = "{:.3f} ({} inst.)".format(racing[0], racing[1])
+            index.append('Confidence (racing)')
+
+        def par(value, row, subset, metric):
+            value = round(value, dec_place)
+            if (row, subset) not in cis:
+                return value
+            low, high = cis[(row, subset)]
+            return "{} [{}, {}]".format(value, round(low[metric], dec_place),
+                                        round(high[metric], dec_place))
+
+        def timeouts(value, row, subset):
+            string = "{}/{}".format(value[0], value[1])
+            if (row, subset) not in cis or len(cis[(row, subset)][0]) < 3:
+                return string
+            low, high = cis[(row, subset)]
+            n = metrics.n_evaluated(subset)[row]
+            return "{} [{:.0f}, {:.0f}]".format(string, low[2] * n, high[2] * n)
+
         if self.train_test:
             # Distinction between train and test
             # Create table
-            array = np.array([[round(def_par10[0], dec_place),
-                               round(def_par10[1], dec_place),
-                               round(inc_par10[0], dec_place),
-                               round(inc_par10[1], dec_place)],
-                              [round(def_par1[0], dec_place),
-                               round(def_par1[1], dec_place),
-                               round(inc_par1[0], dec_place),
-                               round(inc_par1[1], dec_place)],
-                              ["{}/{}".format(def_timeout[0][0], def_timeout[0][1]),
-                               "{}/{}".format(def_timeout[1][0], def_timeout[1][1]),
-                               "{}/{}".format(inc_timeout[0][0], inc_timeout[0][1]),
-                               "{}/{}".format(inc_timeout[1][0], inc_timeout[1][1])
-                               ]])
-            df = DataFrame(data=array, index=['PAR10', 'PAR1', 'Timeouts'],
+            rows = [[par(def_par10[0], 0, 'train', 0),
+                     par(def_par10[1], 0, 'test', 0),
+                     par(inc_par10[0], 1, 'train', 0),
+                     par(inc_par10[1], 1, 'test', 0)],
+                    [par(def_par1[0], 0, 'train', 1),
+                     par(def_par1[1], 0, 'test', 1),
+                     par(inc_par1[0], 1, 'train', 1),
+                     par(inc_par1[1], 1, 'test', 1)],
+                    [timeouts(def_timeout[0], 0, 'train'),
+                     timeouts(def_timeout[1], 0, 'test'),
+                     timeouts(inc_timeout[0], 1, 'train'),
+                     timeouts(inc_timeout[1], 1, 'test')
+                     ]]
+            if n_resamples:
+                rows.append(['-', '-', p_values['train'], p_values['test']])
+            if racing:
+                rows.append(['-', '-', racing, racing])
+            array = np.array(rows)
+            df = DataFrame(data=array, index=index,
                            columns=['Train', 'Test', 'Train', 'Test'])
             table = df.to_html()
             # Insert two-column-header
@@ -244,18 +322,184 @@ class Analyzer(object):
             table = new_table + table
         else:
             # No distinction between train and test
-            array = np.array([[round(def_par10, dec_place),
-                               round(inc_par10, dec_place)],
-                              [round(def_par1, dec_place),
-                               round(inc_par1, dec_place)],
-                              ["{}/{}".format(def_timeout[0], def_timeout[1]),
-                               "{}/{}".format(inc_timeout[0], inc_timeout[1])]])
-            df = DataFrame(data=array, index=['PAR10', 'PAR1', 'Timeouts'],
+            rows = [[par(def_par10, 0, 'all', 0),
+                     par(inc_par10, 1, 'all', 0)],
+                    [par(def_par1, 0, 'all', 1),
+                     par(inc_par1, 1, 'all', 1)],
+                    [timeouts(def_timeout, 0, 'all'),
+                     timeouts(inc_timeout, 1, 'all')]]
+            if n_resamples:
+                rows.append(['-', p_values['all']])
+            if racing:
+                rows.append(['-', racing])
+            array = np.array(rows)
+            df = DataFrame(data=array, index=index,
                            columns=['Default', 'Incumbent'])
             table = df.to_html()
         self.performance_table = table
         return table
 
+    def get_incumbent_performance(self, runs, trajectory=False):
+        """Performance of the final incumbent of every run (and optionally of
+        every incumbent in the trajectories), computed in one pass over the
+        validated runhistory. Configurations without runs are skipped with a
+        warning (trajectory-incumbents are expected to be completed before,
+        see CAVE.analyze).
+
+        Parameters
+        ----------
+        runs: List[ConfiguratorRun]
+            runs to take incumbents from
+        trajectory: bool
+            whether to include all trajectory-incumbents, not only the final
+
+        Returns
+        -------
+        performance: DataFrame
+            one row per incumbent with PAR10, PAR1, timeouts and number of
+            instances per subset and the rank wrt PAR10 (on test, if available)
+        """
+        labels, configs, missing = [], [], []
+        for run in runs:
+            name = os.path.basename(os.path.normpath(run.folder))
+            entries = run.traj if trajectory else run.traj[-1:]
+            for entry in entries:
+                if entry['incumbent'] not in self.validated_rh.config_ids:
+                    missing.append("{} @ {:.1f}s".format(name, entry['wallclock_time']))
+                    continue
+                if entry is run.traj[-1]:
+                    labels.append("{} (final)".format(name))
+                else:
+                    labels.append("{} @ {:.1f}s".format(name, entry['wallclock_time']))
+                configs.append(entry['incumbent'])
+        if missing:
+            self.logger.warning("No validated runs for %d incumbents, they are "
+                                "not compared: %s", len(missing), ", ".join(missing))
+        subsets = ['train', 'test'] if self.train_test else ['all']
+        if not configs:
+            return DataFrame()
+        metrics = self.get_metrics(configs)
+        summary = metrics.summary(pars=(10, 1), subsets=subsets)
+        columns = OrderedDict()
+        for subset in subsets:
+            suffix = "" if subset == 'all' else " ({})".format(subset.capitalize())
+            for metric in ['PAR10', 'PAR1', 'Timeouts']:
+                if summary[subset][metric] is not None:
+                    columns[metric + suffix] = summary[subset][metric]
+            columns['# Instances' + suffix] = metrics.n_evaluated(subset)
+        par10 = summary[subsets[-1]]['PAR10']
+        # Rank 1 is best, unevaluated (nan) last
+        order = np.argsort(np.where(np.isnan(par10), np.inf, par10), kind='mergesort')
+        ranks = np.empty(len(configs), dtype=int)
+        ranks[order] = np.arange(1, len(configs) + 1)
+        columns['Rank (PAR10)'] = ranks
+        return DataFrame(data=columns, index=labels)
+
+    def create_incumbent_table(self, runs, trajectory=False):
+        """Create table comparing the incumbents of all runs (see
+        get_incumbent_performance), sorted by rank. In the last rows, the
+        spread of the final incumbents across runs is listed (mean, std, min,
+        max).
+
+        Returns
+        -------
+        table: str
+            HTML-table
+        """
+        self.logger.info("... create table of incumbents")
+        df = self.get_incumbent_performance(runs, trajectory)
+        if df.empty:
+            return ""
+        final = df[[label.endswith("(final)") for label in df.index]]
+        metrics = [c for c in df.columns if not c.startswith('Rank')]
+        spread = DataFrame([final[metrics].mean(), final[metrics].std(ddof=0),
+                            final[metrics].min(), final[metrics].max()],
+                           index=['Mean (final)', 'Std (final)',
+                                  'Min (final)', 'Max (final)'])
+        df = concat([df.sort_values('Rank (PAR10)'), spread])
+        table = df.round(3).to_html(na_rep='-')
+        return table
+
+    def create_portfolio_table(self, configs, names, k=None):
+        """Portfolio analysis of configs on the instances on which all of them
+        have (validated or estimated) costs, using PAR10 if there is a cutoff:
+        cost of each configuration, its marginal contribution to the virtual
+        best solver (VBS) and the step in which it is added to a greedy
+        portfolio (with the portfolio's cost after that step).
+
+        Parameters
+        ----------
+        configs: List[Configuration]
+            configurations (e.g. default and incumbents of all runs)
+        names: List[str]
+            names of the configurations
+        k: int
+            maximum size of the greedy portfolio
+
+        Returns
+        -------
+        table: str
+            HTML-table
+        """
+        self.logger.info("... create portfolio table")
+        metrics = self.get_metrics(configs)
+        costs = metrics.get_values(metrics.penalized(10), list(range(len(configs))))
+        if not costs.shape[1]:
+            self.logger.info("No instances with costs for all configurations, "
+                             "skipping portfolio analysis.")
+            return ""
+        cost_name = 'PAR10' if self.scenario.cutoff else 'Cost'
+        vbs, _ = virtual_best(costs)
+        selected, portfolio_costs = greedy_portfolio(costs, k)
+        steps = {row: step for step, row in enumerate(selected)}
+        table = OrderedDict([
+            (cost_name, list(costs.mean(axis=1)) + [vbs.mean()]),
+            ('Marginal contribution to VBS', list(marginal_contributions(costs)) + [np.nan]),
+            ('Greedy portfolio: step', [steps[r] + 1 if r in steps else '-'
+                                        for r in range(len(configs))] + ['-']),
+            ('Greedy portfolio: ' + cost_name, [round(portfolio_costs[steps[r]], 3)
+                                                if r in steps else '-'
+                                                for r in range(len(configs))] + ['-'])])
+        df = DataFrame(data=table, index=list(names) + ['Virtual best solver'])
+        self.logger.debug("Portfolio on %d instances: %s", costs.shape[1],
+                          [names[r] for r in selected])
+        return df.round(3).to_html(na_rep='-')
+
+    def _resample_performance(self, metrics, subsets, n_resamples, n_jobs=1):
+        """Bootstrap confidence intervals (95%) of PAR10, PAR1 and the
+        fraction of timeouts of the first two configurations in metrics and a
+        paired permutation test between them on PAR10, per subset.
+
+        Returns
+        -------
+        cis: dict
+            (row, subset) -> (low, high), arrays with the bounds of PAR10, PAR1
+            (and fraction of timeouts, if there is a cutoff)
+        p_values: dict
+            subset -> formatted p-value
+        """
+        cis, p_values = {}, {}
+        if not n_resamples:
+            return cis, p_values
+        start = time.time()
+        matrices = [metrics.penalized(10), metrics.penalized(1)]
+        if metrics.timeouts is not None:
+            matrices.append(metrics.timeouts)
+        for subset in subsets:
+            for row in [0, 1]:
+                values = np.vstack([metrics.get_values(m, [row], subset)
+                                    for m in matrices])
+                if values.shape[1]:
+                    cis[(row, subset)] = bootstrap_ci(values, n_resamples,
+                                                      n_jobs=n_jobs)
+            paired = metrics.get_values(matrices[0], [0, 1], subset)
+            p = paired_permutation_test(paired[0], paired[1], n_resamples,
+                                        n_jobs=n_jobs)
+            p_values[subset] = '-' if np.isnan(p) else "{:.4f}".format(p)
+        self.logger.debug("Resampling for performance table took %.2f secs.",
+                          time.time() - start)
+        return cis, p_values
+
     def config_to_html(self, default: Configuration, incumbent: Configuration):
         """Create HTML-table to compare Configurations.
         Removes unused parameters.
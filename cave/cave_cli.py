@@ -53,6 +53,42 @@ class CaveCLI(object):
         opt_opts.add_argument("--ta_exec_dir", default=None,
                               help="path to the execution-directory of the "
                                    "SMAC run.")
+        opt_opts.add_argument("--n_jobs", default=1, type=int,
+                              help="number of processes to load the "
+                                   "SMAC-folders and to train EPMs (as "
+                                   "parallel sub-forests) with (-1 to use "
+                                   "all cores).")
+        opt_opts.add_argument("--ta_function", default=None,
+                              help="for Python target algorithms, "
+                                   "'path/to/file.py:function' to evaluate "
+                                   "in-process during validation instead of "
+                                   "calling the command-line of the "
+                                   "scenario (see README).")
+        opt_opts.add_argument("--bootstrap_samples", default=1000, type=int,
+                              help="number of resamples for confidence "
+                                   "intervals and the permutation test in "
+                                   "the performance table (0 to disable).")
+        opt_opts.add_argument("--racing_confidence", default=None, type=float,
+                              help="with validation, race incumbents against "
+                                   "the default and stop validating once a "
+                                   "paired test reaches this confidence.")
+        opt_opts.add_argument("--validation_store", default=None,
+                              help="path to a sqlite-file in which runs "
+                                   "from validation are stored and reused "
+                                   "in later invocations.")
+        opt_opts.add_argument("--model_cache", default=None,
+                              help="folder to save trained EPMs in, so they "
+                                   "are reused when the report is generated "
+                                   "again.")
+        opt_opts.add_argument("--marginalization_samples", default=None, type=int,
+                              help="approximate EPM-predictions marginalized "
+                                   "over instances using a stratified "
+                                   "subsample of this many instances (for "
+                                   "scenarios with many instances).")
+        opt_opts.add_argument("--export_rh", default="json",
+                              choices=["json", "json.gz", "npz", "none"],
+                              help="format to save the combined runhistory "
+                                   "in (written in the background).")
 
         opt_opts.add_argument("--param_importance", default="all", nargs='+',
                               help="what kind of parameter importance to "
@@ -80,6 +116,24 @@ class CaveCLI(object):
         opt_opts.add_argument("--algorithm_footprints", default="true",
                               choices=["true", "false"],
                               help="whether to plot algorithm footprints.")
+        opt_opts.add_argument("--incumbents", default="final",
+                              choices=["final", "trajectory", "none"],
+                              help="compare the final incumbents of all runs "
+                                   "(if there are several) or all "
+                                   "incumbents of their trajectories in a "
+                                   "table.")
+        opt_opts.add_argument("--portfolio", default="true",
+                              choices=["true", "false"],
+                              help="whether to analyze default and final "
+                                   "incumbents of all runs as a portfolio.")
+        opt_opts.add_argument("--watch", action="store_true",
+                              help="keep running after the analysis and "
+                                   "update the report whenever the "
+                                   "SMAC-runs write new data (for runs "
+                                   "that are still running).")
+        opt_opts.add_argument("--watch_interval", default=60, type=float,
+                              help="seconds between checks for new data "
+                                   "in watch-mode.")
 
         args_, misc = parser.parse_known_args()
 
@@ -98,7 +152,15 @@ class CaveCLI(object):
         cave = CAVE(folders, args_.output, args_.ta_exec_dir,
                     missing_data_method=args_.validation,
                     max_pimp_samples=args_.max_pimp_samples,
-                    fanova_pairwise=args_.fanova_pairwise)
+                    fanova_pairwise=args_.fanova_pairwise,
+                    n_jobs=args_.n_jobs,
+                    export_rh=args_.export_rh,
+                    validation_store=args_.validation_store,
+                    racing_confidence=args_.racing_confidence,
+                    model_cache=args_.model_cache,
+                    marginalization_samples=args_.marginalization_samples,
+                    ta_function=args_.ta_function,
+                    bootstrap_samples=args_.bootstrap_samples)
         # Expand configs
         if "all" in args_.param_importance:
             param_imp = ["ablation", "forward_selection", "fanova",
@@ -118,13 +180,19 @@ class CaveCLI(object):
 
         # Analyze
         #cave.analyze(performance=False, cdf=False, scatter=False, confviz=False,
-        cave.analyze(performance=True, cdf=True, scatter=True,
-                     confviz=args_.confviz == "true",
-                     parallel_coordinates=args_.parallel_coordinates == "true",
-                     cost_over_time=args_.cost_over_time == "true",
-                     algo_footprint=args_.algorithm_footprints == "true",
-                     param_importance=param_imp,
-                     feature_analysis=feature_analysis)
+        analyze_kwargs = dict(performance=True, cdf=True, scatter=True,
+                              confviz=args_.confviz == "true",
+                              parallel_coordinates=args_.parallel_coordinates == "true",
+                              cost_over_time=args_.cost_over_time == "true",
+                              algo_footprint=args_.algorithm_footprints == "true",
+                              incumbents=args_.incumbents,
+                              portfolio=args_.portfolio == "true",
+                              param_importance=param_imp,
+                              feature_analysis=feature_analysis)
+        cave.analyze(**analyze_kwargs)
+
+        if args_.watch:
+            cave.watch(interval=args_.watch_interval, **analyze_kwargs)
 
 def entry_point():
     cave = CaveCLI()
@@ -2,10 +2,11 @@ import os
 import logging
 from typing import Union
 from collections import OrderedDict
-from contextlib import contextmanager
 import typing
 import json
 import copy
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 from pandas import DataFrame
@@ -14,20 +15,35 @@ from ConfigSpace import Configuration
 from smac.epm.rf_with_instances import RandomForestWithInstances
 from smac.optimizer.objective import average_cost
 from smac.runhistory.runhistory import RunKey, RunValue, RunHistory
-from smac.runhistory.runhistory2epm import RunHistory2EPM4Cost
+from smac.utils.constants import MAXINT
 from smac.scenario.scenario import Scenario
 from smac.utils.io.traj_logging import TrajLogger
 from smac.utils.io.input_reader import InputReader
+from smac.utils.util_funcs import get_types
 from smac.utils.validate import Validator
 
 from pimp.importance.importance import Importance
 
 from cave.html.html_builder import HTMLBuilder
 from cave.plot.plotter import Plotter
-from cave.smacrun import SMACrun
+from cave.smacrun import ConfiguratorRun, SMACrun, load_run_data
 from cave.analyzer import Analyzer
+from cave.utils.function_tae import FunctionTAE, parse_function_spec
 from cave.utils.helpers import get_cost_dict_for_config
+from cave.utils.config_interning import intern
+from cave.utils.paths import changedir, resolve_path
+from cave.utils.racing import race
+from cave.utils.run_table import get_run_table
+from cave.utils.marginalization import get_marginalizer
+from cave.utils.model_registry import get_registry
+from cave.utils.prediction_cache import CachedModel, get_prediction_cache
+from cave.utils.imputation import get_training_data
+from cave.utils.runhistory_cache import load_runhistory
+from cave.utils.runhistory_export import EXPORT_FORMATS, export_in_background
+from cave.utils.scenario_cache import share_scenario
 from cave.utils.tooltips import get_tooltip
+from cave.utils.validation_store import ValidationStore
+from cave.utils.watch import FolderWatcher, get_new_runs
 
 from cave.feature_analysis.feature_analysis import FeatureAnalysis
 from cave.plot.algorithm_footprint import AlgorithmFootprint
@@ -38,18 +54,13 @@ __license__ = "3-clause BSD"
 __maintainer__ = "Joshua Marben"
 __email__ = "joshua.marben@neptun.uni-freiburg.de"
 
-@contextmanager
-def changedir(newdir):
-    """ Helper function to change directory, for example to create a scenario
-    from file, where paths to the instance- and feature-files are relative to
-    the original SMAC-execution-directory. Same with target algorithms that need
-    be executed for validation. """
-    olddir = os.getcwd()
-    os.chdir(os.path.expanduser(newdir))
+def _load_run_data(folder, ta_exec_dir):
+    """ Parse a single run in a worker process. Errors are returned instead of
+    raised, so one broken folder does not abort loading the others. """
     try:
-        yield
-    finally:
-        os.chdir(olddir)
+        return load_run_data(folder, ta_exec_dir), None
+    except Exception as err:
+        return None, str(err)
 
 class CAVE(object):
     """
@@ -57,7 +68,14 @@ class CAVE(object):
 
     def __init__(self, folders: typing.List[str], output: str,
                  ta_exec_dir: Union[str, None]=None, missing_data_method: str='epm',
-                 max_pimp_samples: int=-1, fanova_pairwise=True):
+                 max_pimp_samples: int=-1, fanova_pairwise=True,
+                 n_jobs: int=1, smac_facade: bool=False, export_rh: str='json',
+                 validation_store: Union[str, None]=None,
+                 racing_confidence: Union[float, None]=None,
+                 model_cache: Union[str, None]=None,
+                 marginalization_samples: Union[int, None]=None,
+                 ta_function: Union[str, None]=None,
+                 bootstrap_samples: int=1000):
         """
         Initialize CAVE facade to handle analyzing, plotting and building the
         report-page easily. During initialization, the analysis-infrastructure
@@ -80,6 +98,38 @@ class CAVE(object):
             execution directory for target algorithm (to find instance.txt, ..)
         missing_data_method: string
             from [validation, epm], how to estimate missing runs
+        n_jobs: int
+            number of worker processes to load the runs and to train EPMs
+            (as parallel sub-forests) with (-1 to use all cores)
+        smac_facade: bool
+            if True, build a full SMAC-facade for every run (SMACrun), else
+            only keep the data of the runs (ConfiguratorRun)
+        export_rh: string
+            from [json, json.gz, npz, none], format to save the combined
+            runhistory in (written in the background while analyzing)
+        validation_store: string
+            path to a sqlite-file to store runs of the target algorithm from
+            validation in, so they are not executed again in later invocations
+            (only used with missing_data_method 'validation')
+        racing_confidence: float
+            if set (and missing_data_method is 'validation'), default and
+            incumbents are raced: instances are validated in batches until a
+            paired test reaches this confidence, remaining pairs are estimated
+            with an EPM
+        model_cache: string
+            folder to save trained EPMs in, so they are reused when the report
+            is generated again (models are always shared within a session)
+        marginalization_samples: int
+            if set, EPM-predictions marginalized over instances (cost over
+            time, configurator footprint) are approximated on a stratified
+            subsample of this many instances, if the estimated error is small
+        ta_function: string
+            for Python target algorithms, 'path/to/file.py:function' (relative
+            to ta_exec_dir) to call in-process during validation instead of
+            the scenario's command-line, see cave.utils.function_tae
+        bootstrap_samples: int
+            number of resamples for the confidence intervals and the paired
+            permutation test in the performance table (0 to disable)
         """
         self.logger = logging.getLogger("cave.cavefacade")
         self.logger.debug("Folders: %s", str(folders))
@@ -99,6 +149,13 @@ class CAVE(object):
         handler.setLevel(logging.DEBUG)
         logger.addHandler(handler)
 
+        if model_cache:
+            get_registry().cache_dir = model_cache
+        get_registry().n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        self.n_jobs = n_jobs
+        self.bootstrap_samples = bootstrap_samples
+        get_marginalizer().n_samples = marginalization_samples
+
         # Global runhistory combines all actual runs of individual SMAC-runs
         # We save the combined (unvalidated) runhistory to disk, so we can use it later on.
         # We keep the validated runhistory (with as many runs as possible) in
@@ -107,46 +164,62 @@ class CAVE(object):
         # validated on different hardware (depending on validation-method).
         self.original_rh = RunHistory(average_cost)
         self.validated_rh = RunHistory(average_cost)
+        # Runs executed for validation, reused when data is completed again
+        self.executed_rh = RunHistory(average_cost)
+
+        # Remember state of output-files before loading, so changes of running
+        # SMAC-runs can be detected later on (see watch)
+        self.watcher = FolderWatcher(folders)
 
         # Save all relevant SMAC-runs in a list
-        self.runs = []
-        for folder in folders:
-            try:
-                self.logger.debug("Collecting data from %s.", folder)
-                self.runs.append(SMACrun(folder, ta_exec_dir))
-            except Exception as err:
-                self.logger.warning("Folder %s could not be loaded, failed "
-                                    "with error message: %s", folder, err)
-                continue
+        self.runs = self.load_runs(folders, ta_exec_dir, n_jobs,
+                                   SMACrun if smac_facade else ConfiguratorRun)
         if not len(self.runs):
             raise ValueError("None of the specified SMAC-folders could be loaded.")
 
         # Use scenario of first run for general purposes (expecting they are all the same anyway!)
-        self.scenario = self.runs[0].solver.scenario
+        self.scenario = self.runs[0].scen
 
-        # Update global runhistory with all available runhistories
+        # Update global runhistory with all available runhistories (already
+        # loaded by the runs, so no need to parse the json-files again)
         self.logger.debug("Update original rh with all available rhs!")
-        runhistory_fns = [os.path.join(run.folder, "runhistory.json") for run in self.runs]
-        for rh_file in runhistory_fns:
-            self.original_rh.update_from_json(rh_file, self.scenario.cs)
+        for run in self.runs:
+            self.original_rh.update(run.runhistory)
         self.logger.debug('Combined number of Runhistory data points: %d. '
                           '# Configurations: %d. # Runhistories: %d',
                           len(self.original_rh.data),
                           len(self.original_rh.get_all_configs()),
-                          len(runhistory_fns))
-        self.original_rh.save_json(os.path.join(self.output, "combined_rh.json"))
+                          len(self.runs))
+        self.export_rh = export_rh
+        self._export_thread = None
+        self.export_runhistory()
 
         # Validator for a) validating with epm, b) plot over time
         # Initialize without trajectory
         self.validator = Validator(self.scenario, None, None)
+        self.epm_seed = self.validator.rng.randint(MAXINT)
+        self.tae = None  # default: the scenario's command-line
+        if ta_function:
+            path, name = parse_function_spec(ta_function)
+            self.tae = FunctionTAE.from_scenario(resolve_path(path, ta_exec_dir),
+                                                 name, self.scenario)
+
+        self.validation_store = None
+        if validation_store:
+            self.validation_store = ValidationStore(validation_store,
+                                                    self.runs[0].scen_key,
+                                                    self.scenario.cutoff)
+
+        self.racing_confidence = racing_confidence
+        self.racing_results = {}  # interned incumbent -> (confidence, #instances)
 
         # Estimate missing costs for [def, inc1, inc2, ...]
+        self.missing_data_method = missing_data_method
         self.complete_data(method=missing_data_method)
-        self.best_run = min(self.runs, key=lambda run:
-                self.validated_rh.get_cost(run.solver.incumbent))
+        self.best_run = self._get_best_run()
 
         self.default = self.scenario.cs.get_default_configuration()
-        self.incumbent = self.best_run.solver.incumbent
+        self.incumbent = self.best_run.incumbent
 
         self.logger.debug("Overall best run: %s, with incumbent: %s",
                           self.best_run.folder, self.incumbent)
@@ -165,28 +238,393 @@ class CAVE(object):
         # Builder for html-website
         self.website = OrderedDict([])
 
+    def load_runs(self, folders, ta_exec_dir, n_jobs=1, run_class=ConfiguratorRun):
+        """Load all SMAC-runs. With more than one job, the folders are parsed
+        concurrently in worker processes (each with its own working directory).
+        The runs are returned in the order of the folders, independent of the
+        order in which the workers finish. Folders that cannot be loaded in a
+        worker (e.g. if the pool breaks) are loaded sequentially, folders that
+        cannot be loaded at all are skipped with a warning.
+
+        Parameters
+        ----------
+        folders: List[str]
+            paths to SMAC runs
+        ta_exec_dir: str
+            execution directory for target algorithm
+        n_jobs: int
+            number of worker processes (-1 to use all cores)
+        run_class: type
+            ConfiguratorRun or SMACrun
+
+        Returns
+        -------
+        runs: List[ConfiguratorRun or SMACrun]
+            successfully loaded runs, in folder-order
+        """
+        if n_jobs == -1:
+            n_jobs = os.cpu_count()
+        n_jobs = min(n_jobs, len(folders))
+        # (None, None) means the folder is loaded sequentially below
+        results = [(None, None)] * len(folders)
+        if n_jobs > 1:
+            self.logger.debug("Loading %d folders with %d processes.",
+                              len(folders), n_jobs)
+            try:
+                with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                    futures = [executor.submit(_load_run_data, folder, ta_exec_dir)
+                               for folder in folders]
+                    for idx, (folder, future) in enumerate(zip(folders, futures)):
+                        try:
+                            results[idx] = future.result()
+                        except Exception as err:
+                            # E.g. BrokenProcessPool or unpicklable results
+                            self.logger.warning("Loading %s in worker process "
+                                                "failed (%s), loading it "
+                                                "sequentially.", folder, repr(err))
+            except Exception as err:
+                self.logger.warning("Process pool failed (%s), loading "
+                                    "remaining folders sequentially.", repr(err))
+
+        runs = []
+        for folder, (data, err) in zip(folders, results):
+            self.logger.debug("Collecting data from %s.", folder)
+            if err is None:
+                try:
+                    if data:
+                        # Share scenarios that were parsed in different workers
+                        data = data._replace(scen=share_scenario(data.scen_key, data.scen))
+                    runs.append(run_class(folder, ta_exec_dir, data=data))
+                    continue
+                except Exception as e:
+                    err = e
+            self.logger.warning("Folder %s could not be loaded, failed "
+                                "with error message: %s", folder, err)
+        return runs
+
+    def export_runhistory(self):
+        """Save the combined runhistory to 'combined_rh.<format>' in the
+        output-directory on a background thread (waiting for a previous export
+        to finish first). """
+        if self.export_rh == 'none':
+            return
+        if self.export_rh not in EXPORT_FORMATS:
+            raise ValueError("%s not a valid format to export runhistory!" %
+                             self.export_rh)
+        if self._export_thread:
+            self._export_thread.join()
+        self._export_thread = export_in_background(
+                self.original_rh, os.path.join(self.output, "combined_rh"),
+                self.export_rh)
+
     def complete_data(self, method="epm"):
         """Complete missing data of runs to be analyzed. Either using validation
-        or EPM.
+        or EPM. The default and the incumbents of all runs are collected
+        first (without duplicates) and each of them is validated or estimated
+        exactly once. With an EPM, one model trained on the combined
+        runhistory is used for all of them.
+        """
+        self.logger.info("Completing data using %s.", method)
+
+        if method == "epm":
+            if self.validator.epm is None:
+                self.validator.epm = self._train_epm(self.original_rh)
+            new_rh = self.validator.validate_epm(self._get_def_and_incs(),
+                                                 'train+test', 1,
+                                                 runhistory=self.original_rh)
+            self.validated_rh.update(new_rh)
+            return
+        elif method != "validation":
+            raise ValueError("Missing data method illegal (%s)", method)
+
+        known_rh = self.original_rh
+        if self.validation_store or self.racing_confidence or self.executed_rh.data:
+            # Executed runs are added to a copy, so they are reused later on
+            known_rh = RunHistory(average_cost)
+            known_rh.update(self.original_rh)
+            known_rh.update(self.executed_rh)
+        if self.validation_store:
+            # Runs that were validated before are reused by the validator
+            n = self.validation_store.load(self._get_def_and_incs(), known_rh)
+            self.logger.info("Loaded %d validated runs from %s.", n,
+                             self.validation_store.path)
+
+        if self.racing_confidence:
+            insts = [i for i in set(self.scenario.train_insts +
+                                    self.scenario.test_insts) if i is not None]
+            if insts:
+                self._race(known_rh, sorted(insts))
+                return
+            self.logger.warning("Racing needs instances, validating "
+                                "without racing.")
+
+        # Validate default and incumbents of all runs at once, so
+        # configurations shared by several runs are only validated once.
+        # TODO determine # repetitions
+        new_rh = self._validate(self._get_def_and_incs(), 'train+test', known_rh)
+        if self.validation_store:
+            self.validation_store.save(get_new_runs(known_rh, new_rh))
+        self.validated_rh.update(new_rh)
+
+    def _complete_trajectory_data(self):
+        """Estimate the trajectory-incumbents of all runs that are not in the
+        validated runhistory (usually all but the final ones) with the EPM,
+        so they can be compared to the final incumbents."""
+        missing, seen = [], set()
+        for run in self.runs:
+            for entry in run.traj:
+                config = entry['incumbent']
+                id_ = intern(config)
+                if id_ not in seen and config not in self.validated_rh.config_ids:
+                    seen.add(id_)
+                    missing.append(config)
+        if not missing:
+            return
+        self.logger.info("Estimating %d trajectory-incumbents using EPM.",
+                         len(missing))
+        if self.validator.epm is None:
+            self.validator.epm = self._train_epm(self.original_rh)
+        new_rh = self.validator.validate_epm(missing, 'train+test', 1,
+                                             runhistory=self.original_rh)
+        self.validated_rh.update(new_rh)
+
+    def _race(self, known_rh, instances):
+        """Race every incumbent against the default (see cave.utils.racing).
+        Validated runs are added to known_rh and the validated runhistory,
+        pairs that were not validated are estimated with an EPM afterwards.
+
+        Parameters
+        ----------
+        known_rh: RunHistory
+            runs available for reuse (copy of original runhistory)
+        instances: List[str]
+            instances to race on
+        """
+        def validate(configs, insts):
+            new_rh = self._validate(configs, insts, known_rh)
+            executed = get_new_runs(known_rh, new_rh)
+            if self.validation_store:
+                self.validation_store.save(executed)
+            known_rh.update(executed)
+            self.validated_rh.update(new_rh)
+
+        configs = self._get_def_and_incs()
+        default, incumbents = configs[0], configs[1:]
+        for inc in incumbents:
+            def evaluate(batch):
+                validate([default, inc], batch)
+                return (get_cost_dict_for_config(known_rh, default),
+                        get_cost_dict_for_config(known_rh, inc))
+            conf, n = race(evaluate, instances, self.racing_confidence)
+            self.logger.info("Raced incumbent against default: confidence "
+                             "%.3f on %d instances.", conf, n)
+            self.racing_results[intern(inc)] = (conf, n)
+
+        # Estimate remaining pairs (the EPM is trained on actual runs only)
+        new_rh = self.validator.validate_epm(configs, 'train+test', 1,
+                                             runhistory=known_rh)
+        self.validated_rh.update(new_rh)
+
+    def _validate(self, configs, instance_mode, known_rh):
+        """Validate configs on all cores, reusing runs in known_rh. The target
+        algorithm expects to be called from the SMAC-execution-directory. It is
+        executed in a subprocess per run, or, with a Python-function as target
+        (see ta_function), in-process on a pool of worker processes that
+        import the function once.
+
+        Returns
+        -------
+        new_rh: RunHistory
+            validated runs (incl. reused runs)
         """
+        backend = 'multiprocessing' if self.tae else 'threading'
         with changedir(self.ta_exec_dir if self.ta_exec_dir else '.'):
-            self.logger.info("Completing data using %s.", method)
-
-            path_for_validated_rhs = os.path.join(self.output, "validated_rhs")
-            for run in self.runs:
-                self.validator.traj = run.traj
-                if method == "validation":
-                    # TODO determine # repetitions
-                    new_rh = self.validator.validate('def+inc', 'train+test', 1, -1,
-                                                     runhistory=self.original_rh)
-                elif method == "epm":
-                    new_rh = self.validator.validate_epm('def+inc', 'train+test', 1,
-                                                         runhistory=self.original_rh)
+            new_rh = self.validator.validate(configs, instance_mode, 1, -1,
+                                             backend=backend,
+                                             runhistory=known_rh, tae=self.tae)
+        self.executed_rh.update(get_new_runs(self.original_rh, new_rh))
+        return new_rh
+
+    def _train_epm(self, rh):
+        """Train the validator's EPM on rh like the validator would, but
+        through the model registry. So a model trained on the same data (e.g.
+        in an earlier session) is reused and it is trained in parallel
+        sub-forests if n_jobs is larger than 1. Its predictions (by all stages
+        using the validator) go through the prediction cache. The seed is
+        drawn once from the validator's random state and censored runs are
+        imputed as by the validator, through the imputation cache."""
+        seed = self.epm_seed
+        X, y = get_training_data(self.scenario, rh, log=False, seed=seed)
+        self.logger.debug("Training model with data of shape X: %s, y:%s",
+                          str(X.shape), str(y.shape))
+        types, bounds = get_types(self.scenario.cs, self.scenario.feature_array)
+        return CachedModel(get_registry().get_or_train(
+                X, y, types, bounds, instance_features=self.scenario.feature_array,
+                seed=seed, ratio_features=1.0))
+
+    def _get_best_run(self):
+        """ Run whose final incumbent has the lowest mean cost in the validated
+        runhistory (computed for all runs at once). """
+        costs = np.full(len(self.runs), np.inf)
+        idx = [i for i, run in enumerate(self.runs)
+               if run.incumbent in self.validated_rh.config_ids]
+        if idx:
+            costs[idx] = get_run_table(self.validated_rh).get_mean_costs(
+                    [self.runs[i].incumbent for i in idx])
+        return self.runs[int(np.argmin(np.where(np.isnan(costs), np.inf, costs)))]
+
+    def _get_def_and_incs(self):
+        """ Default and final incumbents of all runs, without duplicates. """
+        configs, seen = [], set()
+        for config in [self.scenario.cs.get_default_configuration()] + \
+                      [run.incumbent for run in self.runs]:
+            id_ = intern(config)
+            if id_ not in seen:
+                seen.add(id_)
+                configs.append(config)
+        return configs
+
+    def _get_portfolio(self):
+        """Default and final incumbents of all runs (without duplicates) with
+        names (default and/or the folders of the runs).
+
+        Returns
+        -------
+        configs: List[Configuration]
+            configurations, as in _get_def_and_incs
+        names: List[str]
+            names of the configurations
+        """
+        configs = self._get_def_and_incs()
+        names = OrderedDict((intern(c), []) for c in configs)
+        names[intern(configs[0])].append("default")
+        for run in self.runs:
+            names[intern(run.incumbent)].append(
+                    os.path.basename(os.path.normpath(run.folder)))
+        return configs, [", ".join(n) for n in names.values()]
+
+    def update_runs(self, changed, retrain_threshold=0.1):
+        """Merge new data of SMAC-runs that are still running. Only new run
+        records are added to the runhistories, data is completed again and the
+        EPM is only retrained if the number of new runs is large.
+
+        Parameters
+        ----------
+        changed: dict[str->List[str]]
+            maps folders to changed files, as returned by FolderWatcher.poll
+        retrain_threshold: float
+            retrain EPM if the new runs make up more than this fraction of all
+            runs, else reuse it
+
+        Returns
+        -------
+        changed_inputs: set[str]
+            subset of {"runhistory", "trajectory", "incumbent"}
+        """
+        changed_inputs = set()
+        n_new = 0
+        for run in self.runs:
+            files = changed.get(run.folder, [])
+            if 'runhistory.json' in files:
+                try:
+                    new_rh = load_runhistory(os.path.join(run.folder, 'runhistory.json'),
+                                             run.scen.cs)
+                except ValueError as err:
+                    # Most likely still being written by SMAC
+                    self.logger.warning("Could not read runhistory in %s (%s), "
+                                        "retrying on next check.", run.folder, err)
+                    self.watcher.retry(run.folder, 'runhistory.json')
+                    new_rh = run.runhistory
+                delta = get_new_runs(run.runhistory, new_rh)
+                if delta.data:
+                    self.logger.info("%d new runs in %s", len(delta.data), run.folder)
+                    run.runhistory.update(delta)
+                    self.original_rh.update(delta)
+                    n_new += len(delta.data)
+                    changed_inputs.add("runhistory")
+            if 'traj_aclib2.json' in files:
+                try:
+                    traj = TrajLogger.read_traj_aclib_format(
+                            fn=os.path.join(run.folder, 'traj_aclib2.json'), cs=run.scen.cs)
+                except ValueError as err:
+                    self.logger.warning("Could not read trajectory in %s (%s), "
+                                        "retrying on next check.", run.folder, err)
+                    self.watcher.retry(run.folder, 'traj_aclib2.json')
+                    traj = run.traj
+                if len(traj) != len(run.traj):
+                    self.logger.info("New incumbent in %s", run.folder)
+                    run.set_trajectory(traj)
+                    changed_inputs.add("trajectory")
+        if not changed_inputs:
+            return changed_inputs
+
+        if n_new:
+            self.export_runhistory()
+        if n_new > retrain_threshold * len(self.original_rh.data):
+            self.logger.debug("Retraining EPM (%d new runs).", n_new)
+            self.validator.epm = None
+        else:
+            self.logger.debug("Reusing EPM (%d new runs).", n_new)
+
+        # Validated runs are kept in executed_rh, so only new pairs of
+        # configurations and instances are validated
+        self.validated_rh = RunHistory(average_cost)
+        self.complete_data(method=self.missing_data_method)
+        self.best_run = self._get_best_run()
+        if intern(self.best_run.incumbent) != intern(self.incumbent):
+            changed_inputs.add("incumbent")
+        self.incumbent = self.best_run.incumbent
+        self.analyzer.update_data(self.validated_rh, self.incumbent,
+                                  runs_changed=n_new > 0)
+        return changed_inputs
+
+    def watch(self, interval=60, max_updates=None, retrain_threshold=0.1,
+              **analyze_kwargs):
+        """Follow SMAC-runs that are still running. The folders are checked
+        for changes of runhistory.json and traj_aclib2.json every interval
+        seconds. New data is merged (see update_runs) and only report-sections
+        whose inputs changed are recomputed. Stop with Ctrl-C.
+
+        Parameters
+        ----------
+        interval: float
+            seconds between checks
+        max_updates: int
+            stop after this many updates, if None watch until interrupted
+        retrain_threshold: float
+            see update_runs
+        analyze_kwargs: dict
+            arguments for analyze (same as for the initial analysis)
+        """
+        updates = 0
+        self.logger.info("Watching %d folders for changes (every %ds).",
+                         len(self.runs), interval)
+        try:
+            while max_updates is None or updates < max_updates:
+                time.sleep(interval)
+                changed = self.watcher.poll()
+                if not changed:
+                    continue
+                changed_inputs = self.update_runs(changed, retrain_threshold)
+                if not changed_inputs:
+                    continue
+                kwargs = dict(analyze_kwargs)
+                if "runhistory" not in changed_inputs:
+                    # Only the trajectories changed, analysis of the explored
+                    # configurations and the features is still up-to-date,
+                    # parameter importance only if the incumbent is the same
+                    if "incumbent" not in changed_inputs:
+                        kwargs["param_importance"] = []
+                        kwargs["parallel_coordinates"] = False
+                    kwargs["feature_analysis"] = []
                 else:
-                    raise ValueError("Missing data method illegal (%s)",
-                                     method)
-                self.validator.traj = None  # Avoid usage-mistakes
-                self.validated_rh.update(new_rh)
+                    # Feature-distributions do not depend on the runs
+                    kwargs["feature_analysis"] = [f for f in
+                            kwargs.get("feature_analysis", []) if f == "importance"]
+                self.analyze(**kwargs)
+                updates += 1
+        except KeyboardInterrupt:
+            self.logger.info("Stopped watching.")
 
     def analyze(self,
                 performance=True, cdf=True, scatter=True, confviz=True,
@@ -194,7 +632,7 @@ class CAVE(object):
                 feature_analysis=["box_violin", "correlation",
                     "feat_importance", "clustering", "feature_cdf"],
                 parallel_coordinates=True, cost_over_time=True,
-                algo_footprint=True):
+                algo_footprint=True, incumbents='final', portfolio=True):
         """Analyze the available data and build HTML-webpage as dict.
         Save webpage in 'self.output/CAVE/report.html'.
         Analyzing is performed with the analyzer-instance that is initialized in
@@ -220,6 +658,14 @@ class CAVE(object):
             whether to plot cost over time
         algo_footprint: bool
             whether to plot algorithm footprints
+        incumbents: str
+            from [final, trajectory, none], compare the final incumbents of
+            all runs (if there are several), or all incumbents of the
+            trajectories in a table
+        portfolio: bool
+            whether to analyze default and final incumbents of all runs as a
+            portfolio (virtual best solver, marginal contributions, greedy
+            portfolio)
         """
 
         # Check arguments
@@ -244,9 +690,25 @@ class CAVE(object):
 
         if performance:
             performance_table = self.analyzer.create_performance_table(
-                                self.default, self.incumbent)
+                                self.default, self.incumbent,
+                                racing=self.racing_results.get(intern(self.incumbent)),
+                                n_resamples=self.bootstrap_samples,
+                                n_jobs=self.n_jobs)
             self.website["Performance Analysis"]["Performance Table"] = {"table": performance_table}
 
+        if incumbents == 'trajectory':
+            self._complete_trajectory_data()
+        if incumbents == 'trajectory' or (incumbents == 'final' and len(self.runs) > 1):
+            incumbent_table = self.analyzer.create_incumbent_table(
+                                self.runs, trajectory=incumbents == 'trajectory')
+            self.website["Performance Analysis"]["Incumbents of all runs"] = {"table": incumbent_table}
+
+        if portfolio:
+            configs, names = self._get_portfolio()
+            if len(configs) > 1:
+                portfolio_table = self.analyzer.create_portfolio_table(configs, names)
+                self.website["Performance Analysis"]["Portfolio Analysis"] = {"table": portfolio_table}
+
         if cdf:
             cdf_path = self.analyzer.plot_cdf()
             self.website["Performance Analysis"]["empirical Cumulative Distribution Function (eCDF)"] = {
@@ -263,11 +725,8 @@ class CAVE(object):
         self.build_website()
 
         if algo_footprint and self.scenario.feature_dict:
+            # Incumbents of all runs are compared in the portfolio analysis
             algorithms = {self.default: "default", self.incumbent: "incumbent"}
-            # Add all available incumbents to test portfolio strategy
-            #for r in self.runs:
-            #    if not r.get_incumbent() in algorithms:
-            #        algorithms[r.get_incumbent()] = str(self.runs.index(r))
 
             algo_footprint_plots = self.analyzer.plot_algorithm_footprint(algorithms)
             self.website["Performance Analysis"]["Algorithm Footprints"] = OrderedDict()
@@ -281,13 +740,14 @@ class CAVE(object):
         self.build_website()
 
         ########### Configurator's behavior
-        self.website["Configurator's behavior"] = OrderedDict()
+        # Keep sections from previous analyses (see watch)
+        self.website.setdefault("Configurator's behavior", OrderedDict())
 
         if confviz:
             if self.scenario.feature_array is None:
                 self.scenario.feature_array = np.array([[]])
             # Sort runhistories and incs wrt cost
-            incumbents = [r.solver.incumbent for r in self.runs]
+            incumbents = [r.incumbent for r in self.runs]
             trajectories = [r.traj for r in self.runs]
             runhistories = [r.runhistory for r in self.runs]
             costs = [self.validated_rh.get_cost(i) for i in incumbents]
@@ -322,6 +782,10 @@ class CAVE(object):
         if parallel_coordinates:
             # Should be after parameter importance, if performed.
             n_params = 6
+            if self.validator.epm is None:
+                # Share the (cached) EPM instead of letting the validator
+                # train its own
+                self.validator.epm = self._train_epm(self.original_rh)
             parallel_path = self.analyzer.plot_parallel_coordinates(n_params)
             self.website["Configurator's behavior"]["Parallel Coordinates"] = {
                          "figure" : parallel_path}
@@ -336,6 +800,7 @@ class CAVE(object):
         else:
             self.logger.info('No feature analysis possible')
 
+        get_prediction_cache().log_stats()
         self.logger.info("CAVE finished. Report is located in %s",
                          os.path.join(self.output, 'report.html'))
 
@@ -417,20 +882,21 @@ class CAVE(object):
         feat_fn = self.scenario.feature_fn
 
         if not self.scenario.feature_names:
-            with changedir(self.ta_exec_dir if self.ta_exec_dir else '.'):
-                if not feat_fn or not os.path.exists(feat_fn):
-                    self.logger.warning("Feature Analysis needs valid feature "
-                                        "file! Either {} is not a valid "
-                                        "filename or features are not saved in "
-                                        "the scenario.")
-                    self.logger.error("Skipping Feature Analysis.")
-                    return
-                else:
-                    feat_names = in_reader.read_instance_features_file(self.scenario.feature_fn)[0]
+            if feat_fn:
+                feat_fn = resolve_path(feat_fn, self.ta_exec_dir)
+            if not feat_fn or not os.path.exists(feat_fn):
+                self.logger.warning("Feature Analysis needs valid feature "
+                                    "file! Either {} is not a valid "
+                                    "filename or features are not saved in "
+                                    "the scenario.")
+                self.logger.error("Skipping Feature Analysis.")
+                return
+            else:
+                feat_names = in_reader.read_instance_features_file(feat_fn)[0]
         else:
             feat_names = copy.deepcopy(self.scenario.feature_names)
 
-        self.website["Feature Analysis"] = OrderedDict([])
+        self.website.setdefault("Feature Analysis", OrderedDict([]))
 
         # feature importance using forward selection
         if importance:
@@ -56,8 +56,8 @@ class FeatureAnalysis(object):
         self.feat_imp = feat_importance
         self.feature_data = {}
         for name in feat_names:
-            insts = self.scenario.train_insts
-            insts.extend(self.scenario.test_insts)
+            # Copy, the scenario is shared and must not be modified
+            insts = self.scenario.train_insts + self.scenario.test_insts
             self.feature_data[name] = {}
             for i in insts:
                 self.feature_data[name][i] = copy.deepcopy(self.scenario.feature_dict[i][feat_names.index(name)])
@@ -8,10 +8,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 
 from smac.runhistory.runhistory2epm import RunHistory2EPM4Cost
-from smac.epm.rf_with_instances import RandomForestWithInstances
 from smac.utils.util_funcs import get_types
 from smac.tae.execute_ta_run import StatusType
 
+from cave.utils.model_registry import get_registry
+
 class FeatureForwardSelector():
     """ Inspired by forward selection of ParameterImportance-package. """
 
@@ -139,10 +140,10 @@ class FeatureForwardSelector():
             corresponding y vector
         """
         # take at most 80% of the data per split to ensure enough data for oob error
-        self.model = RandomForestWithInstances(types=types, bounds=bounds, do_bootstrapping=True,
-                                               n_points_per_tree=int(X.shape[1]*0.8))
-        self.model.rf_opts.compute_oob_error = True
-        self.model.train(X, y)
+        self.model = get_registry().get_or_train(X, y, types, bounds,
+                                                 rf_opts={'compute_oob_error': True},
+                                                 do_bootstrapping=True,
+                                                 n_points_per_tree=int(X.shape[1]*0.8))
 
     def _plot_result(self, output_fn, bar=True):
         """
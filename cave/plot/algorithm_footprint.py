@@ -17,7 +17,7 @@ import pandas as pd
 from smac.configspace import Configuration
 from smac.runhistory.runhistory import RunHistory
 
-from cave.utils.helpers import get_cost_dict_for_config, get_timeout
+from cave.utils.helpers import get_cost_matrix
 
 __author__ = "Joshua Marben"
 __copyright__ = "Copyright 2017, ML4AAD"
@@ -65,6 +65,7 @@ class AlgorithmFootprint(object):
         self.algorithms = algorithms.keys()  # Configs
         self.algo_names = algorithms         # Maps config -> name
         self.algo_performance = {}           # Maps instance -> performance
+        self.performance = None              # algorithms x instances
         self.algo_labels = {}                # Maps config -> label
 
         self.features = np.array([inst_feat[k] for k in self.insts])
@@ -80,9 +81,22 @@ class AlgorithmFootprint(object):
         Return performance according to (possibly EPM-)validated runhistory.
         """
         if not algorithm in self.algo_performance:
-            self.algo_performance[algorithm] = get_cost_dict_for_config(self.rh, algorithm)
+            self.get_performance_matrix()
         return self.algo_performance[algorithm][instance]
 
+    def get_performance_matrix(self):
+        """
+        Return performance of all algorithms (rows) on all instances (columns,
+        in the order of self.insts), nan where no data is available.
+        """
+        if self.performance is None:
+            self.performance, _ = get_cost_matrix(self.rh, list(self.algorithms),
+                                                  self.insts)
+            for a, row in zip(self.algorithms, self.performance):
+                self.algo_performance[a] = {i: p for i, p in zip(self.insts, row)
+                                            if not np.isnan(p)}
+        return self.performance
+
     def footprint(self, a, density_threshold, purity_threshold):
         """
         Calculating the footprint within a portfolio using convex hulls that
@@ -225,25 +239,15 @@ class AlgorithmFootprint(object):
             maps instance-names (strings) to label (floats)
         """
         start = time.time()
-        self.algo_labels = {a:{} for a in self.algorithms}
-        for i in self.insts:
-            performances = [self.get_performance(a, i) for a in self.algorithms]
-            best_performance = min(performances)
-            for a in self.algorithms:
-                performance = self.get_performance(a, i)
-                #self.logger.debug("%s on \'%s\': best/this (%f/%f=%f)",
-                #                  self.algo_names[a], i,
-                #                  best_performance, performance,
-                #                  best_performance / performance)
-                if (performance == 0 or
-                    (best_performance/performance >= epsilon and
-                     not performance >= self.cutoff)):
-                    # Algorithm for instance is in threshhold epsilon
-                    #   and no timeout
-                    label = 1
-                else:
-                    label = 0
-                self.algo_labels[a][i] = label
+        performance = self.get_performance_matrix()
+        best_performance = np.min(performance, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Algorithm for instance is in threshhold epsilon and no timeout
+            labels = ((performance == 0) |
+                      ((best_performance / performance >= epsilon) &
+                       ~(performance >= self.cutoff)))
+        self.algo_labels = {a: {i: int(label) for i, label in zip(self.insts, row)}
+                            for a, row in zip(self.algorithms, labels)}
         self.logger.debug("Labeling instances in %.2f secs.", time.time() - start)
 
     def plot_points_per_cluster(self):
@@ -3,18 +3,14 @@
 import numpy as np
 
 from smac.scenario.scenario import Scenario
-from smac.tae.execute_ta_run import StatusType
-
 from smac.runhistory.runhistory import RunHistory
-from smac.runhistory.runhistory2epm import RunHistory2EPM4LogCost, RunHistory2EPM4Cost
-
-from smac.epm.rf_with_instances import RandomForestWithInstances
-from smac.epm.rfr_imputator import RFRImputator
 
 from ConfigSpace.read_and_write import pcs
 from ConfigSpace.hyperparameters import CategoricalHyperparameter, \
     UniformFloatHyperparameter, UniformIntegerHyperparameter, Constant
 
+from cave.utils.imputation import get_training_data
+
 
 def convert_data(scenario:Scenario, runhistory:RunHistory):
     '''
@@ -51,40 +47,7 @@ def convert_data(scenario:Scenario, runhistory:RunHistory):
 
     types = np.array(types, dtype=np.uint)
 
-    model = RandomForestWithInstances(types, scenario.feature_array)
-
-    params = scenario.cs.get_hyperparameters()
-    num_params = len(params)
-
-    if scenario.run_obj == "runtime":
-        # if we log the performance data,
-        # the RFRImputator will already get
-        # log transform data from the runhistory
-        cutoff = np.log10(scenario.cutoff)
-        threshold = np.log10(scenario.cutoff *
-                             scenario.par_factor)
-
-        imputor = RFRImputator(rng=np.random.RandomState(42),
-                               cutoff=cutoff,
-                               threshold=threshold,
-                               model=model,
-                               change_threshold=0.01,
-                               max_iter=10)
-        # TODO: Adapt runhistory2EPM object based on scenario
-        rh2EPM = RunHistory2EPM4LogCost(scenario=scenario,
-                                        num_params=num_params,
-                                        success_states=[
-                                            StatusType.SUCCESS, ],
-                                        impute_censored_data=True,
-                                        impute_state=[
-                                            StatusType.TIMEOUT, ],
-                                        imputor=imputor)
-    else:
-        rh2EPM = RunHistory2EPM4Cost(scenario=scenario,
-                                     num_params=num_params,
-                                     success_states=None,
-                                     impute_censored_data=False,
-                                     impute_state=None)
-    X, Y = rh2EPM.transform(runhistory)
+    # Imputation of censored data is shared with other stages
+    X, Y = get_training_data(scenario, runhistory)
 
     return X, Y, types
@@ -41,7 +41,6 @@ if cmd_folder not in sys.path:
 from smac.scenario.scenario import Scenario
 from smac.runhistory.runhistory import RunHistory, DataOrigin
 from smac.optimizer.objective import average_cost
-from smac.epm.rf_with_instances import RandomForestWithInstances
 from smac.configspace import ConfigurationSpace, Configuration
 from smac.utils.util_funcs import get_types
 from ConfigSpace.util import impute_inactive_values
@@ -49,6 +48,30 @@ from ConfigSpace.hyperparameters import FloatHyperparameter, IntegerHyperparamet
 from ConfigSpace import CategoricalHyperparameter, UniformFloatHyperparameter, UniformIntegerHyperparameter
 
 from cave.plot.confs_viz.utils.set_up import convert_data
+from cave.utils.config_interning import intern, intern_all, get_vectors
+from cave.utils.model_registry import get_registry
+from cave.utils.marginalization import get_marginalizer
+
+
+def reduce_features(feats, feat_dict):
+    """Map the instance-features of a row of the training data to the reduced
+    features of that instance.
+
+    Parameters
+    ----------
+    feats: np.array
+        original features (the columns after the parameters)
+    feat_dict: dict
+        bytes of original features -> reduced features, empty if the scenario
+        has no features
+
+    Returns
+    -------
+    feats: np.array
+        reduced features, feats itself if there is no mapping for them
+    """
+    reduced = feat_dict.get(np.asarray(feats, dtype=np.float64).tobytes())
+    return feats if reduced is None else reduced
 
 
 class SampleViz(object):
@@ -80,6 +103,7 @@ class SampleViz(object):
         self.logger = logging.getLogger(
             self.__module__ + '.' + self.__class__.__name__)
 
+        self.orig_scenario = scenario
         self.scenario = copy.deepcopy(scenario)  # pca changes feats
         self.runhistories = runhistories
         self.incs = incs
@@ -151,15 +175,21 @@ class SampleViz(object):
         for rh in self.runhistories:
             for key, value in rh.data.items():
                 config = rh.ids_config[key.config_id]
-                if config in self.configs_to_plot:
+                if intern(config) in self.ids_to_plot:
                     config_id, instance, seed = key
                     cost, time, status, additional_info = value
                     new_rh.add(config, cost, time, status, instance_id=instance,
                                seed=seed, additional_info=additional_info)
         self.relevant_rh = new_rh
 
-        X, y, types = convert_data(scenario=self.scenario,
-                                   runhistory=new_rh)
+        # The (imputed) training data of all runs is shared with other
+        # stages, so it is computed on the original features and reduced to
+        # the wanted configs and the features in 2dim afterwards
+        combined_rh = RunHistory(average_cost)
+        for rh in self.runhistories:
+            combined_rh.update(rh)
+        X, y, types = convert_data(scenario=self.orig_scenario,
+                                   runhistory=combined_rh)
 
         types = np.array(np.zeros((2+n_feats)), dtype=np.uint)
 
@@ -170,21 +200,26 @@ class SampleViz(object):
         for idx, c in enumerate(conf_list):
             conf_list[idx] = impute_inactive_values(c)
             conf_dict[str(conf_list[idx].get_array())] = X_scaled[idx, :]
-
-        X_trans = []
-        for x in X:
-            x_scaled_conf = conf_dict[str(x[:num_params])]
+        feat_dict = {np.asarray(self.orig_scenario.feature_dict[inst],
+                                dtype=np.float64).tobytes(): np.asarray(feats)
+                     for inst, feats in self.scenario.feature_dict.items()}
+
+        X_trans, y_trans = [], []
+        for x, y_ in zip(X, y):
+            x_scaled_conf = conf_dict.get(str(x[:num_params]))
+            if x_scaled_conf is None:
+                continue
+            feats = reduce_features(x[num_params:], feat_dict)
             x_new = np.concatenate(
-                        (x_scaled_conf, x[num_params:]), axis=0)
+                        (x_scaled_conf, feats), axis=0)
             X_trans.append(x_new)
-        X_trans = np.array(X_trans)
+            y_trans.append(y_)
+        X_trans, y = np.array(X_trans), np.array(y_trans)
 
         bounds = np.array([(0, np.nan), (0, np.nan)], dtype=object)
-        model = RandomForestWithInstances(types=types, bounds=bounds,
-                                          instance_features=np.array(self.scenario.feature_array),
-                                          ratio_features=1.0)
-
-        model.train(X_trans, y)
+        model = get_registry().get_or_train(X_trans, y, types, bounds,
+                                            instance_features=np.array(self.scenario.feature_array),
+                                            ratio_features=1.0)
 
         self.logger.debug("RF fitted")
 
@@ -198,8 +233,8 @@ class SampleViz(object):
         self.logger.debug("x_min: %f, x_max: %f, y_min: %f, y_max: %f" %(x_min, x_max, y_min, y_max))
 
         self.logger.debug("Predict on %d samples in grid to get surface" %(np.c_[xx.ravel(), yy.ravel()].shape[0]))
-        Z, _ = model.predict_marginalized_over_instances(
-            np.c_[xx.ravel(), yy.ravel()])
+        Z, _ = get_marginalizer().predict(
+            model, np.c_[xx.ravel(), yy.ravel()], stage="Configurator footprint")
 
         Z = Z.reshape(xx.shape)
 
@@ -314,17 +349,24 @@ class SampleViz(object):
         """
         self.logger.debug("Gathering configurations to be plotted...")
 
-        conf_matrix = []
+        conf_ids = []     # interned ids, in order of conf_list
+        conf_index = {}   # interned id -> index in conf_list
         conf_list = []
         runs_runs_conf = []
 
         for rh in self.runhistories:
             for c in rh.get_all_configs():
-                if not c in conf_list:
-                    conf_matrix.append(c.get_array())
+                id_ = intern(c)
+                if id_ not in conf_index:
+                    conf_index[id_] = len(conf_list)
+                    conf_ids.append(id_)
                     conf_list.append(c)
+        # Vectors of incumbents are not part of the matrix
+        conf_matrix = get_vectors(conf_ids)
         for inc in self.incs:
-            if inc not in conf_list:
+            id_ = intern(inc)
+            if id_ not in conf_index:
+                conf_index[id_] = len(conf_list)
                 conf_list.append(inc)
 
         # Get total runs per config
@@ -338,7 +380,7 @@ class SampleViz(object):
                     self.min_runs_per_conf = r_p_c
                 elif r_p_c > self.max_runs_per_conf:
                     self.max_runs_per_conf = r_p_c
-                runs_per_conf[conf_list.index(c)] = r_p_c
+                runs_per_conf[conf_index[intern(c)]] = r_p_c
             runs_runs_conf.append(np.array(runs_per_conf))
 
         # Now decide what configurations to plot depending on max_plots and #runs
@@ -351,8 +393,9 @@ class SampleViz(object):
             runs_per_conf += r
         assert(len(runs_per_conf) == len(conf_list))
         self.configs_to_plot = conf_list
+        self.ids_to_plot = set(conf_index)
 
-        return np.array(conf_matrix), conf_list, runs_runs_conf
+        return conf_matrix, conf_list, runs_runs_conf
 
     def _get_size(self, r_p_c):
         return 10 + ((r_p_c - self.min_runs_per_conf) / (self.max_runs_per_conf - self.min_runs_per_conf)) * 40
@@ -418,8 +461,9 @@ class SampleViz(object):
             else:
                 inc_list = [inc_list]
             self.logger.debug("Plot Incumbents")
+            inc_ids = set(intern_all(inc_list))
             for idx, conf in enumerate(conf_list):
-                if conf in inc_list:
+                if intern(conf) in inc_ids:
                     inc_indx.append(idx)
             self.logger.debug("Indexes of %d incumbent configurations: %s",
                               len(inc_list), str(inc_indx))
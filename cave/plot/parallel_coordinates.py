@@ -15,6 +15,8 @@ import matplotlib.patheffects as path_efx
 from ConfigSpace.util import impute_inactive_values
 from ConfigSpace.hyperparameters import CategoricalHyperparameter, IntegerHyperparameter, FloatHyperparameter
 
+from cave.utils.run_table import get_run_table
+
 __author__ = "Joshua Marben"
 __copyright__ = "Copyright 2017, ML4AAD"
 __license__ = "3-clause BSD"
@@ -41,6 +43,10 @@ class ParallelCoordinatesPlotter(object):
         self.cs = cs  # type ConfigSpace.configuration_space.ConfigurationSpace
         self.runtime = runtime
 
+    def _get_cost(self, conf):
+        """ Cost of conf in the validated runhistory. """
+        return self.costs[conf]
+
     def get_alpha(self, conf, n=1):
         """ Return alpha-value. The further the conf-performance is from best
         performance, the smaller the alpha-value.
@@ -52,7 +58,7 @@ class ParallelCoordinatesPlotter(object):
             the higher n, the more visible are "bad" configs
         """
 
-        x = self.validated_rh.get_cost(conf)
+        x = self._get_cost(conf)
         min_ = self.best_config_performance
         # add 10% to have visbility of the worst config
         max_ = self.worst_config_performance  # * 1.1
@@ -113,13 +119,16 @@ class ParallelCoordinatesPlotter(object):
         self.validated_rh = self.validator.validate_epm(all_configs,
                                                         'train+test', 1,
                                                         runhistory=self.original_rh)
+        # Look up all costs at once
+        costs = get_run_table(self.validated_rh).get_mean_costs(all_configs)
+        self.costs = dict(zip(all_configs, costs))
 
         for logy in [False, True]:
-            configs_to_plot = sorted(all_configs, key=lambda x: self._fun(self.validated_rh.get_cost(x), logy))
+            configs_to_plot = sorted(all_configs, key=lambda x: self._fun(self._get_cost(x), logy))
             # What about scenarios where quality is the value to optimize? shouldn't min and max be switched then?
-            self.best_config_performance = self._fun(min([self.validated_rh.get_cost(c) for c
+            self.best_config_performance = self._fun(min([self._get_cost(c) for c
                                                           in all_configs]), logy)
-            self.worst_config_performance = self._fun(max([self.validated_rh.get_cost(c) for c
+            self.worst_config_performance = self._fun(max([self._get_cost(c) for c
                                                            in all_configs]), logy)
             if num_configs < len(configs_to_plot):
                 ids = list(sorted(random.sample(range(len(configs_to_plot)), num_configs)))
@@ -185,7 +194,7 @@ class ParallelCoordinatesPlotter(object):
             conf_dict = conf.get_dictionary()
             new_entry = {}
             # Add cost-column
-            new_entry[cost_str] = self._fun(self.validated_rh.get_cost(conf), logy)
+            new_entry[cost_str] = self._fun(self._get_cost(conf), logy)
             # Add parameters
             for p in params:
                 # Catch key-errors (implicate unused hyperparameter)
@@ -245,7 +254,7 @@ class ParallelCoordinatesPlotter(object):
         # Plot data
         for i, ax in enumerate(axes):  # Iterate over params
             for idx in data.index[::-1]:  # Iterate over configs
-                cval = scale.to_rgba(self._fun(self.validated_rh.get_cost(configs[idx]), logy))
+                cval = scale.to_rgba(self._fun(self._get_cost(configs[idx]), logy))
                 cval = (cval[2], cval[0], cval[1])
                 zorder = idx - 5 if idx > len(data) // 2 else len(data) - idx  # -5 to have the best on top of the worst
                 alpha = (zorder / len(data)) - 0.25
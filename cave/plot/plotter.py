@@ -13,15 +13,16 @@ from ConfigSpace.util import impute_inactive_values
 
 from smac.utils.validate import Validator
 from smac.configspace import Configuration, convert_configurations_to_array
-from smac.epm.rf_with_instances import RandomForestWithInstances
 from smac.optimizer.objective import average_cost
-from smac.runhistory.runhistory2epm import RunHistory2EPM4Cost
 from smac.utils.util_funcs import get_types
 from smac.runhistory.runhistory import RunHistory
 
 from cave.plot.scatter import plot_scatter_plot
 from cave.plot.confs_viz.viz_sampled_confs import SampleViz
 from cave.plot.parallel_coordinates import ParallelCoordinatesPlotter
+from cave.utils.model_registry import get_registry
+from cave.utils.imputation import get_training_data
+from cave.utils.marginalization import get_marginalizer
 
 __author__ = "Joshua Marben"
 __copyright__ = "Copyright 2017, ML4AAD"
@@ -61,8 +62,8 @@ class Plotter(object):
         # Split data into train and test
         data = {"default" : {"combined" : [], "train" : [], "test" : []},
                 "incumbent" : {"combined" : [], "train" : [], "test" : []}}
-        train = scenario.train_insts
-        test = scenario.test_insts
+        train = set(scenario.train_insts)
+        test = set(scenario.test_insts)
         # Create array for all instances
         for k in conf1_runs:
             data["default"]["combined"].append(conf1_runs[k])
@@ -271,19 +272,15 @@ class Plotter(object):
             self.logger.debug("No EPM passed! Training new one from runhistory.")
             # Train random forest and transform training data (from given rh)
             # Not using validator because we want to plot uncertainties
-            rh2epm = RunHistory2EPM4Cost(num_params=len(self.scenario.cs.get_hyperparameters()),
-                                         scenario=self.scenario)
-            X, y = rh2epm.transform(rh)
+            X, y = get_training_data(self.scenario, rh, log=False)
             self.logger.debug("Training model with data of shape X: %s, y:%s",
                               str(X.shape), str(y.shape))
 
             types, bounds = get_types(self.scenario.cs, self.scenario.feature_array)
-            epm = RandomForestWithInstances(types=types,
-                                            bounds=bounds,
-                                            instance_features=self.scenario.feature_array,
-                                            #seed=self.rng.randint(MAXINT),
-                                            ratio_features=1.0)
-            epm.train(X, y)
+            epm = get_registry().get_or_train(X, y, types, bounds,
+                                              instance_features=self.scenario.feature_array,
+                                              #seed=self.rng.randint(MAXINT),
+                                              ratio_features=1.0)
 
         ## not necessary right now since the EPM only knows the features
         ## of the training instances
@@ -299,7 +296,7 @@ class Plotter(object):
 
         # predict performance for all configurations in trajectory
         config_array = convert_configurations_to_array(configs)
-        mean, var = epm.predict_marginalized_over_instances(config_array)
+        mean, var = get_marginalizer().predict(epm, config_array, stage="Cost over time")
 
         #=======================================================================
         # # restore feature array in epm
@@ -1,32 +1,104 @@
 import os
 import logging
 import shutil
-from contextlib import contextmanager
+from collections import namedtuple
 from typing import Union
 
 from smac.facade.smac_facade import SMAC
-from smac.optimizer.objective import average_cost
 from smac.utils.io.input_reader import InputReader
-from smac.runhistory.runhistory import RunKey, RunValue, RunHistory
-from smac.scenario.scenario import Scenario
+from smac.runhistory.runhistory import RunKey, RunValue
 from smac.utils.io.traj_logging import TrajLogger
 from smac.utils.validate import Validator
 
-@contextmanager
-def changedir(newdir):
-    olddir = os.getcwd()
-    os.chdir(os.path.expanduser(newdir))
-    try:
-        yield
-    finally:
-        os.chdir(olddir)
+from cave.utils.runhistory_cache import load_runhistory
+from cave.utils.scenario_cache import get_scenario
+
+RunData = namedtuple('RunData', 'scen_key scen runhistory traj')
+
+def load_run_data(folder: str, ta_exec_dir: Union[str, None]=None):
+    """Parse scenario, runhistory and trajectory of a SMAC-run from its
+    output-folder. This is the expensive part of loading a run. The returned
+    objects are picklable, so this function can be executed in a worker process.
+
+    Parameters
+    ----------
+    folder: string
+        output-dir of this run
+    ta_exec_dir: string
+        execution directory of SMAC, paths in the scenario are relative to it
+
+    Returns
+    -------
+    run_data: RunData
+        parsed data of this run: scen_key (fingerprint of the scenario, see
+        cave.utils.scenario_cache), scen, runhistory and traj
+    """
+    if ta_exec_dir is None:
+        ta_exec_dir = '.'
+    in_reader = InputReader()
+
+    # Create Scenario (disable output_dir to avoid cluttering), shared with
+    # all runs that have identical inputs
+    scen_dict = in_reader.read_scenario_file(os.path.join(folder, 'scenario.txt'))
+    scen_dict['output_dir'] = ""
+    scen_key, scen = get_scenario(scen_dict, ta_exec_dir)
+
+    # Load runhistory (from binary cache, if available) and trajectory
+    runhistory = load_runhistory(os.path.join(folder, 'runhistory.json'), scen.cs)
+    traj = TrajLogger.read_traj_aclib_format(fn=os.path.join(folder, 'traj_aclib2.json'),
+                                             cs=scen.cs)
+    return RunData(scen_key, scen, runhistory, traj)
+
+class ConfiguratorRun(object):
+    """
+    ConfiguratorRun keeps all information on a specific SMAC run, without
+    building a SMAC-facade (no EPM, intensifier, stats or output-directory),
+    which makes it cheap to load hundreds of runs.
+    """
+    def __init__(self, folder: str, ta_exec_dir: Union[str, None]=None,
+                 data: Union[RunData, None]=None):
+        """Initialize scenario, runhistory, trajectory and incumbent from
+        folder.
+
+        Parameters
+        ----------
+        folder: string
+            output-dir of this run
+        ta_exec_dir: string
+            execution directory of SMAC, paths in the scenario are relative to it
+        data: RunData
+            if the data of this run was already parsed (e.g. in a worker
+            process, see load_run_data), it is reused instead of parsed again
+        """
+        self.logger = logging.getLogger("cave.ConfiguratorRun.{}".format(folder))
+        self.folder = folder
+        self.logger.debug("Loading from %s", folder)
+
+        if data is None:
+            data = load_run_data(folder, ta_exec_dir)
+        self.scen, self.runhistory, self.traj = data.scen, data.runhistory, data.traj
+        self.scen_key = data.scen_key
+
+        self.incumbent = self.traj[-1]['incumbent']
+        self.train_inst = self.scen.train_insts
+        self.test_inst = self.scen.test_insts
+
+    def get_incumbent(self):
+        return self.incumbent
+
+    def set_trajectory(self, traj):
+        """ Replace trajectory (e.g. of a SMAC-run that is still running) and
+        update the incumbent accordingly. """
+        self.traj = traj
+        self.incumbent = self.traj[-1]['incumbent']
 
 class SMACrun(SMAC):
     """
     SMACrun keeps all information on a specific SMAC run. Extends the standard
     SMAC-facade.
     """
-    def __init__(self, folder: str, ta_exec_dir: Union[str, None]=None):
+    def __init__(self, folder: str, ta_exec_dir: Union[str, None]=None,
+                 data: Union[RunData, None]=None):
         """Initialize scenario, runhistory and incumbent from folder, execute
         init-method of SMAC facade (so you could simply use SMAC-instances instead)
 
@@ -39,35 +111,28 @@ class SMACrun(SMAC):
             there might be problems loading instance-, feature- or PCS-files
             in the scenario-object. since instance- and PCS-files are necessary,
             specify the path to the execution-dir of SMAC here
+        data: RunData
+            if the data of this run was already parsed (e.g. in a worker
+            process, see load_run_data), it is reused instead of parsed again
         """
         run_1_existed = os.path.exists('run_1')
         self.logger = logging.getLogger("cave.SMACrun.{}".format(folder))
-        in_reader = InputReader()
 
         self.folder = folder
         self.logger.debug("Loading from %s", folder)
 
         split_folder = os.path.split(folder)
         self.logger.info(split_folder)
-        if ta_exec_dir is None:
-            ta_exec_dir = '.'
 
         self.scen_fn = os.path.join(folder, 'scenario.txt')
         self.rh_fn = os.path.join(folder, 'runhistory.json')
         self.traj_fn = os.path.join(folder, 'traj_aclib2.json')
         self.traj_old_fn = os.path.join(folder, 'traj_old.csv')
 
-        # Create Scenario (disable output_dir to avoid cluttering)
-        scen_dict = in_reader.read_scenario_file(self.scen_fn)
-        scen_dict['output_dir'] = ""
-        with changedir(ta_exec_dir):
-            self.scen = Scenario(scen_dict)
-
-        # Load runhistory and trajectory
-        self.runhistory = RunHistory(average_cost)
-        self.runhistory.update_from_json(self.rh_fn, self.scen.cs)
-        self.traj = TrajLogger.read_traj_aclib_format(fn=self.traj_fn,
-                                                      cs=self.scen.cs)
+        if data is None:
+            data = load_run_data(folder, ta_exec_dir)
+        self.scen, self.runhistory, self.traj = data.scen, data.runhistory, data.traj
+        self.scen_key = data.scen_key
 
         incumbent = self.traj[-1]['incumbent']
         self.train_inst = self.scen.train_insts
@@ -82,5 +147,15 @@ class SMACrun(SMAC):
         if (not run_1_existed) and os.path.exists('run_1'):
             shutil.rmtree('run_1')
 
+    @property
+    def incumbent(self):
+        return self.solver.incumbent
+
     def get_incumbent(self):
         return self.solver.incumbent
+
+    def set_trajectory(self, traj):
+        """ Replace trajectory (e.g. of a SMAC-run that is still running) and
+        update the incumbent accordingly. """
+        self.traj = traj
+        self.solver.incumbent = self.traj[-1]['incumbent']
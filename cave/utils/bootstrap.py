@@ -0,0 +1,109 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Resampling statistics for the performance table. Resamples are drawn in
+# batches (one array-operation for thousands of resamples, limited in memory
+# by max_elements), every batch has its own seed (seed + batch-index), so
+# results are reproducible and independent of the number of worker processes.
+
+def _get_batches(n_resamples, n, max_elements):
+    batch_size = int(max(1, min(n_resamples, max_elements // max(n, 1))))
+    return [min(batch_size, n_resamples - start)
+            for start in range(0, n_resamples, batch_size)]
+
+def _map_batches(func, args, n_jobs):
+    if n_jobs == -1:
+        n_jobs = None  # all cores
+    if (n_jobs is None or n_jobs > 1) and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            return list(executor.map(func, *zip(*args)))
+    return [func(*a) for a in args]
+
+def _bootstrap_batch(values, size, seed):
+    rng = np.random.RandomState(seed)
+    idx = rng.randint(0, values.shape[-1], size=(size, values.shape[-1]))
+    return values[:, idx].mean(axis=-1)
+
+def _permutation_batch(diff, size, seed):
+    rng = np.random.RandomState(seed)
+    # Flipping the sign of a paired difference swaps the two values
+    flip = rng.random_sample((size, len(diff))) < 0.5
+    return np.abs(diff.sum() - 2 * flip.dot(diff)) / len(diff)
+
+def bootstrap_ci(values, n_resamples=1000, confidence=0.95, seed=12345,
+                 n_jobs=1, max_elements=2**23):
+    """Percentile-bootstrap confidence intervals of the mean, for several
+    metrics on the same instances at once (resampled together).
+
+    Parameters
+    ----------
+    values: np.array
+        per-instance values, shape (#metrics, #instances) or (#instances,)
+    n_resamples: int
+        number of bootstrap-resamples
+    confidence: float
+        level of the intervals
+    seed: int
+        seed for reproducibility
+    n_jobs: int
+        number of processes to spread the batches over (-1 for all cores)
+    max_elements: int
+        maximum number of resampled values per batch
+
+    Returns
+    -------
+    low, high: np.array or float
+        bounds per metric (floats if values is one-dimensional), nan if there
+        are no values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    flat = values.ndim == 1
+    values = np.atleast_2d(values)
+    if not values.shape[1] or not n_resamples:
+        low = high = np.full(values.shape[0], np.nan)
+    else:
+        sizes = _get_batches(n_resamples, values.size, max_elements)
+        means = np.hstack(_map_batches(_bootstrap_batch,
+                                       [(values, size, seed + i)
+                                        for i, size in enumerate(sizes)], n_jobs))
+        alpha = (1 - confidence) / 2
+        low, high = np.percentile(means, [100 * alpha, 100 * (1 - alpha)], axis=1)
+    if flat:
+        return low[0], high[0]
+    return low, high
+
+def paired_permutation_test(values1, values2, n_resamples=1000, seed=12345,
+                            n_jobs=1, max_elements=2**23):
+    """Two-sided paired permutation test on the difference of means (values
+    of each pair are swapped randomly).
+
+    Parameters
+    ----------
+    values1, values2: np.array
+        values of both configurations on the same instances (same order)
+    n_resamples: int
+        number of random permutations
+    seed: int
+        seed for reproducibility
+    n_jobs: int
+        number of processes to spread the batches over (-1 for all cores)
+    max_elements: int
+        maximum number of permuted values per batch
+
+    Returns
+    -------
+    p_value: float
+        in (0, 1], nan if there are no pairs
+    """
+    diff = np.asarray(values1, dtype=np.float64) - np.asarray(values2, dtype=np.float64)
+    if not len(diff) or not n_resamples:
+        return np.nan
+    observed = np.abs(diff.mean())
+    sizes = _get_batches(n_resamples, len(diff), max_elements)
+    permuted = np.hstack(_map_batches(_permutation_batch,
+                                      [(diff, size, seed + i)
+                                       for i, size in enumerate(sizes)], n_jobs))
+    # Tolerance for floating-point differences of equal statistics
+    extreme = np.sum(permuted >= observed - 1e-12 * max(observed, 1))
+    return (extreme + 1) / (n_resamples + 1)
@@ -0,0 +1,99 @@
+import weakref
+import hashlib
+import threading
+
+import numpy as np
+
+# Process-wide interning of configurations. Configurations are identified by
+# their canonical vector-representation (inactive parameters, i.e. nan, are
+# mapped to -1) and get an integer id, which is the same for equal
+# configurations from different runhistories. The vector of each configuration
+# is computed only once. Hashing Configuration-objects builds a string of all
+# their values, so the ids should be used for repeated membership-checks and
+# lookups instead. Configuration-objects are only referenced weakly (except
+# for the first one per id), so the table does not grow with every object
+# that is interned (e.g. when runhistories are reloaded while watching).
+
+_lock = threading.Lock()
+_ids = {}            # (cs-key, canonical vector-bytes) -> id
+_objects = {}        # id(Configuration) -> (weakref to Configuration, id)
+_cs_keys = {}        # id(ConfigurationSpace) -> (ConfigurationSpace, key)
+_vectors = []        # id -> vector
+_configs = []        # id -> first interned Configuration with this vector
+
+def _get_cs_key(cs):
+    entry = _cs_keys.get(id(cs))
+    if entry is None:
+        key = hashlib.sha1(str(cs).encode('utf-8')).hexdigest()
+        # Keep reference, so the id of cs is not reused
+        entry = _cs_keys[id(cs)] = (cs, key)
+    return entry[1]
+
+def canonical_vector(vector):
+    """ Copy of vector with nan replaced by -1 (and -0.0 by 0.0). """
+    vector = np.array(vector, dtype=np.float64) + 0.0
+    vector[np.isnan(vector)] = -1
+    return vector
+
+def intern(config):
+    """Get id of config, interning it if seen for the first time.
+
+    Parameters
+    ----------
+    config: Configuration
+        configuration to intern
+
+    Returns
+    -------
+    id: int
+        process-wide id of config, equal for equal configurations
+    """
+    entry = _objects.get(id(config))
+    if entry is not None and entry[0]() is config:
+        return entry[1]
+    vector = config.get_array()
+    with _lock:
+        key = (_get_cs_key(config.configuration_space),
+               canonical_vector(vector).tobytes())
+        id_ = _ids.get(key)
+        if id_ is None:
+            id_ = _ids[key] = len(_vectors)
+            _vectors.append(vector)
+            _configs.append(config)
+        _objects[id(config)] = (weakref.ref(config, _forget(id(config))), id_)
+    return id_
+
+def _forget(key):
+    """ Callback removing the entry of a garbage-collected configuration. """
+    def callback(ref):
+        entry = _objects.get(key)
+        if entry is not None and entry[0] is ref:
+            del _objects[key]
+    return callback
+
+def intern_all(configs):
+    """ Ids of configs as np.array. """
+    return np.array([intern(c) for c in configs], dtype=np.int64)
+
+def get_vector(id_):
+    """ Vector-representation of the configuration with id_ (not a copy!). """
+    return _vectors[id_]
+
+def get_vectors(ids):
+    """ Matrix of vector-representations of the configurations with ids. """
+    if not len(ids):
+        return np.empty((0, 0))
+    return np.array([_vectors[i] for i in ids])
+
+def get_config(id_):
+    """ Configuration with id_. """
+    return _configs[id_]
+
+def clear():
+    """ Empty the interning-table. """
+    with _lock:
+        _ids.clear()
+        _objects.clear()
+        _cs_keys.clear()
+        del _vectors[:]
+        del _configs[:]
@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+import logging
+import importlib.util
+
+from smac.tae.execute_ta_run import StatusType
+
+# Target algorithms that are Python functions can be evaluated in-process
+# during validation, instead of starting one interpreter per run through a
+# command-line wrapper. The function is imported once per process; the TAE
+# itself only holds its location, so it can be sent to worker processes.
+
+_functions = {}  # (path, name) -> function, imported once per process
+
+def load_function(path, name):
+    """Import function name from the Python-file at path (once per process).
+
+    Parameters
+    ----------
+    path: str
+        path to Python-file
+    name: str
+        name of the function in that file
+
+    Returns
+    -------
+    function: callable
+        the target function
+    """
+    key = (os.path.abspath(path), name)
+    func = _functions.get(key)
+    if func is None:
+        module_name = "cave_ta_" + os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(module_name, key[0])
+        module = importlib.util.module_from_spec(spec)
+        # Allow the target to import modules next to it
+        dirname = os.path.dirname(key[0])
+        if dirname not in sys.path:
+            sys.path.insert(0, dirname)
+        spec.loader.exec_module(module)
+        func = _functions[key] = getattr(module, name)
+    return func
+
+def parse_function_spec(spec):
+    """ Split "path/to/file.py:function" into path and function name. """
+    path, sep, name = spec.rpartition(':')
+    if not sep or not path or not name:
+        raise ValueError("Target function must be given as "
+                         "'path/to/file.py:function', not '%s'" % spec)
+    return path, name
+
+class FunctionTAE(object):
+    """ In-process target algorithm execution for Python functions, usable
+    as tae for smac's Validator (with threading- or multiprocessing-backend).
+
+    The function is called like with smac's ExecuteTAFuncDict, i.e.
+    function(config, seed=seed, instance=instance), where seed is only passed
+    for non-deterministic scenarios and instance only if it is not None. It
+    returns the cost or a tuple (cost, additional_info). """
+
+    def __init__(self, path, name, run_obj='quality', cutoff=None,
+                 par_factor=1, cost_for_crash=float(2**31-1), deterministic=False):
+        """
+        Parameters
+        ----------
+        path: str
+            path to the Python-file containing the function
+        name: str
+            name of the function
+        run_obj: str
+            from [quality, runtime], for runtime the measured time is the cost
+        cutoff: float
+            runs taking longer are reported as TIMEOUT (with run_obj runtime)
+        par_factor: int
+            penalization factor for TIMEOUTs (and crashes with run_obj
+            runtime)
+        cost_for_crash: float
+            cost reported if the function raises an exception or returns no
+            number (with run_obj quality)
+        deterministic: bool
+            if True, no seed is passed to the function
+        """
+        self.path = path
+        self.name = name
+        self.run_obj = run_obj
+        self.cutoff = cutoff
+        self.par_factor = par_factor
+        self.cost_for_crash = cost_for_crash
+        self.deterministic = deterministic
+
+    @classmethod
+    def from_scenario(cls, path, name, scenario):
+        """ Create for function name in path with the scenario's objective,
+        cutoff and crash-cost. """
+        return cls(path, name, run_obj=scenario.run_obj, cutoff=scenario.cutoff,
+                   par_factor=scenario.par_factor,
+                   cost_for_crash=scenario.cost_for_crash,
+                   deterministic=scenario.deterministic)
+
+    def start(self, config, instance, cutoff=None, seed=12345,
+              instance_specific="0", capped=False):
+        """Evaluate config on instance in this process.
+
+        Returns
+        -------
+        status: StatusType
+            SUCCESS, TIMEOUT or CRASHED
+        cost: float
+            cost of the run
+        runtime: float
+            wallclock time of the function call
+        additional_info: dict
+            all further information
+        """
+        cutoff = cutoff if cutoff is not None else self.cutoff
+        kwargs = {}
+        if not self.deterministic:
+            kwargs['seed'] = seed
+        if instance is not None:
+            kwargs['instance'] = instance
+        additional_info = {}
+        start_time = time.time()
+        try:
+            result = load_function(self.path, self.name)(config, **kwargs)
+            runtime = time.time() - start_time
+            if isinstance(result, (tuple, list)):
+                result, additional_info = result
+            cost = float(result)
+            status = StatusType.SUCCESS
+        except Exception as err:
+            runtime = time.time() - start_time
+            logging.getLogger("cave.utils.function_tae").debug(
+                    "Target function crashed: %s", err)
+            status = StatusType.CRASHED
+            if self.run_obj == 'runtime' and cutoff is not None:
+                cost = cutoff * self.par_factor
+            else:
+                cost = self.cost_for_crash
+
+        if self.run_obj == 'runtime' and status == StatusType.SUCCESS:
+            cost = runtime
+            if cutoff is not None and runtime > cutoff:
+                status = StatusType.TIMEOUT
+                cost = cutoff * self.par_factor
+        return status, cost, runtime, additional_info
@@ -1,7 +1,6 @@
 import numpy as np
 
-from smac.runhistory.runhistory import RunKey
-from smac.tae.execute_ta_run import StatusType
+from cave.utils.run_table import get_run_table
 
 # TODO Possibly inconsistent: median over timeouts is timeout, but mean over
 # costs is not. Possible?
@@ -26,22 +25,13 @@ def get_timeout(rh, conf, cutoff):
     """
     if not cutoff:
         return {}
-    # Check if config is in runhistory
-    conf_id = rh.config_ids[conf]
-
-    timeouts = {}
-    runs = rh.get_runs_for_config(conf)
-    for run in runs:
-        # Averaging over seeds, run = (inst, seed)
-        inst, seed = run
-        status = rh.data[RunKey(conf_id, inst, seed)].time < cutoff
-        if inst in timeouts:
-            timeouts[inst].append(status)
-        else:
-            timeouts[inst] = [status]
-    # Use median
-    timeouts = {i : np.floor(np.median(timeouts[i])) for i in timeouts.keys()}
-    return timeouts
+    # Raises KeyError if config is not in runhistory
+    table = get_run_table(rh)
+    # Median over seeds, floored
+    instances, timeouts = table.group_by_instance(
+            conf, table.times < cutoff,
+            aggregate=lambda x: np.floor(np.median(x)))
+    return dict(zip(instances, timeouts))
 
 def get_cost_dict_for_config(rh, conf, aggregate=np.mean):
     """
@@ -63,25 +53,34 @@ def get_cost_dict_for_config(rh, conf, aggregate=np.mean):
     loss: dict(instance->loss)
         loss per instance (aggregated or as list per seed)
     """
-    # Check if config is in runhistory
-    conf_id = rh.config_ids[conf]
-
-    # Map instances to seeds in dict
-    runs = rh.get_runs_for_config(conf)
-    instance_to_seeds = dict()
-    for run in runs:
-        inst, seed = run
-        if inst in instance_to_seeds:
-            instance_to_seeds[inst].append(seed)
-        else:
-            instance_to_seeds[inst] = [seed]
+    # Raises KeyError if config is not in runhistory
+    instances, losses = get_run_table(rh).get_cost_per_instance(conf, aggregate)
+    return dict(zip(instances, losses))
 
-    # Get loss per instance
-    instance_losses = {i: [rh.data[RunKey(conf_id, i, s)].cost for s in
-                           instance_to_seeds[i]] for i in instance_to_seeds}
+def get_cost_matrix(rh, configs, instances=None, aggregate='mean'):
+    """
+    Costs of several configurations on instances as dense matrix, the batch
+    version of get_cost_dict_for_config.
 
-    # Aggregate:
-    if aggregate:
-        instance_losses = {i: aggregate(instance_losses[i]) for i in instance_losses}
+    Parameters:
+    -----------
+    rh: RunHistory
+        runhistory with data
+    configs: List[Configuration]
+        configurations (rows), raises KeyError if one is not in runhistory
+    instances: List[str]
+        instances (columns), if None all instances in the runhistory
+    aggregate: str or None
+        from [mean, median, None], used to aggregate loss over seeds, if None
+        the seeds are a third axis
 
-    return instance_losses
+    Returns:
+    --------
+    costs: np.array
+        of shape (len(configs), len(instances)) (+ #seeds if not aggregated),
+        nan where no data is available
+    instances: List[str]
+        instance-names of the columns
+    """
+    table = get_run_table(rh)
+    return table.get_matrix(configs, table.costs, instances, aggregate)
@@ -0,0 +1,179 @@
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+from smac.tae.execute_ta_run import StatusType
+from smac.runhistory.runhistory2epm import RunHistory2EPM4LogCost, RunHistory2EPM4Cost
+from smac.epm.rf_with_instances import RandomForestWithInstances
+from smac.epm.rfr_imputator import RFRImputator
+from smac.utils.util_funcs import get_types
+from smac.utils.constants import MAXINT
+
+
+# For runtime-scenarios, the EPM-training data (log-costs) contains TIMEOUTs
+# that are imputed with an RFRImputator, which refits a random forest up to
+# ten times. The imputed training matrix is cached per scenario and
+# runhistory, so every stage training an EPM on the same data shares one
+# imputation.
+
+def impute_training_data(scenario, runhistory, log=True, rng=None):
+    """Convert runhistory into EPM-training data. With log, for
+    runtime-scenarios costs are log-transformed and censored runs (TIMEOUTs)
+    imputed. Otherwise the data is transformed as smac's Validator does for
+    its EPM: costs are not transformed and for runtime-scenarios CAPPED runs
+    are imputed.
+
+    Parameters
+    ----------
+    scenario: Scenario
+        scenario of the runhistory
+    runhistory: RunHistory
+        runhistory to convert
+    log: bool
+        whether to transform the data for a log-cost EPM
+    rng: np.random.RandomState
+        random state for the imputation (without log), defaults to seed 42
+
+    Returns
+    -------
+    X, y: np.array
+        configurations (+ instance features) and (imputed) costs
+    """
+    num_params = len(scenario.cs.get_hyperparameters())
+    if not log:
+        rng = rng if rng is not None else np.random.RandomState(42)
+        imputor, impute_state = None, None
+        if scenario.run_obj == "runtime":
+            types, bounds = get_types(scenario.cs, scenario.feature_array)
+            model = RandomForestWithInstances(types=types, bounds=bounds,
+                                              instance_features=scenario.feature_array,
+                                              seed=rng.randint(MAXINT),
+                                              ratio_features=1.0)
+            imputor = RFRImputator(rng=rng, cutoff=scenario.cutoff,
+                                   threshold=scenario.cutoff * scenario.par_factor,
+                                   model=model)
+            impute_state = [StatusType.CAPPED]
+        rh2EPM = RunHistory2EPM4Cost(num_params=num_params, scenario=scenario,
+                                     rng=rng, impute_censored_data=imputor is not None,
+                                     imputor=imputor, impute_state=impute_state)
+    elif scenario.run_obj == "runtime":
+        types, bounds = get_types(scenario.cs, scenario.feature_array)
+        model = RandomForestWithInstances(types=types, bounds=bounds,
+                                          instance_features=scenario.feature_array)
+        # if we log the performance data,
+        # the RFRImputator will already get
+        # log transform data from the runhistory
+        cutoff = np.log10(scenario.cutoff)
+        threshold = np.log10(scenario.cutoff *
+                             scenario.par_factor)
+        imputor = RFRImputator(rng=np.random.RandomState(42),
+                               cutoff=cutoff,
+                               threshold=threshold,
+                               model=model,
+                               change_threshold=0.01,
+                               max_iter=10)
+        rh2EPM = RunHistory2EPM4LogCost(scenario=scenario,
+                                        num_params=num_params,
+                                        success_states=[
+                                            StatusType.SUCCESS, ],
+                                        impute_censored_data=True,
+                                        impute_state=[
+                                            StatusType.TIMEOUT, ],
+                                        imputor=imputor)
+    else:
+        rh2EPM = RunHistory2EPM4Cost(scenario=scenario,
+                                     num_params=num_params,
+                                     success_states=None,
+                                     impute_censored_data=False,
+                                     impute_state=None)
+    return rh2EPM.transform(runhistory)
+
+class ImputationCache(object):
+    """ Cache for impute_training_data, keyed by scenario and runhistory. """
+
+    def __init__(self, max_size=4):
+        """
+        Parameters
+        ----------
+        max_size: int
+            maximum number of cached training matrices
+        """
+        self.logger = logging.getLogger("cave.utils.imputation")
+        self.max_size = max_size
+        # key -> (weakref to scenario, weakref to runhistory, X, y)
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits, self.misses = 0, 0
+
+    def get_key(self, scenario, runhistory, log=True, seed=None):
+        # Cheap key: identity and size of the runhistory (runs are only ever
+        # added to a runhistory) and identity of the scenario. As ids can be
+        # reused after garbage collection, entries keep weak references to
+        # verify the identity on lookup.
+        return (id(scenario), id(runhistory), len(runhistory.data), log, seed)
+
+    def get(self, scenario, runhistory, log=True, seed=None):
+        """Training data for runhistory (see impute_training_data), imputed only
+        once per scenario and runhistory.
+
+        Parameters
+        ----------
+        scenario: Scenario
+            scenario of the runhistory
+        runhistory: RunHistory
+            runhistory to convert
+        log: bool
+            whether to transform the data for a log-cost EPM
+        seed: int
+            seed for the imputation (without log), defaults to 42
+
+        Returns
+        -------
+        X, y: np.array
+            copies of the cached training data
+        """
+        key = self.get_key(scenario, runhistory, log, seed)
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None and (entry[0]() is not scenario or
+                                      entry[1]() is not runhistory):
+                del self.cache[key]
+                entry = None
+            if entry is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if entry is None:
+            self.logger.debug("Imputing training data of %d runs",
+                              len(runhistory.data))
+            rng = None if seed is None else np.random.RandomState(seed)
+            X, y = impute_training_data(scenario, runhistory, log=log, rng=rng)
+            entry = (weakref.ref(scenario), weakref.ref(runhistory), X, y)
+            with self.lock:
+                self.cache[key] = entry
+                while len(self.cache) > self.max_size:
+                    self.cache.popitem(last=False)
+        else:
+            self.logger.debug("Reusing imputed training data of %d runs",
+                              len(runhistory.data))
+        return entry[2].copy(), entry[3].copy()
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.hits, self.misses = 0, 0
+
+_cache = ImputationCache()
+
+def get_training_data(scenario, runhistory, log=True, seed=None):
+    """ Cached impute_training_data(scenario, runhistory, log), see
+    ImputationCache. """
+    return _cache.get(scenario, runhistory, log, seed)
+
+def get_imputation_cache():
+    """ Process-wide imputation cache. """
+    return _cache
@@ -0,0 +1,178 @@
+import logging
+import weakref
+
+import numpy as np
+from sklearn.cluster import KMeans
+
+from cave.utils.prediction_cache import predict_marginalized_over_instances
+
+# Predictions marginalized over instances cost #configs x #instances x #trees.
+# For scenarios with many instances, the marginalization can be approximated
+# on a subsample of instances, stratified by clusters in feature space. The
+# standard error of the stratified estimate is reported and a stage falls
+# back to the exact computation if it is too large on a pilot sample of
+# configurations.
+
+def stratified_subsample(features, n_samples, n_clusters=10, seed=12345):
+    """Sample instances proportionally from clusters in feature space.
+
+    Parameters
+    ----------
+    features: np.array
+        instance features, one row per instance
+    n_samples: int
+        (approximate) number of instances to sample
+    n_clusters: int
+        number of strata
+    seed: int
+        seed for clustering and sampling
+
+    Returns
+    -------
+    strata: List[np.array]
+        sampled instance-indices per stratum
+    weights: np.array
+        fraction of all instances in each stratum
+    sizes: np.array
+        number of instances in each stratum
+    """
+    rng = np.random.RandomState(seed)
+    n_clusters = max(1, min(n_clusters, n_samples, len(features)))
+    labels = KMeans(n_clusters=n_clusters, random_state=seed).fit_predict(features)
+    strata, weights, sizes = [], [], []
+    for k in range(n_clusters):
+        members = np.flatnonzero(labels == k)
+        if not len(members):
+            continue
+        n_k = min(len(members), max(1, int(round(n_samples * len(members) / len(features)))))
+        strata.append(rng.choice(members, n_k, replace=False))
+        weights.append(len(members) / len(features))
+        sizes.append(len(members))
+    return strata, np.array(weights), np.array(sizes)
+
+class Marginalizer(object):
+    """ Exact or approximate predict_marginalized_over_instances. """
+
+    def __init__(self, n_samples=None, max_rel_error=0.05, n_clusters=10,
+                 n_pilot=10):
+        """
+        Parameters
+        ----------
+        n_samples: int
+            number of instances to approximate the marginalization with, if
+            None (or at least the number of instances) it is exact
+        max_rel_error: float
+            fall back to exact computation, if the largest standard error
+            relative to the range of the predictions exceeds this
+        n_clusters: int
+            number of strata in feature space
+        n_pilot: int
+            number of configurations to decide on the fallback with
+        """
+        self.logger = logging.getLogger("cave.utils.marginalization")
+        self.n_samples = n_samples
+        self.max_rel_error = max_rel_error
+        self.n_clusters = n_clusters
+        self.n_pilot = n_pilot
+        self.errors = {}  # stage -> largest estimated standard error
+        self._subsamples = weakref.WeakKeyDictionary()
+
+    def _get_subsample(self, model):
+        entry = self._subsamples.get(model)
+        if entry is None or entry[0] != self.n_samples:
+            entry = (self.n_samples, stratified_subsample(model.instance_features,
+                                                          self.n_samples,
+                                                          self.n_clusters))
+            self._subsamples[model] = entry
+        return entry[1]
+
+    def _estimate(self, model, X, feats, strata, weights, sizes):
+        """ Stratified estimates of the marginalized mean and variance and the
+        standard error of the mean, from per-instance predictions on the
+        subsample (the model itself is not changed, so it can be shared). """
+        sample = np.concatenate(strata)
+        rows = np.hstack([np.repeat(X, len(sample), axis=0),
+                          np.tile(feats[sample], (len(X), 1))])
+        means, vars_ = model.predict(rows)
+        means = np.asarray(means).reshape(len(X), len(sample))
+        vars_ = np.asarray(vars_).reshape(len(X), len(sample))
+        mean, var, sq_err = np.zeros(len(X)), np.zeros(len(X)), np.zeros(len(X))
+        start = 0
+        for stratum, w, size in zip(strata, weights, sizes):
+            preds = means[:, start:start + len(stratum)]
+            var += w * vars_[:, start:start + len(stratum)].mean(axis=1)
+            start += len(stratum)
+            mean += w * preds.mean(axis=1)
+            if len(stratum) > 1:
+                sq_err += (w ** 2 * preds.var(axis=1, ddof=1) / len(stratum) *
+                           (1 - len(stratum) / size))
+        # Like the model, use the mean of the variances with a lower bound
+        var = np.maximum(var, getattr(model, 'var_threshold', 10 ** -5))
+        return mean, var, np.sqrt(sq_err)
+
+    @staticmethod
+    def _rel_error(mean, error):
+        spread = mean.max() - mean.min()
+        return error.max() / spread if spread > 0 else error.max() / max(np.abs(mean).max(), 1e-10)
+
+    def predict(self, model, X, stage=''):
+        """Predict mean and variance of configurations marginalized over the
+        instances of model. Whether the approximation is accurate enough is
+        decided on a pilot sample of n_pilot configurations first.
+
+        Parameters
+        ----------
+        model: RandomForestWithInstances
+            trained model
+        X: np.array
+            configurations in vector-representation
+        stage: str
+            name of the analysis-stage (for logging)
+
+        Returns
+        -------
+        mean, var: np.array
+            of shape (len(X), 1)
+        """
+        feats = model.instance_features
+        if (not self.n_samples or feats is None or
+                len(feats) <= self.n_samples or not len(X)):
+            return predict_marginalized_over_instances(model, X)
+
+        X = np.asarray(X, dtype=np.float64)
+        feats = np.asarray(feats)
+        strata, weights, sizes = self._get_subsample(model)
+        n_sample = sum(len(stratum) for stratum in strata)
+
+        # Pilot on evenly spaced configurations
+        pilot = np.unique(np.linspace(0, len(X) - 1, min(self.n_pilot, len(X))).astype(int))
+        p_mean, p_var, p_error = self._estimate(model, X[pilot], feats,
+                                                strata, weights, sizes)
+        rel_error = self._rel_error(p_mean, p_error)
+        if rel_error > self.max_rel_error:
+            self.errors[stage] = p_error.max()
+            self.logger.info("%s: approximate marginalization over %d/%d instances "
+                             "too inaccurate on %d pilot configurations (std. error "
+                             "%.4g, %.1f%% of range), computing exactly.", stage,
+                             n_sample, len(feats), len(pilot), p_error.max(),
+                             100 * rel_error)
+            return predict_marginalized_over_instances(model, X)
+
+        mean, var, error = np.empty(len(X)), np.empty(len(X)), np.empty(len(X))
+        mean[pilot], var[pilot], error[pilot] = p_mean, p_var, p_error
+        rest = np.setdiff1d(np.arange(len(X)), pilot)
+        if len(rest):
+            mean[rest], var[rest], error[rest] = self._estimate(model, X[rest], feats,
+                                                                strata, weights, sizes)
+        self.errors[stage] = error.max()
+        self.logger.info("%s: marginalized over %d/%d instances (stratified), "
+                         "estimated std. error at most %.4g (%.1f%% of range).",
+                         stage, n_sample, len(feats), error.max(),
+                         100 * self._rel_error(mean, error))
+        return mean.reshape(-1, 1), var.reshape(-1, 1)
+
+_marginalizer = Marginalizer()
+
+def get_marginalizer():
+    """ Process-wide marginalizer (exact unless n_samples is set). """
+    return _marginalizer
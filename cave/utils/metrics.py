@@ -0,0 +1,152 @@
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+
+from cave.utils.run_table import get_run_table
+
+# Performance metrics (PAR-k, timeouts, mean/median cost) for any number of
+# configurations on train-, test- and all instances. The runs are reduced once
+# to a configs x instances matrix (mean over seeds), train/test are boolean
+# column-masks, so every metric is a masked reduction over that matrix.
+
+class PerformanceMetrics(object):
+    """ Vectorized metrics engine over a configs x instances cost matrix. """
+
+    def __init__(self, rh, configs, cutoff=None, train_insts=None, test_insts=None):
+        """
+        Parameters
+        ----------
+        rh: RunHistory
+            runhistory with the runs of configs
+        configs: List[Configuration]
+            configurations (rows), raises KeyError if not in runhistory
+        cutoff: float
+            cutoff of the scenario, if None there are no timeouts and costs are
+            not penalized
+        train_insts, test_insts: List[str]
+            instances for the subsets 'train' and 'test'
+        """
+        table = get_run_table(rh)
+        self.configs = list(configs)
+        self.cutoff = cutoff
+        sums, counts, self.instances = table.get_sums_and_counts(self.configs,
+                                                                 table.costs)
+        self.available = counts > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Mean over seeds, nan where no run is available
+            self.costs = sums / counts
+        self.timeouts = None
+        if cutoff:
+            # Median over seeds, floored (see get_timeout): a timeout unless
+            # more than half of the runs finished within the cutoff
+            finished, _, _ = table.get_sums_and_counts(self.configs,
+                                                       table.times < cutoff)
+            self.timeouts = self.available & ~(2 * finished > counts)
+
+        self.n_insts = OrderedDict()
+        self.masks = OrderedDict()
+        for subset, insts in [('train', train_insts), ('test', test_insts)]:
+            insts = insts or []
+            self.n_insts[subset] = len(insts)
+            insts = set(insts)
+            self.masks[subset] = np.array([i in insts for i in self.instances],
+                                          dtype=bool)
+        self.masks['all'] = np.ones(len(self.instances), dtype=bool)
+        self.n_insts['all'] = len(self.instances)
+
+    def index(self, config):
+        """ Row of config. """
+        return self.configs.index(config)
+
+    def get_values(self, matrix, rows, subset='all'):
+        """Per-instance values of configurations on the instances of subset
+        on which all of them have runs (e.g. for paired tests).
+
+        Parameters
+        ----------
+        matrix: np.array
+            configs x instances (e.g. self.penalized(10) or self.timeouts)
+        rows: List[int]
+            rows of the configurations
+
+        Returns
+        -------
+        values: np.array
+            of shape (len(rows), #instances)
+        """
+        mask = self.masks[subset] & self.available[rows].all(axis=0)
+        return np.asarray(matrix, dtype=np.float64)[rows][:, mask]
+
+    def _masked(self, values, subset):
+        """ Values of subset, with nan where no run is available. """
+        mask = self.masks[subset]
+        return np.where(self.available[:, mask], values[:, mask], np.nan)
+
+    def _nanmean(self, values, subset):
+        values = self._masked(values, subset)
+        n = (~np.isnan(values)).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.nansum(values, axis=1) / n
+
+    def penalized(self, par=10):
+        """Costs with per-instance costs at or above the cutoff penalized by
+        par (unchanged without cutoff).
+
+        Returns
+        -------
+        costs: np.array
+            of shape (len(configs), len(instances))
+        """
+        if not self.cutoff:
+            return self.costs
+        return np.where(self.costs < self.cutoff, self.costs, self.cutoff * par)
+
+    def par(self, par=10, subset='all'):
+        """ PAR-k score per configuration (mean over available instances). """
+        return self._nanmean(self.penalized(par), subset)
+
+    def mean(self, subset='all'):
+        """ Mean cost per configuration (not penalized). """
+        return self._nanmean(self.costs, subset)
+
+    def median(self, subset='all'):
+        """ Median cost per configuration (not penalized). """
+        values = self._masked(self.costs, subset)
+        if not values.shape[1]:
+            return np.full(len(self.configs), np.nan)
+        with warnings.catch_warnings():
+            # All-nan rows (no runs on subset) are nan
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanmedian(values, axis=1)
+
+    def n_timeouts(self, subset='all'):
+        """ Number of instances with a timeout per configuration (None
+        without cutoff). """
+        if self.timeouts is None:
+            return None
+        return (self.timeouts[:, self.masks[subset]]).sum(axis=1)
+
+    def n_evaluated(self, subset='all'):
+        """ Number of instances with runs per configuration. """
+        return self.available[:, self.masks[subset]].sum(axis=1)
+
+    def summary(self, pars=(10, 1), subsets=('train', 'test', 'all')):
+        """All metrics at once.
+
+        Returns
+        -------
+        summary: OrderedDict
+            subset -> metric-name (PARk, Mean, Median, Timeouts) -> np.array
+            with one value per configuration
+        """
+        summary = OrderedDict()
+        for subset in subsets:
+            metrics = OrderedDict()
+            for k in pars:
+                metrics['PAR{}'.format(k)] = self.par(k, subset)
+            metrics['Mean'] = self.mean(subset)
+            metrics['Median'] = self.median(subset)
+            metrics['Timeouts'] = self.n_timeouts(subset)
+            summary[subset] = metrics
+        return summary
@@ -0,0 +1,176 @@
+import os
+import pickle
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from smac.epm.rf_with_instances import RandomForestWithInstances
+
+from cave.utils.sharded_forest import ShardedRandomForest, forests_picklable
+
+# Registry for trained EPMs (random forests). Models are keyed by a
+# fingerprint of everything that determines them (training data, types,
+# bounds, instance features, forest-options and seed), so all analysis-stages
+# that need an equivalent model share one. The most recently used models are
+# kept in memory and, if a cache-directory is set, pickled to disk to be reused
+# when the report is regenerated.
+
+def fingerprint(*parts):
+    """Hash arbitrary parts (numpy-arrays by content, everything else by
+    repr).
+
+    Returns
+    -------
+    key: str
+        hexdigest
+    """
+    sha = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            sha.update(str(part.dtype).encode('utf-8'))
+            sha.update(str(part.shape).encode('utf-8'))
+            sha.update(np.ascontiguousarray(part).tobytes())
+        else:
+            sha.update(repr(part).encode('utf-8'))
+        sha.update(b'|')
+    return sha.hexdigest()
+
+class ModelRegistry(object):
+    """ In-memory (and optionally on-disk) store of trained models. """
+
+    def __init__(self, cache_dir=None, n_jobs=1, max_models=10):
+        """
+        Parameters
+        ----------
+        cache_dir: str
+            folder to pickle models to, if None models are only kept in memory
+        n_jobs: int
+            if larger than 1, forests are trained as n_jobs sub-forests in
+            parallel (see ShardedRandomForest)
+        max_models: int
+            maximum number of models in memory, the least recently used model
+            is discarded first
+        """
+        self.logger = logging.getLogger("cave.utils.model_registry")
+        self.cache_dir = cache_dir
+        self.n_jobs = n_jobs
+        self.max_models = max_models
+        self.models = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".pkl")
+
+    def _add(self, key, model):
+        """ Keep model in memory, discarding the least recently used ones. """
+        with self.lock:
+            self.models[key] = model
+            self.models.move_to_end(key)
+            while len(self.models) > self.max_models:
+                self.models.popitem(last=False)
+
+    def get(self, key):
+        """ Model registered under key (from memory or disk), else None. """
+        with self.lock:
+            model = self.models.get(key)
+            if model is not None:
+                self.models.move_to_end(key)
+        if model is None and self.cache_dir and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), 'rb') as fh:
+                    model = pickle.load(fh)
+                self.logger.debug("Loaded model %s from %s", key, self.cache_dir)
+                self._add(key, model)
+            except Exception as err:
+                self.logger.warning("Could not load model %s: %s", key, err)
+        return model
+
+    def discard(self, key):
+        """ Forget the model registered under key in memory (e.g. because it
+        was retrained on other data), a saved model stays valid. """
+        with self.lock:
+            self.models.pop(key, None)
+
+    def put(self, key, model):
+        """ Register model under key (and save it, if cache_dir is set). """
+        self._add(key, model)
+        if self.cache_dir:
+            try:
+                if not os.path.exists(self.cache_dir):
+                    os.makedirs(self.cache_dir)
+                fd, tmp = tempfile.mkstemp(dir=self.cache_dir)
+                with os.fdopen(fd, 'wb') as fh:
+                    pickle.dump(model, fh)
+                os.rename(tmp, self._path(key))
+            except Exception as err:
+                # Not all forests can be pickled, keep it in memory then
+                self.logger.warning("Could not save model %s: %s", key, err)
+
+    def get_or_train(self, X, y, types, bounds, instance_features=None,
+                     seed=42, rf_opts=None, n_jobs=None, **rf_kwargs):
+        """Return a RandomForestWithInstances trained on X, y, training it only
+        if no equivalent model is registered. With n_jobs > 1 (and no rf_opts,
+        which only apply to a single forest) a ShardedRandomForest is trained,
+        if forests can be transferred between processes.
+
+        Parameters
+        ----------
+        X, y: np.array
+            training data
+        types, bounds: np.array
+            types and bounds of the input dimensions (see smac's get_types)
+        instance_features: np.array
+            instance features
+        seed: int
+            seed of the forest
+        rf_opts: dict
+            attributes to set on the forest's rf_opts before training
+        n_jobs: int
+            number of sub-forests trained in parallel, defaults to self.n_jobs
+        rf_kwargs: dict
+            further arguments for RandomForestWithInstances
+
+        Returns
+        -------
+        model: RandomForestWithInstances or ShardedRandomForest
+            trained model, its fingerprint is set as model.cache_key
+        """
+        rf_opts = rf_opts or {}
+        # The number of sub-forests is not part of the key: the combined
+        # forest is an equivalent model, so it is reused for any n_jobs
+        key = fingerprint(X, y, np.asarray(types),
+                          np.asarray(bounds, dtype=np.float64),
+                          instance_features if instance_features is None
+                          else np.asarray(instance_features),
+                          seed, sorted(rf_opts.items()), sorted(rf_kwargs.items()))
+        model = self.get(key)
+        if model is not None:
+            self.logger.debug("Reusing model %s", key)
+            return model
+        n_shards = 1 if rf_opts else (n_jobs or self.n_jobs)
+        if n_shards > 1 and forests_picklable():
+            self.logger.debug("Training %d sub-forests in parallel", n_shards)
+            model = ShardedRandomForest(types=types, bounds=bounds,
+                                        instance_features=instance_features,
+                                        seed=seed, n_shards=n_shards, **rf_kwargs)
+        else:
+            model = RandomForestWithInstances(types=types, bounds=bounds,
+                                              instance_features=instance_features,
+                                              seed=seed, **rf_kwargs)
+        for opt, value in rf_opts.items():
+            setattr(model.rf_opts, opt, value)
+        model.train(X, y)
+        # Identifies the model in the prediction cache
+        model.cache_key = key
+        self.put(key, model)
+        return model
+
+_registry = ModelRegistry()
+
+def get_registry():
+    """ Process-wide model registry. """
+    return _registry
@@ -0,0 +1,79 @@
+import os
+import shlex
+import copy
+from contextlib import contextmanager
+
+# Paths in SMAC-scenarios are relative to the directory SMAC was executed in
+# (ta_exec_dir). Instead of changing the process-wide working directory (which
+# is not thread-safe), the paths are resolved explicitly against ta_exec_dir.
+
+# Scenario-options (normalized like in smac.scenario.Scenario) pointing to files
+FILE_OPTIONS = ['instancefile', 'testinstancefile', 'featurefile', 'paramfile']
+
+@contextmanager
+def changedir(newdir):
+    """ Helper function to change directory. Only necessary to execute
+    target algorithms, that expect to be called from the SMAC-execution-
+    directory (e.g. because the instance-paths are relative to it). Not
+    thread-safe! """
+    olddir = os.getcwd()
+    os.chdir(os.path.expanduser(newdir))
+    try:
+        yield
+    finally:
+        os.chdir(olddir)
+
+def normalize_option(option):
+    """ Normalize scenario-option like smac.scenario.Scenario does. """
+    return option.lower().replace('-', '').replace('_', '')
+
+def resolve_path(path, ta_exec_dir=None):
+    """Resolve path relative to ta_exec_dir.
+
+    Parameters
+    ----------
+    path: str
+        absolute path or path relative to ta_exec_dir
+    ta_exec_dir: str
+        execution directory of SMAC, if None the current working directory
+
+    Returns
+    -------
+    path: str
+        absolute path
+    """
+    path = os.path.expanduser(path)
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.expanduser(ta_exec_dir or '.'), path)
+    return os.path.abspath(path)
+
+def resolve_scenario_paths(scen_dict, ta_exec_dir=None):
+    """Resolve all paths in scenario-options against ta_exec_dir, so the
+    scenario can be created from any working directory. Instance-names are not
+    changed, as they identify the runs in the runhistory.
+
+    Parameters
+    ----------
+    scen_dict: dict
+        scenario-options as read by smac's InputReader
+    ta_exec_dir: str
+        execution directory of SMAC, if None the current working directory
+
+    Returns
+    -------
+    scen_dict: dict
+        copy of the scenario-options with absolute paths
+    """
+    scen_dict = copy.copy(scen_dict)
+    for option, value in scen_dict.items():
+        norm = normalize_option(option)
+        if norm in FILE_OPTIONS and value:
+            scen_dict[option] = resolve_path(value, ta_exec_dir)
+        elif norm == 'algo' and value:
+            # Resolve all arguments of the algo-call that are existing files
+            tokens = []
+            for token in shlex.split(value):
+                path = resolve_path(token, ta_exec_dir)
+                tokens.append(path if os.path.isfile(path) else token)
+            scen_dict[option] = ' '.join(shlex.quote(t) for t in tokens)
+    return scen_dict
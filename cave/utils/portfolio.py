@@ -0,0 +1,88 @@
+import numpy as np
+
+# Portfolio analysis on a configs x instances cost matrix (lower is better,
+# no missing values). The virtual best solver (VBS) picks the best
+# configuration per instance. All quantities are min-reductions over the
+# configuration-axis, so they scale to hundreds of configurations on tens of
+# thousands of instances.
+
+def virtual_best(costs):
+    """Cost of the virtual best solver.
+
+    Parameters
+    ----------
+    costs: np.array
+        configs x instances
+
+    Returns
+    -------
+    vbs: np.array
+        best cost per instance
+    best: np.array
+        row of the best configuration per instance (first, if tied)
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    best = np.argmin(costs, axis=0)
+    return costs[best, np.arange(costs.shape[1])], best
+
+def marginal_contributions(costs):
+    """Marginal contribution of each configuration to the VBS, i.e. how much
+    the mean cost of the VBS increases without it. Computed from the best and
+    second best cost per instance, in one pass.
+
+    Parameters
+    ----------
+    costs: np.array
+        configs x instances
+
+    Returns
+    -------
+    contributions: np.array
+        one value per configuration (0 if it is never strictly needed)
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    n_configs, n_insts = costs.shape
+    if n_configs < 2 or not n_insts:
+        return np.zeros(n_configs)
+    vbs, best = virtual_best(costs)
+    second = np.partition(costs, 1, axis=0)[1]
+    return np.bincount(best, weights=second - vbs, minlength=n_configs) / n_insts
+
+def greedy_portfolio(costs, k=None):
+    """Build a portfolio greedily: in each step the configuration that
+    reduces the mean cost of the portfolio's VBS the most is added. The
+    portfolio's best cost per instance is updated incrementally, so each step
+    is a single minimum over the cost matrix.
+
+    Parameters
+    ----------
+    costs: np.array
+        configs x instances
+    k: int
+        size of the portfolio, if None until all configurations are added or
+        the cost does not decrease anymore
+
+    Returns
+    -------
+    selected: List[int]
+        rows of the configurations in the order they were added
+    portfolio_costs: List[float]
+        mean cost of the portfolio after each step
+    """
+    costs = np.asarray(costs, dtype=np.float64)
+    n_configs, n_insts = costs.shape
+    k = n_configs if k is None else min(k, n_configs)
+    selected, portfolio_costs = [], []
+    current = np.full(n_insts, np.inf)
+    available = np.ones(n_configs, dtype=bool)
+    while len(selected) < k and n_insts:
+        candidates = np.minimum(current, costs).mean(axis=1)
+        candidates[~available] = np.inf
+        row = int(np.argmin(candidates))
+        if selected and candidates[row] >= portfolio_costs[-1]:
+            break  # no further improvement
+        selected.append(row)
+        portfolio_costs.append(float(candidates[row]))
+        available[row] = False
+        current = np.minimum(current, costs[row])
+    return selected, portfolio_costs
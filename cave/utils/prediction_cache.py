@@ -0,0 +1,201 @@
+import logging
+import weakref
+import threading
+import itertools
+from collections import OrderedDict
+
+import numpy as np
+
+from cave.utils.model_registry import fingerprint, get_registry
+
+# Size-bounded LRU-cache for EPM-predictions. The same configurations (e.g.
+# the incumbents) are predicted in several analysis-stages (completing data
+# with validate_epm, parallel coordinates, cost over time, ...), so predictions
+# are cached per model and input-vector. Models from the model registry are
+# identified by their fingerprint (model.cache_key), so equivalent models share
+# predictions. Other models get a token that is never reused (unlike id()), so
+# predictions of a garbage-collected model can not be returned for a new one.
+
+class PredictionCache(object):
+    """ LRU-cache for predict and predict_marginalized_over_instances. """
+
+    def __init__(self, max_size=100000):
+        """
+        Parameters
+        ----------
+        max_size: int
+            maximum number of cached predictions
+        """
+        self.logger = logging.getLogger("cave.utils.prediction_cache")
+        self.max_size = max_size
+        self.cache = OrderedDict()  # (model-key, method, vector-bytes) -> (mean, var)
+        self.tokens = weakref.WeakKeyDictionary()
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+        self.hits, self.misses = 0, 0
+
+    def _get_model_key(self, model):
+        key = getattr(model, 'cache_key', None)
+        if key is None:
+            key = self.tokens.get(model)
+            if key is None:
+                key = self.tokens[model] = next(self.counter)
+        return key
+
+    def _predict(self, model, X, method, prefix):
+        X = np.asarray(X, dtype=np.float64)
+        mean = np.empty((X.shape[0], 1))
+        var = np.empty((X.shape[0], 1))
+        with self.lock:
+            keys = [prefix + (row.tobytes(),) for row in X]
+            missing = OrderedDict()  # key -> rows in X
+            for idx, key in enumerate(keys):
+                entry = self.cache.get(key)
+                if entry is None:
+                    missing.setdefault(key, []).append(idx)
+                else:
+                    self.cache.move_to_end(key)
+                    mean[idx], var[idx] = entry
+            n_hits = len(keys) - sum(len(rows) for rows in missing.values())
+
+        if missing:
+            # Predict each missing input once
+            first_rows = [rows[0] for rows in missing.values()]
+            new_mean, new_var = getattr(model, method)(X[first_rows])
+            new_mean = np.asarray(new_mean).reshape(-1, 1)
+            new_var = np.asarray(new_var).reshape(-1, 1)
+            with self.lock:
+                for (key, rows), m, v in zip(missing.items(), new_mean, new_var):
+                    mean[rows], var[rows] = m, v
+                    self.cache[key] = (m.copy(), v.copy())
+                while len(self.cache) > self.max_size:
+                    self.cache.popitem(last=False)
+
+        with self.lock:
+            self.hits += n_hits
+            self.misses += len(keys) - n_hits
+        return mean, var
+
+    def predict(self, model, X):
+        """Predict mean and variance of configurations on instances, only
+        querying the model for rows that are not cached.
+
+        Parameters
+        ----------
+        model: RandomForestWithInstances
+            trained model
+        X: np.array
+            configurations in vector-representation with instance features,
+            one per row
+
+        Returns
+        -------
+        mean, var: np.array
+            of shape (len(X), 1), as returned by the model
+        """
+        if isinstance(model, CachedModel):
+            model = model.model
+        with self.lock:
+            prefix = (self._get_model_key(model), 'predict')
+        return self._predict(model, X, 'predict', prefix)
+
+    def predict_marginalized_over_instances(self, model, X):
+        """Predict mean and variance of configurations marginalized over
+        instances, only querying the model for configurations that are not
+        cached. The instances are part of the key, as they might be changed
+        on the model (e.g. to a subsample).
+
+        Parameters
+        ----------
+        model: RandomForestWithInstances
+            trained model
+        X: np.array
+            configurations in vector-representation, one per row
+
+        Returns
+        -------
+        mean, var: np.array
+            of shape (len(X), 1), as returned by the model
+        """
+        if isinstance(model, CachedModel):
+            model = model.model
+        feats = model.instance_features
+        feats = fingerprint(None if feats is None else np.asarray(feats))
+        with self.lock:
+            prefix = (self._get_model_key(model), 'marginalized', feats)
+        return self._predict(model, X, 'predict_marginalized_over_instances',
+                             prefix)
+
+    def invalidate(self, model):
+        """Drop the cached predictions of model and give it a new key, e.g.
+        after it was retrained.
+
+        Parameters
+        ----------
+        model: RandomForestWithInstances
+            model whose predictions are outdated
+        """
+        if isinstance(model, CachedModel):
+            model = model.model
+        with self.lock:
+            old = self._get_model_key(model)
+            for key in [k for k in self.cache if k[0] == old]:
+                del self.cache[key]
+            if getattr(model, 'cache_key', None) is not None:
+                model.cache_key = None
+            self.tokens[model] = next(self.counter)
+        return old
+
+    def log_stats(self, stage=''):
+        """ Log the overall hit rate (once per stage, not per prediction). """
+        with self.lock:
+            total = self.hits + self.misses
+            self.logger.debug("Prediction cache%s: hit rate %.1f%% (%d/%d), "
+                              "%d entries.", " (%s)" % stage if stage else "",
+                              100 * self.hits / total if total else 0,
+                              self.hits, total, len(self.cache))
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.hits, self.misses = 0, 0
+
+class CachedModel(object):
+    """ Trained model whose predictions go through the prediction cache, e.g.
+    as the validator's EPM so the predictions of smac's validate_epm are
+    cached. All other attributes are those of the wrapped model. """
+
+    def __init__(self, model):
+        object.__setattr__(self, 'model', model)
+
+    def predict(self, X):
+        return _cache.predict(self.model, X)
+
+    def predict_marginalized_over_instances(self, X):
+        return _cache.predict_marginalized_over_instances(self.model, X)
+
+    def train(self, X, Y, **kwargs):
+        """ Retrain the model, its cached predictions are invalidated (and
+        it is no longer shared via the model registry). """
+        model = self.model.train(X, Y, **kwargs)
+        get_registry().discard(_cache.invalidate(self.model))
+        return model
+
+    def __getattr__(self, name):
+        if name == 'model':  # not set yet (e.g. while unpickling)
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.model, name, value)
+
+_cache = PredictionCache()
+
+def predict_marginalized_over_instances(model, X):
+    """ Cached model.predict_marginalized_over_instances(X), see
+    PredictionCache. """
+    return _cache.predict_marginalized_over_instances(model, X)
+
+def get_prediction_cache():
+    """ Process-wide prediction cache. """
+    return _cache
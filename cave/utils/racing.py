@@ -0,0 +1,70 @@
+import logging
+
+import numpy as np
+from scipy.stats import wilcoxon
+
+# Racing two configurations against each other: instances are evaluated in
+# batches and evaluation stops as soon as a paired test on the per-instance
+# costs is confident that the configurations differ.
+
+def paired_confidence(costs1, costs2):
+    """Confidence (1 - p-value of a two-sided Wilcoxon signed-rank test) that
+    the paired costs differ.
+
+    Parameters
+    ----------
+    costs1, costs2: np.array
+        costs of both configurations on the same instances (same order)
+
+    Returns
+    -------
+    confidence: float
+        in [0, 1], 0 if all costs are equal or no costs are given
+    """
+    diff = np.asarray(costs1, dtype=float) - np.asarray(costs2, dtype=float)
+    if not len(diff) or np.all(diff == 0):
+        return 0.
+    _, p = wilcoxon(costs1, costs2)
+    return 0. if np.isnan(p) else 1. - p
+
+def race(evaluate, instances, confidence=0.95, batch_size=10,
+         min_instances=10, seed=12345):
+    """Evaluate instances in (shuffled) batches, until the paired test between
+    the two configurations reaches confidence or all instances are evaluated.
+
+    Parameters
+    ----------
+    evaluate: callable
+        takes a list of instances, evaluates both configurations on them and
+        returns two dicts (instance -> cost) with the costs of both
+        configurations on all instances evaluated so far
+    instances: List[str]
+        instances to race on
+    confidence: float
+        stop as soon as this confidence is reached
+    batch_size: int
+        number of instances evaluated before testing
+    min_instances: int
+        minimum number of instances before racing may stop
+    seed: int
+        seed to shuffle instances
+
+    Returns
+    -------
+    confidence, n_instances: float, int
+        confidence reached and number of instances evaluated
+    """
+    logger = logging.getLogger("cave.utils.racing")
+    instances = list(instances)
+    np.random.RandomState(seed).shuffle(instances)
+    conf, n = 0., 0
+    for start in range(0, len(instances), batch_size):
+        costs1, costs2 = evaluate(instances[start:start + batch_size])
+        common = [i for i in costs1 if i in costs2]
+        conf = paired_confidence([costs1[i] for i in common],
+                                 [costs2[i] for i in common])
+        n = len(common)
+        logger.debug("Racing: confidence %.4f after %d instances", conf, n)
+        if n >= min_instances and conf >= confidence:
+            break
+    return conf, n
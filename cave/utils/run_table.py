@@ -0,0 +1,279 @@
+import weakref
+import threading
+
+import numpy as np
+
+# Columnar view on a RunHistory. The runs are stored once as flat arrays
+# (config index, instance index, seed, cost, time, status), configurations and
+# instances are interned to integers. Runs are grouped by configuration, so
+# per-config queries are a slice instead of one RunKey-lookup per run.
+
+_tables = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+class RunTable(object):
+    """ Array-backed, read-only snapshot of a runhistory. """
+
+    def __init__(self, rh):
+        """
+        Parameters
+        ----------
+        rh: RunHistory
+            runhistory to build table from
+        """
+        n = len(rh.data)
+        self.n_runs = n
+        # Interned instances (None is interned like any other instance-name)
+        self.instances, self.inst_to_idx = [], {}
+        # Config-index is the config-id of the runhistory
+        self.config_ids = rh.config_ids
+
+        self.config_idx = np.empty(n, dtype=np.int64)
+        self.instance_idx = np.empty(n, dtype=np.int64)
+        self.seeds = np.empty(n, dtype=np.int64)
+        self.costs = np.empty(n, dtype=np.float64)
+        self.times = np.empty(n, dtype=np.float64)
+        self.status = np.empty(n, dtype=np.int8)
+        for idx, (k, v) in enumerate(rh.data.items()):
+            inst_idx = self.inst_to_idx.get(k.instance_id)
+            if inst_idx is None:
+                inst_idx = self.inst_to_idx[k.instance_id] = len(self.instances)
+                self.instances.append(k.instance_id)
+            self.config_idx[idx] = k.config_id
+            self.instance_idx[idx] = inst_idx
+            self.seeds[idx] = k.seed
+            self.costs[idx] = v.cost
+            self.times[idx] = v.time
+            self.status[idx] = v.status.value
+
+        # Group-by index: runs sorted by (config, instance), stable so the
+        # order of seeds is the order in which the runs were added
+        self.order = np.lexsort((self.instance_idx, self.config_idx))
+        n_configs = (self.config_idx.max() + 2) if n else 1
+        self.config_start = np.searchsorted(self.config_idx[self.order],
+                                            np.arange(n_configs))
+
+    def get_run_indices(self, conf):
+        """Indices of all runs of conf, grouped by instance.
+
+        Parameters
+        ----------
+        conf: Configuration
+            configuration, raises KeyError if not in runhistory
+
+        Returns
+        -------
+        indices: np.array
+            indices into the columns of the table
+        """
+        conf_id = self.config_ids[conf]
+        if conf_id + 1 >= len(self.config_start):
+            return np.empty(0, dtype=np.int64)
+        return self.order[self.config_start[conf_id]:self.config_start[conf_id + 1]]
+
+    def group_by_instance(self, conf, values, aggregate=np.mean):
+        """Aggregate values of the runs of conf per instance (over seeds).
+
+        Parameters
+        ----------
+        conf: Configuration
+            configuration, raises KeyError if not in runhistory
+        values: np.array
+            one value per run in the table (e.g. self.costs)
+        aggregate: function or None
+            takes list of values per instance, if None lists are returned
+
+        Returns
+        -------
+        instances: List[str]
+            instance-names
+        aggregated: np.array or List[List]
+            aggregated value per instance (list of values if aggregate is None)
+        """
+        idx = self.get_run_indices(conf)
+        inst = self.instance_idx[idx]
+        # Runs are sorted by instance, so groups are contiguous
+        bounds = np.flatnonzero(np.diff(inst)) + 1
+        starts = np.concatenate(([0], bounds)) if len(idx) else bounds
+        instances = [self.instances[i] for i in inst[starts]]
+        vals = values[idx]
+        if aggregate is np.mean:
+            counts = np.diff(np.concatenate((starts, [len(idx)])))
+            sums = np.add.reduceat(vals, starts) if len(idx) else vals
+            return instances, sums / counts
+        groups = np.split(vals, bounds) if len(idx) else []
+        if aggregate is None:
+            return instances, [g.tolist() for g in groups]
+        return instances, np.array([aggregate(g.tolist()) for g in groups])
+
+    def get_cost_per_instance(self, conf, aggregate=np.mean):
+        """ Costs of conf per instance, see group_by_instance. """
+        return self.group_by_instance(conf, self.costs, aggregate)
+
+    def _get_cells(self, configs, instances=None):
+        """Map runs to cells of a configs x instances matrix.
+
+        Returns
+        -------
+        flat: np.array
+            cell (row * n_cols + col) of each run in a cell
+        valid: np.array
+            boolean mask of runs that are in a cell
+        shape: tuple(int, int)
+            number of unique configs and of instances
+        row_of_config: np.array
+            row of each config (duplicate configurations share a row)
+        instances: List[str]
+            instance-names of the columns
+        """
+        if instances is None:
+            instances = self.instances
+            col_of_inst = np.arange(len(instances))
+        else:
+            col_of_inst = np.array([-1] * len(self.instances), dtype=np.int64)
+            for col, inst in enumerate(instances):
+                idx = self.inst_to_idx.get(inst)
+                if idx is not None:
+                    col_of_inst[idx] = col
+        ids, row_of_config = np.unique(np.array([self.config_ids[c] for c in configs],
+                                                dtype=np.int64),
+                                       return_inverse=True)
+        n_rows, n_cols = len(ids), len(instances)
+        row_of_id = np.full(max(ids.max() if n_rows else 0,
+                                self.config_idx.max() if self.n_runs else 0) + 1,
+                            -1, dtype=np.int64)
+        row_of_id[ids] = np.arange(n_rows)
+        rows = row_of_id[self.config_idx]
+        cols = col_of_inst[self.instance_idx]
+        valid = (rows >= 0) & (cols >= 0)
+        flat = rows[valid] * n_cols + cols[valid]
+        return flat, valid, (n_rows, n_cols), row_of_config, instances
+
+    def get_sums_and_counts(self, configs, values, instances=None):
+        """Sum and number of values of the runs per configuration and
+        instance, in one pass over all runs.
+
+        Parameters
+        ----------
+        configs: List[Configuration]
+            configurations (rows), raises KeyError if not in runhistory
+        values: np.array
+            one value per run in the table (e.g. self.costs)
+        instances: List[str]
+            instances (columns), if None all instances of the table; runs on
+            other instances are ignored
+
+        Returns
+        -------
+        sums, counts: np.array
+            of shape (len(configs), len(instances))
+        instances: List[str]
+            instance-names of the columns
+        """
+        flat, valid, shape, row_of_config, instances = self._get_cells(configs, instances)
+        size = shape[0] * shape[1]
+        sums = np.bincount(flat, weights=np.asarray(values, dtype=np.float64)[valid],
+                           minlength=size).reshape(shape)
+        counts = np.bincount(flat, minlength=size).reshape(shape)
+        return sums[row_of_config], counts[row_of_config], instances
+
+    def get_matrix(self, configs, values, instances=None, aggregate='mean'):
+        """Values of the runs as dense configs x instances matrix, aggregated
+        over seeds with grouped array-reductions.
+
+        Parameters
+        ----------
+        configs: List[Configuration]
+            configurations (rows), raises KeyError if not in runhistory
+        values: np.array
+            one value per run in the table (e.g. self.costs)
+        instances: List[str]
+            instances (columns), if None all instances of the table
+        aggregate: str or None
+            from [mean, median, None], with None the seeds are a third axis
+            (in the order the runs were added)
+
+        Returns
+        -------
+        matrix: np.array
+            of shape (len(configs), len(instances)) (plus the number of seeds
+            if not aggregated), nan where no run is available
+        instances: List[str]
+            instance-names of the columns
+        """
+        if aggregate == 'mean':
+            sums, counts, instances = self.get_sums_and_counts(configs, values,
+                                                               instances)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return sums / counts, instances
+        if aggregate not in ['median', None]:
+            raise ValueError("Aggregation %s not supported, use one of "
+                             "[mean, median, None]" % str(aggregate))
+
+        flat, valid, shape, row_of_config, instances = self._get_cells(configs, instances)
+        size = shape[0] * shape[1]
+        vals = np.asarray(values, dtype=np.float64)[valid]
+        counts = np.bincount(flat, minlength=size)
+        starts = np.cumsum(counts) - counts
+        if aggregate == 'median':
+            # Sort by cell, then value: medians are the middle of each group
+            order = np.lexsort((vals, flat))
+            vals = vals[order]
+            matrix = np.full(size, np.nan)
+            cells = np.flatnonzero(counts)
+            low = starts[cells] + (counts[cells] - 1) // 2
+            high = starts[cells] + counts[cells] // 2
+            matrix[cells] = (vals[low] + vals[high]) / 2
+            return matrix.reshape(shape)[row_of_config], instances
+
+        # Stable sort by cell keeps the order of the seeds
+        order = np.argsort(flat, kind='mergesort')
+        flat, vals = flat[order], vals[order]
+        pos = np.arange(len(flat)) - starts[flat]
+        matrix = np.full((size, counts.max() if size else 0), np.nan)
+        matrix[flat, pos] = vals
+        return matrix.reshape(shape + (-1,))[row_of_config], instances
+
+    def get_mean_costs(self, configs):
+        """Mean cost over all runs for each configuration (same as the
+        runhistory's cost with average_cost as aggregation).
+
+        Parameters
+        ----------
+        configs: List[Configuration]
+            configurations, raises KeyError if not in runhistory
+
+        Returns
+        -------
+        costs: np.array
+            mean cost per configuration, nan if no runs available
+        """
+        ids = np.array([self.config_ids[c] for c in configs], dtype=np.int64)
+        minlength = max(len(self.config_start), ids.max() + 1 if len(ids) else 0)
+        sums = np.bincount(self.config_idx, weights=self.costs,
+                           minlength=minlength)
+        counts = np.bincount(self.config_idx, minlength=minlength)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return sums[ids] / counts[ids]
+
+def get_run_table(rh):
+    """Return the run table of rh, building it only once. The table is rebuilt
+    if runs were added to the runhistory since it was built.
+
+    Parameters
+    ----------
+    rh: RunHistory
+        runhistory to get table for
+
+    Returns
+    -------
+    table: RunTable
+        columnar snapshot of rh
+    """
+    with _lock:
+        table = _tables.get(rh)
+    if table is None or table.n_runs != len(rh.data):
+        table = RunTable(rh)
+        with _lock:
+            _tables[rh] = table
+    return table
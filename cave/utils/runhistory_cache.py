@@ -0,0 +1,245 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+
+import numpy as np
+
+from smac.configspace import Configuration
+from smac.optimizer.objective import average_cost
+from smac.runhistory.runhistory import RunHistory, DataOrigin
+from smac.tae.execute_ta_run import StatusType
+
+from cave.utils.runhistory_stream import stream_runhistory_to_arrays
+
+# Binary sidecar-cache for runhistory.json-files. The runs are stored as
+# flat numpy-arrays (one .npy-file per column, so they can be memory-mapped)
+# in a folder next to the json-file, the distinct additional run-information
+# is stored as json. The folder is named after a hash of the json-content and
+# the configuration space, so a changed json-file simply misses the cache and
+# stale entries are replaced.
+
+CACHE_SUFFIX = ".cave_cache"
+ARRAYS = ["configs", "config_ids", "instance_ids", "seeds", "costs", "times",
+          "status"]
+
+def file_hash(fn, chunk_size=2**20):
+    """Hash file content (sha1), reading in chunks to keep memory low.
+
+    Parameters
+    ----------
+    fn: str
+        path to file
+    chunk_size: int
+        bytes to read at once
+
+    Returns
+    -------
+    hash: str
+        hexdigest of the file content
+    """
+    sha = hashlib.sha1()
+    with open(fn, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def get_cache_key(fn, cs):
+    """Key for a runhistory-file. Config-vectors depend on the configuration
+    space, so its string-representation is part of the key. """
+    cs_hash = hashlib.sha1(str(cs).encode('utf-8')).hexdigest()
+    return "{}_{}".format(file_hash(fn), cs_hash[:12])
+
+def runhistory_to_arrays(rh):
+    """Convert runhistory into flat arrays.
+
+    Parameters
+    ----------
+    rh: RunHistory
+        runhistory to convert
+
+    Returns
+    -------
+    arrays: dict[str->np.array]
+        configs (vector-representation, one row per config-id), and per run:
+        config_ids (row in configs), instance_ids (index in instances, -1 for
+        None), seeds, costs, times and status (StatusType-values)
+    instances: List[str]
+        instance names
+    """
+    ids = sorted(rh.ids_config.keys())
+    id_to_row = {id_: row for row, id_ in enumerate(ids)}
+    configs = np.array([rh.ids_config[id_].get_array() for id_ in ids],
+                       dtype=np.float64)
+    instances, inst_to_idx = [], {}
+    n = len(rh.data)
+    arrays = {"configs": configs,
+              "config_ids": np.empty(n, dtype=np.int32),
+              "instance_ids": np.empty(n, dtype=np.int32),
+              "seeds": np.empty(n, dtype=np.int64),
+              "costs": np.empty(n, dtype=np.float64),
+              "times": np.empty(n, dtype=np.float64),
+              "status": np.empty(n, dtype=np.int8)}
+    for idx, (k, v) in enumerate(rh.data.items()):
+        if k.instance_id is None:
+            inst_idx = -1
+        else:
+            inst_idx = inst_to_idx.get(k.instance_id)
+            if inst_idx is None:
+                inst_idx = inst_to_idx[k.instance_id] = len(instances)
+                instances.append(k.instance_id)
+        arrays["config_ids"][idx] = id_to_row[k.config_id]
+        arrays["instance_ids"][idx] = inst_idx
+        arrays["seeds"][idx] = k.seed
+        arrays["costs"][idx] = v.cost
+        arrays["times"][idx] = v.time
+        arrays["status"][idx] = v.status.value
+    return arrays, instances
+
+def arrays_to_runhistory(arrays, instances, cs, rh=None,
+                         origin=DataOrigin.EXTERNAL_SAME_INSTANCES, infos=None):
+    """Add runs from flat arrays (see runhistory_to_arrays) to a runhistory.
+
+    Parameters
+    ----------
+    arrays: dict[str->np.array]
+        arrays as returned by runhistory_to_arrays, additional run-information
+        is restored if they contain info_ids
+    instances: List[str]
+        instance names
+    cs: ConfigurationSpace
+        configuration space to restore configurations in
+    rh: RunHistory
+        runhistory to update, if None a new one is created
+    origin: DataOrigin
+        origin to add the runs with
+    infos: List
+        distinct additional run-information (indexed by info_ids)
+
+    Returns
+    -------
+    rh: RunHistory
+        runhistory containing the runs
+    """
+    if rh is None:
+        rh = RunHistory(average_cost)
+    configs = [Configuration(cs, vector=vec) for vec in arrays["configs"]]
+    instances = list(instances) + [None]  # index -1 -> None
+    infos = list(infos or []) + [None]
+    info_ids = arrays.get("info_ids")
+    info_ids = [-1] * len(arrays["costs"]) if info_ids is None else info_ids.tolist()
+    for c, i, s, cost, time, status, info in zip(arrays["config_ids"].tolist(),
+                                                 arrays["instance_ids"].tolist(),
+                                                 arrays["seeds"].tolist(),
+                                                 arrays["costs"].tolist(),
+                                                 arrays["times"].tolist(),
+                                                 arrays["status"].tolist(),
+                                                 info_ids):
+        rh.add(configs[c], cost, time, StatusType(status),
+               instance_id=instances[i], seed=s, additional_info=infos[info],
+               origin=origin)
+    return rh
+
+def write_arrays(path, arrays, instances, meta=None, infos=None):
+    """Write arrays (and info_ids with the distinct additional
+    run-information infos, if given) into a folder (atomically, via a
+    temporary folder that is renamed). """
+    base = os.path.dirname(path)
+    if not os.path.exists(base):
+        os.makedirs(base)
+    tmp = tempfile.mkdtemp(dir=base)
+    try:
+        names = ARRAYS + (["info_ids"] if infos is not None else [])
+        for name in names:
+            np.save(os.path.join(tmp, name + ".npy"), arrays[name])
+        meta = dict(meta) if meta else {}
+        meta["instances"] = instances
+        if infos is not None:
+            meta["infos"] = infos
+        with open(os.path.join(tmp, "meta.json"), 'w') as fh:
+            json.dump(meta, fh)
+        os.rename(tmp, path)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+def read_arrays(path, mmap_mode='r'):
+    """Read arrays written with write_arrays, memory-mapped by default.
+
+    Returns
+    -------
+    arrays: dict[str->np.array]
+        arrays as returned by runhistory_to_arrays (plus info_ids, if written)
+    instances: List[str]
+        instance names
+    infos: List
+        distinct additional run-information, None if not written
+    """
+    with open(os.path.join(path, "meta.json")) as fh:
+        meta = json.load(fh)
+    infos = meta.get("infos")
+    names = ARRAYS + (["info_ids"] if infos is not None else [])
+    arrays = {name: np.load(os.path.join(path, name + ".npy"),
+                            mmap_mode=mmap_mode) for name in names}
+    return arrays, meta["instances"], infos
+
+def load_runhistory(fn, cs, rh=None, use_cache=True):
+    """Load a runhistory.json, using the binary cache next to it if it is
+    up-to-date. Otherwise the json is streamed into arrays (with bounded
+    memory, see cave.utils.runhistory_stream) and the cache (re)built. If the
+    cache cannot be written (e.g. read-only folder), the streamed data is used
+    without caching.
+
+    Parameters
+    ----------
+    fn: str
+        path to runhistory.json
+    cs: ConfigurationSpace
+        configuration space of the runs
+    rh: RunHistory
+        runhistory to update with the loaded runs, if None a new one is created
+    use_cache: bool
+        if False, always parse the json and do not touch the cache
+
+    Returns
+    -------
+    rh: RunHistory
+        runhistory with the runs from fn
+    """
+    logger = logging.getLogger("cave.utils.runhistory_cache")
+    if rh is None:
+        rh = RunHistory(average_cost)
+    if not use_cache:
+        rh.update_from_json(fn, cs)
+        return rh
+
+    cache_dir = fn + CACHE_SUFFIX
+    key = get_cache_key(fn, cs)
+    path = os.path.join(cache_dir, key)
+    if os.path.isdir(path):
+        try:
+            arrays, instances, infos = read_arrays(path)
+            if infos is None:
+                raise ValueError("no additional run-information (old cache)")
+            logger.debug("Loading %s from cache %s", fn, path)
+            return arrays_to_runhistory(arrays, instances, cs, rh, infos=infos)
+        except Exception as err:
+            logger.debug("Cache %s could not be read (%s), parsing json.", path, err)
+
+    # Stream json directly into arrays (never holding the whole json-tree)
+    arrays, instances, infos = stream_runhistory_to_arrays(
+            fn, lambda values: Configuration(cs, values=values).get_array(),
+            {s.name: s.value for s in StatusType})
+    try:
+        if os.path.isdir(cache_dir):
+            # Remove stale entries (source-file changed)
+            for stale in os.listdir(cache_dir):
+                shutil.rmtree(os.path.join(cache_dir, stale), ignore_errors=True)
+        write_arrays(path, arrays, instances, meta={"source": os.path.basename(fn)},
+                     infos=infos)
+        logger.debug("Wrote runhistory-cache to %s", path)
+    except OSError as err:
+        logger.debug("Could not write runhistory-cache for %s: %s", fn, err)
+    return arrays_to_runhistory(arrays, instances, cs, rh, infos=infos)
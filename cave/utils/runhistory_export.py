@@ -0,0 +1,86 @@
+import os
+import gzip
+import copy
+import shutil
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from cave.utils.runhistory_cache import runhistory_to_arrays
+
+# Export of (large) runhistories, optionally compressed or binary, on a
+# background thread.
+
+EXPORT_FORMATS = ['json', 'json.gz', 'npz', 'none']
+
+def export_runhistory(rh, fn_base, fmt='json'):
+    """Write runhistory to disk.
+
+    Parameters
+    ----------
+    rh: RunHistory
+        runhistory to write
+    fn_base: str
+        path without extension
+    fmt: str
+        one of 'json' (as RunHistory.save_json), 'json.gz' (gzipped json) or
+        'npz' (compressed arrays, see cave.utils.runhistory_cache)
+
+    Returns
+    -------
+    fn: str
+        path of the written file
+    """
+    fn = fn_base + '.' + fmt
+    if fmt == 'json':
+        rh.save_json(fn)
+    elif fmt == 'json.gz':
+        tmp = fn_base + '.json.tmp'
+        rh.save_json(tmp)
+        try:
+            with open(tmp, 'rb') as f_in, gzip.open(fn, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out)
+        finally:
+            os.remove(tmp)
+    elif fmt == 'npz':
+        arrays, instances = runhistory_to_arrays(rh)
+        np.savez_compressed(fn, instances=np.array(instances, dtype=str),
+                            **arrays)
+    else:
+        raise ValueError("Unknown export-format %s (use one of %s)" %
+                         (fmt, str(EXPORT_FORMATS)))
+    return fn
+
+def snapshot_runhistory(rh):
+    """ Shallow copy of rh that is not affected by runs added later on. """
+    snapshot = copy.copy(rh)
+    snapshot.data = OrderedDict(rh.data)
+    snapshot.ids_config = dict(rh.ids_config)
+    snapshot.config_ids = dict(rh.config_ids)
+    return snapshot
+
+def export_in_background(rh, fn_base, fmt='json'):
+    """Export a snapshot of rh on a background thread (see export_runhistory).
+    The thread is not a daemon, so the interpreter waits for the export to
+    finish before exiting.
+
+    Returns
+    -------
+    thread: threading.Thread
+        started thread, join it to wait for the export
+    """
+    logger = logging.getLogger("cave.utils.runhistory_export")
+    snapshot = snapshot_runhistory(rh)
+
+    def _export():
+        try:
+            fn = export_runhistory(snapshot, fn_base, fmt)
+            logger.debug("Exported runhistory to %s", fn)
+        except Exception as err:
+            logger.warning("Exporting runhistory to %s failed: %s", fn_base, err)
+
+    thread = threading.Thread(target=_export, name="cave-export-rh")
+    thread.start()
+    return thread
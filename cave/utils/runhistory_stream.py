@@ -0,0 +1,246 @@
+import json
+from array import array
+
+import numpy as np
+
+# Streaming parser for (possibly multi-gigabyte) runhistory.json-files.
+# Instead of loading the whole json-tree, the file is read in chunks and the
+# elements of the top-level "data"-list and "configs"-dict are decoded one at a
+# time. Runs are written into compact typed arrays, so memory is dominated by
+# the number of distinct configurations instead of the file size.
+
+_WS = ' \t\n\r'
+
+class _Reader(object):
+    """ Chunked text-buffer with a cursor, that decodes json-values and
+    transparently reads more data if a value is cut off at the buffer end. """
+
+    def __init__(self, fh, chunk_size):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """ Read next chunk, dropping everything before the cursor. """
+        if self.eof:
+            return False
+        chunk = self.fh.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """ Skip whitespace and return next character ('' at end of file). """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError("Malformed runhistory: expected '%s' at "
+                             "'%s'" % (char, self.buf[self.pos:self.pos + 20]))
+        self.pos += 1
+
+    def value(self):
+        """ Decode next json-value. """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if self._fill():
+                    continue
+                raise
+            if end == len(self.buf) and not self.eof:
+                # Numbers might be cut off at the buffer end
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
+
+    def iter_array(self):
+        """ Yield elements of the json-array at the cursor. """
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.pos += 1
+            else:
+                self.expect(']')
+                return
+
+    def iter_object(self):
+        """ Yield (key, value)-pairs of the json-object at the cursor. """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key, self.value()
+            if self.peek() == ',':
+                self.pos += 1
+            else:
+                self.expect('}')
+                return
+
+    def iter_top_level(self):
+        """ Yield (key, reader-positioned-at-value) for the top-level object;
+        the consumer has to consume the value. """
+        self.expect('{')
+        if self.peek() == '}':
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() == ',':
+                self.pos += 1
+            else:
+                self.expect('}')
+                return
+
+def iter_runhistory(fn, chunk_size=2**20):
+    """Iterate over the records of a runhistory.json without loading it.
+
+    Parameters
+    ----------
+    fn: str
+        path to runhistory.json
+    chunk_size: int
+        number of characters read at once
+
+    Yields
+    ------
+    ("data", run) or ("configs", (config_id, values))
+        run is the json-list [[config_id, instance, seed],
+        [cost, time, status, additional_info]], values the parameter-dict of
+        the configuration with json-id config_id. Other top-level entries are
+        skipped.
+    """
+    with open(fn) as fh:
+        reader = _Reader(fh, chunk_size)
+        for key in reader.iter_top_level():
+            if key == "data" and reader.peek() == '[':
+                for run in reader.iter_array():
+                    yield "data", run
+            elif key == "configs" and reader.peek() == '{':
+                for id_, values in reader.iter_object():
+                    yield "configs", (int(id_), values)
+            else:
+                reader.value()
+
+def parse_status(status, status_values):
+    """Translate a json-encoded status ({"__enum__": "StatusType.SUCCESS"}
+    or plain int) into its int-value.
+
+    Parameters
+    ----------
+    status: dict or int
+        status as saved in runhistory.json
+    status_values: dict[str->int]
+        maps member-names of StatusType to their values
+    """
+    if isinstance(status, dict):
+        return status_values[status["__enum__"].split(".")[-1]]
+    return int(status)
+
+def stream_runhistory_to_arrays(fn, config_to_array, status_values,
+                                chunk_size=2**20):
+    """Stream runhistory.json into flat arrays, as used by the runhistory-cache
+    (see cave.utils.runhistory_cache.runhistory_to_arrays).
+
+    Parameters
+    ----------
+    fn: str
+        path to runhistory.json
+    config_to_array: callable
+        converts a parameter-dict into the vector-representation of the
+        configuration
+    status_values: dict[str->int]
+        maps member-names of StatusType to their values
+    chunk_size: int
+        number of characters read at once
+
+    Returns
+    -------
+    arrays: dict[str->np.array]
+        configs, config_ids, instance_ids, seeds, costs, times, status and
+        info_ids (index into infos, -1 without additional information)
+    instances: List[str]
+        instance names
+    infos: List
+        distinct additional run-information
+    """
+    config_ids, instance_ids = array('l'), array('l')
+    seeds, costs, times, status = array('q'), array('d'), array('d'), array('b')
+    info_ids, infos, info_to_idx = array('l'), [], {}
+    instances, inst_to_idx = [], {}
+    json_ids, vectors = [], []
+
+    for section, record in iter_runhistory(fn, chunk_size):
+        if section == "data":
+            (config_id, inst, seed), (cost, time, stat) = record[0], record[1][:3]
+            if inst is None:
+                inst_idx = -1
+            else:
+                inst_idx = inst_to_idx.get(inst)
+                if inst_idx is None:
+                    inst_idx = inst_to_idx[inst] = len(instances)
+                    instances.append(inst)
+            config_ids.append(int(config_id))
+            instance_ids.append(inst_idx)
+            seeds.append(int(seed))
+            costs.append(float(cost))
+            times.append(float(time))
+            status.append(parse_status(stat, status_values))
+            info = record[1][3] if len(record[1]) > 3 else None
+            if info is None:
+                info_ids.append(-1)
+            else:
+                # Usually few distinct values (e.g. the same message per run)
+                info_key = json.dumps(info, sort_keys=True)
+                info_idx = info_to_idx.get(info_key)
+                if info_idx is None:
+                    info_idx = info_to_idx[info_key] = len(infos)
+                    infos.append(info)
+                info_ids.append(info_idx)
+        else:
+            json_ids.append(record[0])
+            vectors.append(config_to_array(record[1]))
+
+    # Map json-config-ids to rows in the config-matrix
+    json_ids = np.array(json_ids, dtype=np.int64)
+    config_ids = np.array(config_ids, dtype=np.int64)
+    max_id = max(json_ids.max() if len(json_ids) else 0,
+                 config_ids.max() if len(config_ids) else 0)
+    lookup = np.full(max_id + 1, -1, dtype=np.int32)
+    lookup[json_ids] = np.arange(len(json_ids), dtype=np.int32)
+    config_rows = lookup[config_ids]
+    if (config_rows < 0).any():
+        raise ValueError("Malformed runhistory %s: runs reference unknown "
+                         "configurations." % fn)
+
+    arrays = {"configs": np.array(vectors, dtype=np.float64),
+              "config_ids": config_rows,
+              "instance_ids": np.array(instance_ids, dtype=np.int32),
+              "seeds": np.array(seeds, dtype=np.int64),
+              "costs": np.array(costs, dtype=np.float64),
+              "times": np.array(times, dtype=np.float64),
+              "status": np.array(status, dtype=np.int8),
+              "info_ids": np.array(info_ids, dtype=np.int32)}
+    return arrays, instances, infos
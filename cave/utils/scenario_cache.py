@@ -0,0 +1,91 @@
+import os
+import hashlib
+import logging
+import threading
+
+from smac.scenario.scenario import Scenario
+
+from cave.utils.runhistory_cache import file_hash
+from cave.utils.paths import FILE_OPTIONS, normalize_option, resolve_path, \
+        resolve_scenario_paths
+
+# Process-wide cache for scenarios. SMAC-runs of the same scenario usually
+# reference identical instance-, feature- and pcs-files (often copied into each
+# output-folder), so the scenario is keyed by the content of these files and
+# all other options. Runs with identical inputs share one Scenario-object,
+# which has to be treated as read-only.
+
+# Scenario-options that do not influence the parsed scenario
+IGNORED_OPTIONS = ['outputdir']
+
+_scenarios = {}
+_lock = threading.Lock()
+
+def get_scenario_key(scen_dict, ta_exec_dir=None):
+    """Fingerprint of a scenario. File-options are replaced by the hash of the
+    file-content (paths relative to ta_exec_dir), so scenarios referencing
+    copies of the same files in different folders get the same key.
+
+    Parameters
+    ----------
+    scen_dict: dict
+        scenario-options as read by smac's InputReader
+    ta_exec_dir: str
+        directory the paths in the scenario are relative to
+
+    Returns
+    -------
+    key: str
+        hexdigest identifying the scenario
+    """
+    items = []
+    for option, value in scen_dict.items():
+        norm = normalize_option(option)
+        if norm in IGNORED_OPTIONS:
+            continue
+        if norm in FILE_OPTIONS and value:
+            path = resolve_path(value, ta_exec_dir)
+            if os.path.isfile(path):
+                value = file_hash(path)
+        items.append((norm, str(value)))
+    return hashlib.sha1(repr(sorted(items)).encode('utf-8')).hexdigest()
+
+def share_scenario(key, scen):
+    """Return the cached scenario for key, or register scen under key.
+    Used to merge scenarios that were parsed in other processes. """
+    with _lock:
+        return _scenarios.setdefault(key, scen)
+
+def get_scenario(scen_dict, ta_exec_dir=None):
+    """Return a (shared, read-only) scenario for the given options, parsing
+    it only if no scenario with identical inputs was parsed before.
+
+    Parameters
+    ----------
+    scen_dict: dict
+        scenario-options as read by smac's InputReader
+    ta_exec_dir: str
+        directory the paths in the scenario are relative to (resolved
+        explicitly, the working directory is not changed)
+
+    Returns
+    -------
+    key, scen: str, Scenario
+        fingerprint and scenario
+    """
+    logger = logging.getLogger("cave.utils.scenario_cache")
+    scen_dict = resolve_scenario_paths(scen_dict, ta_exec_dir)
+    key = get_scenario_key(scen_dict)
+    with _lock:
+        scen = _scenarios.get(key)
+    if scen is None:
+        scen = Scenario(scen_dict)
+        scen = share_scenario(key, scen)
+    else:
+        logger.debug("Reusing scenario %s", key)
+    return key, scen
+
+def clear():
+    """ Empty the scenario-cache. """
+    with _lock:
+        _scenarios.clear()
@@ -0,0 +1,146 @@
+import pickle
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from smac.epm.rf_with_instances import RandomForestWithInstances
+
+# Random forest trained as independent sub-forests (with different seeds) in
+# worker processes. The sub-forests are combined into one predictor: with
+# equally sized sub-forests the mean is the average of their means and the
+# variance (over all trees) follows the law of total variance, i.e. the mean
+# of the sub-forest-variances plus the variance of the sub-forest-means. This
+# is exact, so splitting the trees among the sub-forests does not change the
+# predictive distribution.
+
+_picklable = None  # whether forests can be sent between processes
+
+def forests_picklable():
+    """ Whether trained forests can be transferred between processes
+    (checked once per process on a tiny forest). """
+    global _picklable
+    if _picklable is None:
+        try:
+            model = RandomForestWithInstances(types=np.zeros(1, dtype=np.uint),
+                                              bounds=np.array([(0, 1)]),
+                                              num_trees=1, seed=1)
+            model.train(np.array([[0.], [0.5], [1.]]), np.array([0., 1., 2.]))
+            pickle.loads(pickle.dumps(model)).predict(np.array([[0.5]]))
+            _picklable = True
+        except Exception as err:
+            logging.getLogger("cave.utils.sharded_forest").info(
+                    "Random forests can not be transferred between processes "
+                    "(%s), they are trained in a single process.", err)
+            _picklable = False
+    return _picklable
+
+def _train_shard(types, bounds, instance_features, seed, rf_kwargs, X, y):
+    model = RandomForestWithInstances(types=types, bounds=bounds,
+                                      instance_features=instance_features,
+                                      seed=seed, **rf_kwargs)
+    model.train(X, y)
+    return model
+
+def combine_predictions(means, variances):
+    """Combine predictions of equally sized sub-forests.
+
+    Parameters
+    ----------
+    means, variances: List[np.array]
+        mean and variance over the trees of each sub-forest
+
+    Returns
+    -------
+    mean, var: np.array
+        mean and variance over all trees
+    """
+    means, variances = np.array(means), np.array(variances)
+    mean = means.mean(axis=0)
+    var = variances.mean(axis=0) + ((means - mean) ** 2).mean(axis=0)
+    return mean, var
+
+class ShardedRandomForest(object):
+    """ RandomForestWithInstances-like model, trained as sub-forests in
+    parallel. Supports train, predict and predict_marginalized_over_instances. """
+
+    def __init__(self, types, bounds, instance_features=None, seed=42,
+                 n_shards=2, num_trees=10, **rf_kwargs):
+        """
+        Parameters
+        ----------
+        types, bounds: np.array
+            types and bounds of the input dimensions (see smac's get_types)
+        instance_features: np.array
+            instance features
+        seed: int
+            seed, sub-forest i uses seed + i
+        n_shards: int
+            number of sub-forests (and worker processes)
+        num_trees: int
+            total number of trees (split among the sub-forests)
+        rf_kwargs: dict
+            further arguments for RandomForestWithInstances
+        """
+        self.logger = logging.getLogger("cave.utils.sharded_forest")
+        self.types = types
+        self.bounds = bounds
+        self._instance_features = instance_features
+        self.seed = seed
+        self.n_shards = n_shards
+        self.num_trees = num_trees
+        self.rf_kwargs = dict(rf_kwargs)
+        self.rf_kwargs['num_trees'] = max(1, int(np.ceil(num_trees / n_shards)))
+        self.shards = []
+
+    @property
+    def instance_features(self):
+        return self._instance_features
+
+    @instance_features.setter
+    def instance_features(self, features):
+        self._instance_features = features
+        for shard in self.shards:
+            shard.instance_features = features
+
+    def train(self, X, y):
+        """ Train sub-forests in worker processes. Sub-forests that failed
+        there are trained in this process. If forests can not be transferred
+        between processes at all, a single forest is trained instead. """
+        if not forests_picklable():
+            rf_kwargs = dict(self.rf_kwargs, num_trees=self.num_trees)
+            self.shards = [_train_shard(self.types, self.bounds,
+                                        self._instance_features, self.seed,
+                                        rf_kwargs, X, y)]
+            return self
+        args = [(self.types, self.bounds, self._instance_features,
+                 self.seed + i, self.rf_kwargs, X, y) for i in range(self.n_shards)]
+        shards = [None] * self.n_shards
+        try:
+            with ProcessPoolExecutor(max_workers=self.n_shards) as executor:
+                futures = [executor.submit(_train_shard, *a) for a in args]
+                for i, future in enumerate(futures):
+                    try:
+                        shards[i] = future.result()
+                    except Exception as err:
+                        self.logger.debug("Training sub-forest %d in parallel "
+                                          "failed (%s).", i, err)
+        except Exception as err:
+            self.logger.debug("Training sub-forests in parallel failed (%s).", err)
+        missing = [i for i, shard in enumerate(shards) if shard is None]
+        if missing:
+            self.logger.debug("Training %d sub-forests sequentially.", len(missing))
+        for i in missing:
+            shards[i] = _train_shard(*args[i])
+        self.shards = shards
+        return self
+
+    def predict(self, X):
+        """ Mean and variance over all trees for X (incl. instance features). """
+        preds = [shard.predict(X) for shard in self.shards]
+        return combine_predictions([p[0] for p in preds], [p[1] for p in preds])
+
+    def predict_marginalized_over_instances(self, X):
+        """ Mean and variance over all trees, marginalized over instances. """
+        preds = [shard.predict_marginalized_over_instances(X) for shard in self.shards]
+        return combine_predictions([p[0] for p in preds], [p[1] for p in preds])
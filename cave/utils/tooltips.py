@@ -21,6 +21,20 @@ def get_tooltip(header):
                              "penalized average runtime as well as number of "
                              "timeouts.",
 
+        "Incumbents of all runs": "Performance of the final incumbent of every "
+                                  "configurator run (and optionally of all "
+                                  "incumbents of the trajectories), ranked by "
+                                  "PAR10. The last rows show how much the "
+                                  "final incumbents vary across runs.",
+
+        "Portfolio Analysis": "Default and final incumbents of all runs "
+                              "as a portfolio. The virtual best solver (VBS) "
+                              "picks the best configuration per instance. "
+                              "The marginal contribution of a configuration "
+                              "is how much worse the VBS gets without it. "
+                              "The greedy portfolio adds the configuration "
+                              "that improves the portfolio most in each step.",
+
         "Scatterplot": "Scatter plots show the costs of the default and "
                        "optimized parameter "
                        "configuration on each instance. Since this "
@@ -0,0 +1,110 @@
+import os
+import hashlib
+import logging
+import sqlite3
+
+from smac.runhistory.runhistory import DataOrigin
+from smac.tae.execute_ta_run import StatusType
+
+from cave.utils.config_interning import canonical_vector
+
+# Persistent store for runs of the target algorithm executed during
+# validation, so regenerating a report does not execute them again. Runs are
+# keyed by scenario-fingerprint (see cave.utils.scenario_cache), hash of the
+# configuration-vector, instance, seed and cutoff.
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS runs (
+    scenario TEXT, config TEXT, instance TEXT, seed INTEGER, cutoff REAL,
+    cost REAL, time REAL, status INTEGER,
+    PRIMARY KEY (scenario, config, instance, seed, cutoff))"""
+
+def config_hash(config):
+    """ Hash of the canonical vector-representation of config. """
+    return hashlib.sha1(canonical_vector(config.get_array()).tobytes()).hexdigest()
+
+class ValidationStore(object):
+    """ SQLite-file with validated runs. """
+
+    def __init__(self, path, scen_key, cutoff):
+        """
+        Parameters
+        ----------
+        path: str
+            path to sqlite-file, created if it does not exist
+        scen_key: str
+            fingerprint of the scenario
+        cutoff: float or None
+            cutoff of the scenario
+        """
+        self.logger = logging.getLogger("cave.utils.validation_store")
+        self.path = path
+        self.scen_key = scen_key
+        # Instances and cutoff are part of the primary key, so avoid NULL
+        self.cutoff = -1 if cutoff is None else cutoff
+        dirname = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=60)
+
+    def load(self, configs, rh):
+        """Add all stored runs of configs to rh.
+
+        Parameters
+        ----------
+        configs: List[Configuration]
+            configurations to load runs for
+        rh: RunHistory
+            runhistory to add the runs to
+
+        Returns
+        -------
+        n: int
+            number of loaded runs
+        """
+        hashes = {config_hash(c): c for c in configs}
+        n = 0
+        conn = self._connect()
+        try:
+            for h, config in hashes.items():
+                rows = conn.execute("SELECT instance, seed, cost, time, status "
+                                    "FROM runs WHERE scenario=? AND config=? "
+                                    "AND cutoff=?", (self.scen_key, h, self.cutoff))
+                for inst, seed, cost, time, status in rows:
+                    rh.add(config, cost, time, StatusType(status),
+                           instance_id=inst if inst != '' else None, seed=seed,
+                           origin=DataOrigin.EXTERNAL_SAME_INSTANCES)
+                    n += 1
+        finally:
+            conn.close()
+        self.logger.debug("Loaded %d runs from %s", n, self.path)
+        return n
+
+    def save(self, rh):
+        """Store all runs of rh (replacing stored runs with the same key).
+
+        Parameters
+        ----------
+        rh: RunHistory
+            runhistory with validated runs
+        """
+        hashes = {id_: config_hash(c) for id_, c in rh.ids_config.items()}
+        rows = [(self.scen_key, hashes[k.config_id],
+                 k.instance_id if k.instance_id is not None else '', k.seed,
+                 self.cutoff, v.cost, v.time, v.status.value)
+                for k, v in rh.data.items()]
+        conn = self._connect()
+        try:
+            with conn:  # commits
+                conn.executemany("INSERT OR REPLACE INTO runs VALUES "
+                                 "(?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        finally:
+            conn.close()
+        self.logger.debug("Stored %d runs in %s", len(rows), self.path)
@@ -0,0 +1,98 @@
+import os
+import logging
+from collections import OrderedDict
+
+from smac.optimizer.objective import average_cost
+from smac.runhistory.runhistory import RunHistory, RunKey, DataOrigin
+
+from cave.utils.config_interning import intern
+
+# Helpers to follow SMAC-runs that are still running. Output-files are
+# considered changed if their modification-time or size changed, new run
+# records are determined by comparing the runhistories run by run.
+
+WATCHED_FILES = ['runhistory.json', 'traj_aclib2.json']
+
+def get_file_state(fn):
+    """ (mtime, size) of fn, None if it does not exist. """
+    try:
+        stat = os.stat(fn)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class FolderWatcher(object):
+    """ Detects changes of the output-files in SMAC-folders. """
+
+    def __init__(self, folders, files=WATCHED_FILES):
+        """
+        Parameters
+        ----------
+        folders: List[str]
+            SMAC-output-folders to watch
+        files: List[str]
+            filenames to watch in each folder
+        """
+        self.logger = logging.getLogger("cave.utils.watch")
+        self.files = files
+        self.states = {f: self._get_states(f) for f in folders}
+
+    def _get_states(self, folder):
+        return {fn: get_file_state(os.path.join(folder, fn)) for fn in self.files}
+
+    def poll(self):
+        """Check all folders for changes since the last poll.
+
+        Returns
+        -------
+        changed: OrderedDict[str->List[str]]
+            maps folders to the changed filenames, only contains folders with
+            changes
+        """
+        changed = OrderedDict()
+        for folder, old in self.states.items():
+            new = self._get_states(folder)
+            files = [fn for fn in self.files if new[fn] != old[fn]]
+            if files:
+                self.logger.debug("Changed in %s: %s", folder, str(files))
+                changed[folder] = files
+            self.states[folder] = new
+        return changed
+
+    def retry(self, folder, fn):
+        """ Report fn in folder as changed again on the next poll (e.g. if it
+        was read while still being written). """
+        self.states[folder][fn] = None
+
+def get_new_runs(old_rh, new_rh):
+    """Runs in new_rh that are not in old_rh (or have a different result).
+    Configurations are matched by value, as the config-ids of the two
+    runhistories might differ.
+
+    Parameters
+    ----------
+    old_rh: RunHistory
+        runhistory with the known runs
+    new_rh: RunHistory
+        runhistory with (possibly) additional runs
+
+    Returns
+    -------
+    delta: RunHistory
+        runhistory only containing the new runs
+    """
+    delta = RunHistory(average_cost)
+    # Match configurations via their interned ids
+    old_ids = {intern(c): id_ for c, id_ in old_rh.config_ids.items()}
+    new_to_old = {id_: old_ids.get(intern(c)) for c, id_ in new_rh.config_ids.items()}
+    for k, v in new_rh.data.items():
+        config = new_rh.ids_config[k.config_id]
+        old_id = new_to_old[k.config_id]
+        if old_id is not None:
+            old_v = old_rh.data.get(RunKey(old_id, k.instance_id, k.seed))
+            if old_v is not None and old_v[:3] == v[:3]:
+                continue
+        delta.add(config, v.cost, v.time, v.status, instance_id=k.instance_id,
+                  seed=k.seed, additional_info=v.additional_info,
+                  origin=DataOrigin.EXTERNAL_SAME_INSTANCES)
+    return delta
@@ -47,3 +47,14 @@ class TestAnalyzer(unittest.TestCase):
         print(self.analyzer.plot_algorithm_footprint({self.analyzer.incumbent:"incumbent"}, 50000, 0.95))
         print(self.analyzer.plot_algorithm_footprint({self.analyzer.default:"default"}, 50000, 0.95))
         self.analyzer.plot_algorithm_footprint()
+
+    def test_performance_table_racing(self):
+        """ testing the racing row of the performance table """
+        table = self.analyzer.create_performance_table(
+                self.analyzer.default, self.analyzer.incumbent, n_resamples=0)
+        self.assertNotIn("Confidence (racing)", table)
+        table = self.analyzer.create_performance_table(
+                self.analyzer.default, self.analyzer.incumbent,
+                racing=(0.98765, 20), n_resamples=0)
+        self.assertIn("Confidence (racing)", table)
+        self.assertIn("0.988 (20 inst.)", table)
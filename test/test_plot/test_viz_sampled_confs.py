@@ -0,0 +1,28 @@
+import unittest
+
+import numpy as np
+
+from cave.plot.confs_viz.viz_sampled_confs import reduce_features
+
+
+class TestReduceFeatures(unittest.TestCase):
+
+    def test_no_features(self):
+        """ Scenarios without features have an empty feature-dict and rows
+        without feature-columns. """
+        x = np.array([0.1, 0.5])
+        feats = reduce_features(x[2:], {})
+        self.assertEqual(len(feats), 0)
+        x_new = np.concatenate((np.array([1., 2.]), feats), axis=0)
+        np.testing.assert_array_equal(x_new, [1., 2.])
+
+    def test_reduced_features(self):
+        orig = np.array([3., 4., 5.])
+        feat_dict = {orig.tobytes(): np.array([0.7, -0.2])}
+        np.testing.assert_array_equal(reduce_features(orig, feat_dict), [0.7, -0.2])
+        # Features without mapping are kept
+        other = np.array([1., 1., 1.])
+        np.testing.assert_array_equal(reduce_features(other, feat_dict), other)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from cave.utils.bootstrap import bootstrap_ci, paired_permutation_test
+
+
+class TestBootstrap(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(1)
+        self.values = rng.exponential(5, 500)
+
+    def test_bootstrap_ci(self):
+        """ testing intervals contain the mean and are reproducible """
+        low, high = bootstrap_ci(self.values, 2000)
+        self.assertLess(low, np.mean(self.values))
+        self.assertGreater(high, np.mean(self.values))
+        self.assertEqual((low, high), bootstrap_ci(self.values, 2000))
+        # Several metrics are resampled together (in small batches here)
+        lows, highs = bootstrap_ci(np.vstack([self.values, 2 * self.values]),
+                                   2000, max_elements=10000)
+        self.assertAlmostEqual(lows[1], 2 * lows[0])
+        self.assertAlmostEqual(highs[1], 2 * highs[0])
+        self.assertAlmostEqual(lows[0], low, places=1)
+        self.assertTrue(np.isnan(bootstrap_ci([], 100)[0]))
+
+    def test_permutation_test(self):
+        """ testing paired permutation test detects shifts only """
+        self.assertLess(paired_permutation_test(self.values, self.values + 1), 0.01)
+        rng = np.random.RandomState(2)
+        noise = rng.normal(0, 0.1, len(self.values))
+        self.assertGreater(paired_permutation_test(self.values,
+                                                   self.values + noise - noise.mean()),
+                           0.5)
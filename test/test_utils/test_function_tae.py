@@ -0,0 +1,77 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from smac.tae.execute_ta_run import StatusType
+
+from cave.utils.function_tae import FunctionTAE, load_function
+
+TARGET = """import time
+
+def ok(config, seed=None, instance=None):
+    return config["x"], {"seed": seed, "instance": instance}
+
+def crash(config, seed=None, instance=None):
+    raise RuntimeError("crashed")
+
+def invalid(config, seed=None, instance=None):
+    return "no number"
+
+def slow(config, seed=None, instance=None):
+    time.sleep(0.2)
+    return 0
+"""
+
+
+class TestFunctionTAE(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "target.py")
+        with open(self.path, 'w') as fh:
+            fh.write(TARGET)
+        self.sys_path = list(sys.path)
+
+    def tearDown(self):
+        sys.path[:] = self.sys_path
+        shutil.rmtree(self.tmp)
+
+    def test_success(self):
+        tae = FunctionTAE(self.path, "ok")
+        status, cost, runtime, info = tae.start({"x": 3}, "inst", seed=1)
+        self.assertEqual((status, cost), (StatusType.SUCCESS, 3.))
+        self.assertEqual(info, {"seed": 1, "instance": "inst"})
+        # No seed for deterministic scenarios, no instance if None
+        tae = FunctionTAE(self.path, "ok", deterministic=True)
+        _, _, _, info = tae.start({"x": 3}, None)
+        self.assertEqual(info, {"seed": None, "instance": None})
+
+    def test_crash(self):
+        tae = FunctionTAE(self.path, "crash", cost_for_crash=1000.)
+        status, cost, _, _ = tae.start({"x": 3}, "inst")
+        self.assertEqual((status, cost), (StatusType.CRASHED, 1000.))
+
+    def test_invalid_result(self):
+        tae = FunctionTAE(self.path, "invalid", cost_for_crash=1000.)
+        self.assertEqual(tae.start({"x": 3}, "inst")[:2], (StatusType.CRASHED, 1000.))
+        # For runtime, crashes are penalized like timeouts
+        tae = FunctionTAE(self.path, "invalid", run_obj="runtime", cutoff=5,
+                          par_factor=10)
+        self.assertEqual(tae.start({"x": 3}, "inst")[:2], (StatusType.CRASHED, 50.))
+
+    def test_timeout(self):
+        tae = FunctionTAE(self.path, "slow", run_obj="runtime", cutoff=0.05,
+                          par_factor=10)
+        status, cost, runtime, _ = tae.start({"x": 3}, "inst")
+        self.assertEqual((status, cost), (StatusType.TIMEOUT, 0.5))
+        self.assertGreater(runtime, 0.05)
+        status, cost, runtime, _ = tae.start({"x": 3}, "inst", cutoff=1)
+        self.assertEqual(status, StatusType.SUCCESS)
+        self.assertEqual(cost, runtime)
+
+    def test_sys_path(self):
+        load_function(self.path, "ok")
+        load_function(self.path, "crash")
+        self.assertEqual(sys.path.count(os.path.abspath(self.tmp)), 1)
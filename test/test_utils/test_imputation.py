@@ -0,0 +1,66 @@
+import os
+import unittest
+from unittest import mock
+
+from smac.optimizer.objective import average_cost
+from smac.runhistory.runhistory import RunHistory
+from smac.scenario.scenario import Scenario
+from smac.tae.execute_ta_run import StatusType
+from smac.utils.io.input_reader import InputReader
+
+from cave.utils import imputation
+from cave.utils.imputation import ImputationCache
+
+
+class TestImputationCache(unittest.TestCase):
+
+    def setUp(self):
+        folder = "examples/spear_qcp_small/example_output/run_1"
+        scen_dict = InputReader().read_scenario_file(os.path.join(folder, "scenario.txt"))
+        scen_dict["output_dir"] = ""
+        self.scen = Scenario(scen_dict)
+        self.rh = RunHistory(average_cost)
+        self.rh.update_from_json(os.path.join(folder, "runhistory.json"), self.scen.cs)
+        self.cache = ImputationCache()
+
+    def test_second_stage_hits(self):
+        with mock.patch.object(imputation, "impute_training_data",
+                               wraps=imputation.impute_training_data) as impute:
+            X1, y1 = self.cache.get(self.scen, self.rh, log=False, seed=1)
+            X2, y2 = self.cache.get(self.scen, self.rh, log=False, seed=1)
+        self.assertEqual(impute.call_count, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertTrue((X1 == X2).all() and (y1 == y2).all())
+        # Returned copies can not change the cached data
+        X2[:] = -1
+        X3, _ = self.cache.get(self.scen, self.rh, log=False, seed=1)
+        self.assertTrue((X1 == X3).all())
+
+    def test_key(self):
+        with mock.patch.object(imputation, "impute_training_data",
+                               return_value=(mock.MagicMock(), mock.MagicMock())) as impute:
+            self.cache.get(self.scen, self.rh)
+            self.cache.get(self.scen, self.rh, log=False)
+            self.assertEqual(impute.call_count, 2)
+            # A new run changes the key
+            config = self.rh.ids_config[1]
+            self.rh.add(config, 1, 1, StatusType.SUCCESS, instance_id="new", seed=0)
+            self.cache.get(self.scen, self.rh)
+            self.assertEqual(impute.call_count, 3)
+            # An equal, but different runhistory does not hit
+            rh = RunHistory(average_cost)
+            rh.update(self.rh)
+            self.cache.get(self.scen, rh)
+            self.assertEqual(impute.call_count, 4)
+            self.cache.get(self.scen, self.rh)
+            self.assertEqual(impute.call_count, 4)
+
+    def test_max_size(self):
+        cache = ImputationCache(max_size=1)
+        with mock.patch.object(imputation, "impute_training_data",
+                               return_value=(mock.MagicMock(), mock.MagicMock())) as impute:
+            cache.get(self.scen, self.rh, log=True)
+            cache.get(self.scen, self.rh, log=False)
+            cache.get(self.scen, self.rh, log=True)
+        self.assertEqual(impute.call_count, 3)
+        self.assertEqual(len(cache.cache), 1)
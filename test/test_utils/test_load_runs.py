@@ -0,0 +1,58 @@
+import time
+import unittest
+from unittest import mock
+
+from cave.cavefacade import CAVE
+from cave.smacrun import RunData
+
+
+def _load_run_data(folder, ta_exec_dir):
+    """ Stand-in for cave.cavefacade._load_run_data in the worker processes:
+    the first folder finishes last, 'crash' makes the worker raise and
+    'broken' can not be parsed. """
+    if folder == 'crash':
+        raise RuntimeError("worker crashed")
+    if folder == 'broken':
+        return None, "could not parse"
+    if folder == 'a':
+        time.sleep(0.5)
+    return RunData('key', 'scen', 'rh_' + folder, []), None
+
+
+class _Run(object):
+    """ Stand-in for ConfiguratorRun, recording how it was loaded. """
+
+    def __init__(self, folder, ta_exec_dir, data=None):
+        self.folder = folder
+        self.in_worker = data is not None
+        if data is None:
+            # Loaded sequentially
+            data = RunData('key', 'scen', 'rh_' + folder, [])
+        self.runhistory = data.runhistory
+
+
+class TestLoadRuns(unittest.TestCase):
+
+    def setUp(self):
+        self.cave = CAVE.__new__(CAVE)
+        self.cave.logger = mock.Mock()
+
+    def _load(self, folders, n_jobs):
+        with mock.patch("cave.cavefacade._load_run_data", _load_run_data):
+            return self.cave.load_runs(folders, None, n_jobs=n_jobs, run_class=_Run)
+
+    def test_order(self):
+        folders = ['a', 'b', 'c', 'd']
+        runs = self._load(folders, n_jobs=4)
+        self.assertEqual([r.folder for r in runs], folders)
+        self.assertEqual([r.runhistory for r in runs], ['rh_a', 'rh_b', 'rh_c', 'rh_d'])
+        self.assertTrue(all(r.in_worker for r in runs))
+
+    def test_fallback(self):
+        runs = self._load(['a', 'crash', 'broken', 'b'], n_jobs=2)
+        # The crashed worker's folder is loaded sequentially, the broken
+        # folder is skipped
+        self.assertEqual([r.folder for r in runs], ['a', 'crash', 'b'])
+        self.assertEqual([r.in_worker for r in runs], [True, False, True])
+        self.assertEqual(runs[1].runhistory, 'rh_crash')
+        self.assertEqual(self.cave.logger.warning.call_count, 2)
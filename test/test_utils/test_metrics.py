@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+
+from smac.optimizer.objective import average_cost
+from smac.runhistory.runhistory import RunHistory
+from smac.scenario.scenario import Scenario
+from smac.tae.execute_ta_run import StatusType
+from smac.utils.io.input_reader import InputReader
+
+from cave.utils.metrics import PerformanceMetrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        scen_dict = InputReader().read_scenario_file(
+                "examples/spear_qcp_small/example_output/run_1/scenario.txt")
+        scen_dict["output_dir"] = ""
+        self.scen = Scenario(scen_dict)
+        self.rh = RunHistory(average_cost)
+        self.rh.update_from_json(
+                "examples/spear_qcp_small/example_output/run_1/runhistory.json",
+                self.scen.cs)
+
+    def _walk(self, rh, conf, cutoff):
+        """ Mean cost and timeout per instance by walking the runhistory-dicts.
+        A pair is a timeout, if the floored median over the seeds of
+        'finished within cutoff' is 0. """
+        conf_id = rh.config_ids[conf]
+        costs, finished = {}, {}
+        for k, v in rh.data.items():
+            if k.config_id == conf_id:
+                costs.setdefault(k.instance_id, []).append(v.cost)
+                finished.setdefault(k.instance_id, []).append(v.time < cutoff)
+        timeouts = {i: np.floor(np.median(f)) == 0 for i, f in finished.items()}
+        return {i: np.mean(c) for i, c in costs.items()}, timeouts
+
+    def _check(self, rh, configs, cutoff, train, test):
+        metrics = PerformanceMetrics(rh, configs, cutoff, train, test)
+        for row, conf in enumerate(configs):
+            costs, timeouts = self._walk(rh, conf, cutoff)
+            for subset, insts in [('train', train), ('test', test),
+                                  ('all', list(costs))]:
+                insts = [i for i in costs if i in insts]
+                for par in [1, 10]:
+                    penalized = [costs[i] if costs[i] < cutoff else cutoff * par
+                                 for i in insts]
+                    expected = np.mean(penalized) if insts else np.nan
+                    np.testing.assert_almost_equal(metrics.par(par, subset)[row],
+                                                   expected)
+                self.assertEqual(metrics.n_timeouts(subset)[row],
+                                 len([i for i in insts if timeouts[i]]))
+                self.assertEqual(metrics.n_evaluated(subset)[row], len(insts))
+                expected = np.median([costs[i] for i in insts]) if insts else np.nan
+                np.testing.assert_almost_equal(metrics.median(subset)[row], expected)
+
+    def test_par_and_timeouts(self):
+        """ testing metrics equal walking the runhistory """
+        self._check(self.rh, self.rh.get_all_configs(), self.scen.cutoff,
+                    self.scen.train_insts, self.scen.test_insts)
+
+    def test_median_timeouts_and_penalty(self):
+        """ testing the floored median over seeds and the PAR-penalty on a
+        runhistory with known timeouts """
+        cutoff = 10
+        conf1, conf2 = self.scen.cs.sample_configuration(2)
+        rh = RunHistory(average_cost)
+        # inst1: 1 of 2 finished -> median 0.5, floored -> timeout
+        # inst2: 2 of 3 finished -> no timeout, but the mean cost of 20/3 is
+        #        below the cutoff, so not penalized
+        # inst3: none finished -> timeout and penalized
+        for inst, times in [("inst1", [5, 10]), ("inst2", [2, 3, 15]),
+                            ("inst3", [10, 12])]:
+            for seed, t in enumerate(times):
+                rh.add(conf1, t, t, StatusType.SUCCESS if t < cutoff else
+                       StatusType.TIMEOUT, instance_id=inst, seed=seed)
+                rh.add(conf2, 1, 1, StatusType.SUCCESS, instance_id=inst,
+                       seed=seed)
+        self._check(rh, [conf1, conf2], cutoff, ["inst1", "inst2"], ["inst3"])
+        metrics = PerformanceMetrics(rh, [conf1, conf2], cutoff,
+                                     ["inst1", "inst2"], ["inst3"])
+        self.assertEqual(metrics.n_timeouts('all').tolist(), [2, 0])
+        np.testing.assert_almost_equal(metrics.par(10, 'all')[0],
+                                       (7.5 + 20 / 3 + 100) / 3)
+        np.testing.assert_almost_equal(metrics.par(10, 'test')[0], 100)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+
+import numpy as np
+
+from cave.utils.portfolio import greedy_portfolio, marginal_contributions, virtual_best
+
+
+class TestPortfolio(unittest.TestCase):
+
+    def setUp(self):
+        self.costs = np.random.RandomState(1).rand(6, 50)
+
+    def test_marginal_contributions(self):
+        """ testing contributions equal VBS-cost without each config """
+        vbs, _ = virtual_best(self.costs)
+        contributions = marginal_contributions(self.costs)
+        for row in range(len(self.costs)):
+            without = np.delete(self.costs, row, axis=0).min(axis=0).mean()
+            self.assertAlmostEqual(contributions[row], without - vbs.mean())
+
+    def test_greedy_portfolio(self):
+        """ testing greedy portfolio improves in each step and ends at VBS """
+        selected, costs = greedy_portfolio(self.costs)
+        self.assertEqual(selected[0], np.argmin(self.costs.mean(axis=1)))
+        self.assertTrue(np.all(np.diff(costs) < 0))
+        self.assertAlmostEqual(costs[-1], virtual_best(self.costs)[0].mean())
+        self.assertEqual(greedy_portfolio(self.costs, 2)[0], selected[:2])
@@ -0,0 +1,71 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from cave.utils.prediction_cache import CachedModel, PredictionCache
+
+
+class _Model(object):
+    """ Model predicting a*sum of the row, counting the predicted rows. """
+
+    def __init__(self, a=1.):
+        self.a = a
+        self.n_predicted = 0
+        self.instance_features = None
+
+    def predict(self, X):
+        self.n_predicted += len(X)
+        return self.a * X.sum(axis=1).reshape(-1, 1), np.ones((len(X), 1))
+
+    def train(self, X, Y):
+        self.a = float(Y[0])
+        return self
+
+
+class TestPredictionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = PredictionCache(max_size=4)
+        self.X = np.arange(6, dtype=float).reshape(3, 2)
+
+    def test_hits_and_misses(self):
+        model = _Model()
+        mean, var = self.cache.predict(model, self.X)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 3))
+        mean2, var2 = self.cache.predict(model, self.X[[2, 0]])
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 3))
+        self.assertEqual(model.n_predicted, 3)
+        np.testing.assert_array_equal(mean2, mean[[2, 0]])
+        # Duplicate rows are predicted once
+        self.cache.predict(model, np.vstack([self.X + 10, self.X[:1] + 10]))
+        self.assertEqual(model.n_predicted, 6)
+        # Other models do not share predictions
+        self.cache.predict(_Model(), self.X)
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 10))
+
+    def test_lru_eviction(self):
+        model = _Model()
+        self.cache.predict(model, self.X)           # 3 entries
+        self.cache.predict(model, self.X[:1])       # row 0 used last
+        self.cache.predict(model, self.X[:2] + 10)  # 5 entries, evicts row 1
+        self.assertEqual(len(self.cache.cache), 4)
+        model.n_predicted = 0
+        self.cache.predict(model, self.X[:1])
+        self.assertEqual(model.n_predicted, 0)
+        self.cache.predict(model, self.X[1:2])
+        self.assertEqual(model.n_predicted, 1)
+
+    def test_invalidate_after_training(self):
+        model = _Model()
+        model.cache_key = "fingerprint"
+        cached = CachedModel(model)
+        with mock.patch("cave.utils.prediction_cache._cache", self.cache), \
+                mock.patch("cave.utils.prediction_cache.get_registry") as registry:
+            mean, _ = cached.predict(self.X)
+            cached.train(self.X, np.array([2.]))
+            registry().discard.assert_called_once_with("fingerprint")
+            new_mean, _ = cached.predict(self.X)
+        np.testing.assert_array_equal(new_mean, 2 * mean)
+        self.assertIsNone(model.cache_key)
+        self.assertEqual(self.cache.misses, 6)
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from cave.utils.racing import paired_confidence, race
+
+
+class TestRacing(unittest.TestCase):
+
+    def _evaluate(self, costs1, costs2):
+        """ evaluate-function for race on fixed costs, recording the batches. """
+        self.batches = []
+        evaluated1, evaluated2 = {}, {}
+        def evaluate(batch):
+            self.batches.append(batch)
+            for inst in batch:
+                evaluated1[inst] = costs1[inst]
+                evaluated2[inst] = costs2[inst]
+            return dict(evaluated1), dict(evaluated2)
+        return evaluate
+
+    def test_paired_confidence(self):
+        rng = np.random.RandomState(1)
+        costs = rng.rand(30)
+        self.assertGreater(paired_confidence(costs, costs + 1), 0.99)
+        self.assertEqual(paired_confidence(costs, costs), 0.)
+        self.assertEqual(paired_confidence([], []), 0.)
+
+    def test_dominated(self):
+        instances = ["inst%d" % i for i in range(50)]
+        costs1 = {inst: 1. + i for i, inst in enumerate(instances)}
+        costs2 = {inst: 10. + i for i, inst in enumerate(instances)}
+        conf, n = race(self._evaluate(costs1, costs2), instances,
+                       confidence=0.95, batch_size=10, min_instances=10)
+        # Stopped after the first batch
+        self.assertGreaterEqual(conf, 0.95)
+        self.assertEqual(n, 10)
+        self.assertEqual(len(self.batches), 1)
+
+    def test_tie(self):
+        instances = ["inst%d" % i for i in range(25)]
+        costs = {inst: float(i) for i, inst in enumerate(instances)}
+        conf, n = race(self._evaluate(costs, costs), instances,
+                       confidence=0.95, batch_size=10, min_instances=10)
+        # No difference, so all instances are evaluated (in shuffled batches)
+        self.assertEqual(conf, 0.)
+        self.assertEqual(n, 25)
+        self.assertEqual([len(b) for b in self.batches], [10, 10, 5])
+        self.assertEqual(sorted(sum(self.batches, [])), sorted(instances))
+
+    def test_too_few_instances(self):
+        instances = ["inst%d" % i for i in range(15)]
+        costs1 = {inst: 1. for inst in instances}
+        costs2 = {inst: 10. for inst in instances}
+        conf, n = race(self._evaluate(costs1, costs2), instances,
+                       confidence=0.95, batch_size=5, min_instances=12)
+        # Confident after the first batch, but racing may only stop after
+        # min_instances
+        self.assertEqual(len(self.batches), 3)
+        self.assertEqual(n, 15)
+        self.assertGreaterEqual(conf, 0.95)
@@ -0,0 +1,90 @@
+import unittest
+
+import numpy as np
+
+from smac.optimizer.objective import average_cost
+from smac.runhistory.runhistory import RunHistory
+from smac.scenario.scenario import Scenario
+from smac.utils.io.input_reader import InputReader
+
+from cave.utils.helpers import get_cost_dict_for_config, get_cost_matrix, get_timeout
+from cave.utils.run_table import get_run_table
+
+
+class TestRunTable(unittest.TestCase):
+
+    def setUp(self):
+        scen_dict = InputReader().read_scenario_file(
+                "examples/spear_qcp_small/example_output/run_1/scenario.txt")
+        scen_dict["output_dir"] = ""
+        self.scen = Scenario(scen_dict)
+        self.rh = RunHistory(average_cost)
+        self.rh.update_from_json(
+                "examples/spear_qcp_small/example_output/run_1/runhistory.json",
+                self.scen.cs)
+
+    def _walk(self, conf):
+        """ Per-instance costs and times by walking the runhistory-dicts. """
+        conf_id = self.rh.config_ids[conf]
+        costs, times = {}, {}
+        for k, v in self.rh.data.items():
+            if k.config_id == conf_id:
+                costs.setdefault(k.instance_id, []).append(v.cost)
+                times.setdefault(k.instance_id, []).append(v.time)
+        return costs, times
+
+    def test_cost_dict(self):
+        """ testing per-instance costs equal walking the runhistory """
+        for conf in self.rh.get_all_configs():
+            costs, _ = self._walk(conf)
+            self.assertEqual(get_cost_dict_for_config(self.rh, conf, None), costs)
+            mean = get_cost_dict_for_config(self.rh, conf)
+            self.assertEqual(set(mean), set(costs))
+            for inst in costs:
+                self.assertAlmostEqual(mean[inst], np.mean(costs[inst]))
+
+    def test_cost_matrix(self):
+        """ testing cost matrix equals per-config cost dicts """
+        configs = self.rh.get_all_configs()
+        for aggregate, func in [('mean', np.mean), ('median', np.median)]:
+            matrix, insts = get_cost_matrix(self.rh, configs, aggregate=aggregate)
+            self.assertEqual(matrix.shape, (len(configs), len(insts)))
+            for row, conf in zip(matrix, configs):
+                costs = get_cost_dict_for_config(self.rh, conf, func)
+                self.assertEqual(set(costs), {i for i, c in zip(insts, row)
+                                              if not np.isnan(c)})
+                for inst, cost in zip(insts, row):
+                    if inst in costs:
+                        self.assertAlmostEqual(cost, costs[inst])
+        matrix, insts = get_cost_matrix(self.rh, configs, aggregate=None)
+        for row, conf in zip(matrix, configs):
+            costs = get_cost_dict_for_config(self.rh, conf, None)
+            for inst, seeds in zip(insts, row):
+                self.assertEqual(seeds[~np.isnan(seeds)].tolist(),
+                                 costs.get(inst, []))
+
+    def test_timeout(self):
+        """ testing timeouts equal median over seeds """
+        cutoff = self.scen.cutoff
+        for conf in self.rh.get_all_configs():
+            _, times = self._walk(conf)
+            expected = {i: np.floor(np.median([t < cutoff for t in times[i]]))
+                        for i in times}
+            self.assertEqual(get_timeout(self.rh, conf, cutoff), expected)
+
+    def test_mean_costs(self):
+        """ testing mean costs equal the runhistory's costs """
+        configs = self.rh.get_all_configs()
+        costs = get_run_table(self.rh).get_mean_costs(configs)
+        for conf, cost in zip(configs, costs):
+            self.assertAlmostEqual(cost, self.rh.get_cost(conf))
+
+    def test_rebuild(self):
+        """ testing table is cached and rebuilt after adding runs """
+        table = get_run_table(self.rh)
+        self.assertIs(get_run_table(self.rh), table)
+        k, v = next(iter(self.rh.data.items()))
+        self.rh.add(self.rh.ids_config[k.config_id], v.cost, v.time, v.status,
+                    instance_id=k.instance_id, seed=k.seed + 12345)
+        self.assertIsNot(get_run_table(self.rh), table)
+        self.assertEqual(get_run_table(self.rh).n_runs, len(self.rh.data))
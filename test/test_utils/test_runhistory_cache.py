@@ -0,0 +1,66 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from smac.optimizer.objective import average_cost
+from smac.runhistory.runhistory import RunHistory
+from smac.scenario.scenario import Scenario
+from smac.utils.io.input_reader import InputReader
+
+from cave.utils import runhistory_cache
+from cave.utils.runhistory_cache import CACHE_SUFFIX, load_runhistory
+
+
+class TestRunhistoryCache(unittest.TestCase):
+
+    def setUp(self):
+        folder = "examples/spear_qcp_small/example_output/run_1"
+        scen_dict = InputReader().read_scenario_file(os.path.join(folder, "scenario.txt"))
+        scen_dict["output_dir"] = ""
+        self.cs = Scenario(scen_dict).cs
+        self.tmp = tempfile.mkdtemp()
+        self.rh_fn = os.path.join(self.tmp, "runhistory.json")
+        shutil.copy(os.path.join(folder, "runhistory.json"), self.rh_fn)
+        self.expected = RunHistory(average_cost)
+        self.expected.update_from_json(self.rh_fn, self.cs)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _assert_equal(self, rh, expected):
+        self.assertEqual(len(rh.data), len(expected.data))
+        for (k, v), (k_exp, v_exp) in zip(rh.data.items(), expected.data.items()):
+            self.assertEqual(rh.ids_config[k.config_id],
+                             expected.ids_config[k_exp.config_id])
+            self.assertEqual(k[1:], k_exp[1:])
+            self.assertEqual(v, v_exp)  # including additional_info
+
+    def test_cache_hit(self):
+        """ testing the second load is served from the cache """
+        self._assert_equal(load_runhistory(self.rh_fn, self.cs), self.expected)
+        self.assertEqual(len(os.listdir(self.rh_fn + CACHE_SUFFIX)), 1)
+        with mock.patch.object(runhistory_cache, "stream_runhistory_to_arrays",
+                               side_effect=AssertionError("cache missed")):
+            self._assert_equal(load_runhistory(self.rh_fn, self.cs), self.expected)
+
+    def test_invalidation(self):
+        """ testing a changed file (size and mtime) misses the cache """
+        load_runhistory(self.rh_fn, self.cs)
+        with open(self.rh_fn) as fh:
+            rh_json = json.load(fh)
+        rh_json["data"] = rh_json["data"][:-1]
+        with open(self.rh_fn, 'w') as fh:
+            json.dump(rh_json, fh)
+        expected = RunHistory(average_cost)
+        expected.update_from_json(self.rh_fn, self.cs)
+        rh = load_runhistory(self.rh_fn, self.cs)
+        self._assert_equal(rh, expected)
+        self.assertEqual(len(rh.data), len(self.expected.data) - 1)
+        # The stale entry is replaced
+        self.assertEqual(len(os.listdir(self.rh_fn + CACHE_SUFFIX)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
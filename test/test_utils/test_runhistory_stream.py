@@ -0,0 +1,53 @@
+import json
+import tempfile
+import unittest
+
+from cave.utils.runhistory_stream import iter_runhistory, stream_runhistory_to_arrays
+
+
+class TestRunhistoryStream(unittest.TestCase):
+
+    def setUp(self):
+        self.rh_fn = "examples/spear_qcp_small/example_output/run_1/runhistory.json"
+        with open(self.rh_fn) as fh:
+            self.rh_json = json.load(fh)
+        self.status_values = {"SUCCESS": 1, "TIMEOUT": 2, "CRASHED": 3,
+                              "ABORT": 4, "MEMOUT": 5, "CAPPED": 6}
+
+    def test_iter_runhistory(self):
+        """ testing streamed records equal the fully loaded json """
+        # Small chunks to make sure values cut off at buffer-ends are handled
+        for chunk_size in [3, 64, 2**20]:
+            data, configs = [], {}
+            for section, record in iter_runhistory(self.rh_fn, chunk_size):
+                if section == "data":
+                    data.append(record)
+                else:
+                    configs[str(record[0])] = record[1]
+            self.assertEqual(data, self.rh_json["data"])
+            self.assertEqual(configs, self.rh_json["configs"])
+
+    def test_stream_to_arrays(self):
+        """ testing conversion into flat arrays """
+        arrays, instances, infos = stream_runhistory_to_arrays(
+                self.rh_fn, lambda values: [len(values)], self.status_values)
+        data = self.rh_json["data"]
+        self.assertEqual(arrays["costs"].tolist(), [float(d[1][0]) for d in data])
+        self.assertEqual(arrays["seeds"].tolist(), [d[0][2] for d in data])
+        self.assertEqual([instances[i] for i in arrays["instance_ids"]],
+                         [d[0][1] for d in data])
+        self.assertEqual(arrays["configs"].shape[0], len(self.rh_json["configs"]))
+        self.assertEqual([infos[i] if i >= 0 else None for i in arrays["info_ids"]],
+                         [d[1][3] if len(d[1]) > 3 else None for d in data])
+
+    def test_runs_without_instances(self):
+        """ testing runs on the None-instance and plain int-status """
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as fh:
+            json.dump({"data": [[[1, None, 0], [1.0, 1.0, 1, {}]]],
+                       "configs": {"1": {}}}, fh)
+            fh.flush()
+            arrays, instances, infos = stream_runhistory_to_arrays(
+                    fh.name, lambda values: [0], self.status_values)
+        self.assertEqual(instances, [])
+        self.assertEqual(arrays["instance_ids"].tolist(), [-1])
+        self.assertEqual(arrays["status"].tolist(), [1])
@@ -0,0 +1,78 @@
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+
+import numpy as np
+
+from cave.utils import sharded_forest
+from cave.utils.sharded_forest import ShardedRandomForest, combine_predictions
+
+
+class _FailingExecutor(object):
+    """ Executor whose second task fails (e.g. a pickling error). """
+
+    def __init__(self, max_workers):
+        self.n = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        if self.n == 1:
+            future.set_exception(RuntimeError("can not pickle"))
+        else:
+            future.set_result("parallel{}".format(self.n))
+        self.n += 1
+        return future
+
+
+class TestShardedForest(unittest.TestCase):
+
+    def test_combine_predictions(self):
+        """ Combined mean/variance of sub-forests equal those over all trees. """
+        rng = np.random.RandomState(1)
+        trees = rng.rand(4, 5, 3)  # sub-forests x trees x points
+        mean, var = combine_predictions(trees.mean(axis=1), trees.var(axis=1))
+        all_trees = trees.reshape(-1, 3)
+        np.testing.assert_array_almost_equal(mean, all_trees.mean(axis=0))
+        np.testing.assert_array_almost_equal(var, all_trees.var(axis=0))
+
+    def test_trees_per_shard(self):
+        """ The trees are split among the sub-forests (rounded up). """
+        model = ShardedRandomForest(np.zeros(2, dtype=np.uint),
+                                    np.array([(0, 1), (0, 1)]), n_shards=4,
+                                    num_trees=10)
+        self.assertEqual(model.rf_kwargs['num_trees'], 3)
+
+    def test_sequential_fallback(self):
+        """ Only sub-forests that failed in parallel are retrained. """
+        model = ShardedRandomForest(np.zeros(2, dtype=np.uint),
+                                    np.array([(0, 1), (0, 1)]), n_shards=3)
+        with mock.patch.object(sharded_forest, "ProcessPoolExecutor", _FailingExecutor), \
+                mock.patch.object(sharded_forest, "_picklable", True), \
+                mock.patch.object(sharded_forest, "_train_shard",
+                                  side_effect=lambda *a: "sequential{}".format(a[3] - 42)) as train:
+            model.train(np.zeros((2, 2)), np.zeros(2))
+        self.assertEqual(model.shards, ["parallel0", "sequential1", "parallel2"])
+        self.assertEqual(train.call_count, 1)
+
+    def test_single_forest_if_not_picklable(self):
+        """ Without transferable forests, one full-size forest is trained. """
+        model = ShardedRandomForest(np.zeros(2, dtype=np.uint),
+                                    np.array([(0, 1), (0, 1)]), n_shards=3,
+                                    num_trees=10)
+        with mock.patch.object(sharded_forest, "ProcessPoolExecutor",
+                               side_effect=AssertionError("no pool expected")), \
+                mock.patch.object(sharded_forest, "_picklable", False), \
+                mock.patch.object(sharded_forest, "_train_shard",
+                                  side_effect=lambda *a: a[4]["num_trees"]) as train:
+            model.train(np.zeros((2, 2)), np.zeros(2))
+        self.assertEqual(model.shards, [10])
+        self.assertEqual(train.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from smac.optimizer.objective import average_cost
+from smac.runhistory.runhistory import RunHistory
+from smac.scenario.scenario import Scenario
+from smac.utils.io.input_reader import InputReader
+
+from cave.utils.validation_store import ValidationStore
+
+
+class TestValidationStore(unittest.TestCase):
+
+    def setUp(self):
+        folder = "examples/spear_qcp_small/example_output/run_1"
+        scen_dict = InputReader().read_scenario_file(os.path.join(folder, "scenario.txt"))
+        scen_dict["output_dir"] = ""
+        self.scen = Scenario(scen_dict)
+        self.rh = RunHistory(average_cost)
+        self.rh.update_from_json(os.path.join(folder, "runhistory.json"), self.scen.cs)
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "store", "runs.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _runs(self, rh):
+        return {(rh.ids_config[k.config_id], k.instance_id, k.seed): v[:3]
+                for k, v in rh.data.items()}
+
+    def _n_rows(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_round_trip(self):
+        ValidationStore(self.path, "scen", self.scen.cutoff).save(self.rh)
+        # Reopened store, as in a later invocation
+        store = ValidationStore(self.path, "scen", self.scen.cutoff)
+        loaded = RunHistory(average_cost)
+        n = store.load(self.rh.get_all_configs(), loaded)
+        self.assertEqual(n, len(self.rh.data))
+        self.assertEqual(self._runs(loaded), self._runs(self.rh))
+
+    def test_idempotent(self):
+        store = ValidationStore(self.path, "scen", self.scen.cutoff)
+        store.save(self.rh)
+        store.save(self.rh)
+        self.assertEqual(self._n_rows(), len(self.rh.data))
+        loaded = RunHistory(average_cost)
+        store.load(self.rh.get_all_configs(), loaded)
+        store.load(self.rh.get_all_configs(), loaded)
+        self.assertEqual(len(loaded.data), len(self.rh.data))
+        self.assertEqual(self._runs(loaded), self._runs(self.rh))
+
+    def test_other_scenario(self):
+        ValidationStore(self.path, "scen", self.scen.cutoff).save(self.rh)
+        for store in [ValidationStore(self.path, "other", self.scen.cutoff),
+                      ValidationStore(self.path, "scen", None)]:
+            loaded = RunHistory(average_cost)
+            self.assertEqual(store.load(self.rh.get_all_configs(), loaded), 0)
+            self.assertFalse(loaded.data)
@@ -0,0 +1,135 @@
+import os
+import unittest
+from unittest import mock
+from types import SimpleNamespace
+
+from smac.optimizer.objective import average_cost
+from smac.runhistory.runhistory import RunHistory
+from smac.scenario.scenario import Scenario
+from smac.tae.execute_ta_run import StatusType
+from smac.utils.io.input_reader import InputReader
+
+from cave.cavefacade import CAVE
+from cave.utils.watch import get_new_runs
+
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = "examples/spear_qcp_small/example_output/run_1"
+        scen_dict = InputReader().read_scenario_file(os.path.join(self.folder, "scenario.txt"))
+        scen_dict["output_dir"] = ""
+        self.scen = Scenario(scen_dict)
+        self.rh = RunHistory(average_cost)
+        self.rh.update_from_json(os.path.join(self.folder, "runhistory.json"), self.scen.cs)
+        self.runs = list(self.rh.data.items())
+
+    def _rh(self, runs, reverse=False):
+        """ Runhistory with runs, configurations added in reverse order gives
+        different config-ids. """
+        rh = RunHistory(average_cost)
+        for k, v in (reversed(runs) if reverse else runs):
+            rh.add(self.rh.ids_config[k.config_id], v.cost, v.time, v.status,
+                   instance_id=k.instance_id, seed=k.seed,
+                   additional_info=v.additional_info)
+        return rh
+
+    def test_get_new_runs(self):
+        old_rh = self._rh(self.runs[:100])
+        new_rh = self._rh(self.runs, reverse=True)
+        delta = get_new_runs(old_rh, new_rh)
+        self.assertEqual(len(delta.data), len(self.runs) - 100)
+        old_rh.update(delta)
+        self.assertEqual(len(old_rh.data), len(self.runs))
+        # Merging again does not duplicate runs
+        self.assertFalse(get_new_runs(old_rh, new_rh).data)
+
+    def test_get_new_runs_changed_result(self):
+        old_rh = self._rh(self.runs)
+        k, v = self.runs[0]
+        changed = v._replace(cost=v.cost + 1, time=v.time + 1, status=StatusType.TIMEOUT)
+        new_rh = self._rh([(k, changed)] + self.runs[1:])
+        delta = get_new_runs(old_rh, new_rh)
+        self.assertEqual(len(delta.data), 1)
+        self.assertEqual(list(delta.data.values())[0].status, StatusType.TIMEOUT)
+
+    def _cave(self, n_old):
+        """ CAVE-object with only the attributes update_runs needs, its run
+        knowing the first n_old runs. """
+        cave = CAVE.__new__(CAVE)
+        cave.logger = mock.Mock()
+        run_rh = self._rh(self.runs[:n_old])
+        cave.runs = [SimpleNamespace(folder=self.folder, scen=self.scen,
+                                     runhistory=run_rh, traj=[])]
+        cave.original_rh = self._rh(self.runs[:n_old])
+        cave.watcher = mock.Mock()
+        cave.validator = SimpleNamespace(epm="epm")
+        cave.missing_data_method = "epm"
+        cave.incumbent = self.rh.ids_config[1]
+        cave.export_runhistory = mock.Mock()
+        cave.complete_data = mock.Mock()
+        cave._get_best_run = mock.Mock(return_value=SimpleNamespace(incumbent=cave.incumbent))
+        cave.analyzer = mock.Mock()
+        return cave
+
+    def _update(self, cave):
+        with mock.patch("cave.cavefacade.load_runhistory", return_value=self._rh(self.runs)):
+            return cave.update_runs({self.folder: ["runhistory.json"]},
+                                    retrain_threshold=0.1)
+
+    def test_update_runs_reuses_epm(self):
+        cave = self._cave(n_old=len(self.runs) - 5)
+        self.assertEqual(self._update(cave), {"runhistory"})
+        self.assertEqual(len(cave.original_rh.data), len(self.runs))
+        self.assertEqual(len(cave.runs[0].runhistory.data), len(self.runs))
+        self.assertEqual(cave.validator.epm, "epm")
+        cave.complete_data.assert_called_once()
+        cave.export_runhistory.assert_called_once()
+
+    def test_update_runs_retrains_epm(self):
+        cave = self._cave(n_old=len(self.runs) // 2)
+        self.assertEqual(self._update(cave), {"runhistory"})
+        self.assertEqual(len(cave.original_rh.data), len(self.runs))
+        self.assertIsNone(cave.validator.epm)
+
+    def test_update_runs_unchanged(self):
+        cave = self._cave(n_old=len(self.runs))
+        self.assertEqual(self._update(cave), set())
+        self.assertEqual(cave.validator.epm, "epm")
+        cave.complete_data.assert_not_called()
+
+    def test_watch(self):
+        cave = CAVE.__new__(CAVE)
+        cave.logger = mock.Mock()
+        cave.runs = []
+        cave.watcher = mock.Mock()
+        cave.watcher.poll.side_effect = [{},
+                                         {"f": ["traj_aclib2.json"]},
+                                         {"f": ["traj_aclib2.json"]},
+                                         {"f": ["runhistory.json"]}]
+        cave.update_runs = mock.Mock(side_effect=[set(), {"trajectory"},
+                                                  {"runhistory"}])
+        cave.analyze = mock.Mock()
+        with mock.patch("cave.cavefacade.time.sleep") as sleep:
+            cave.watch(interval=5, max_updates=2,
+                       feature_analysis=["box_violin", "importance"])
+        self.assertEqual(sleep.call_count, 4)
+        self.assertEqual(cave.update_runs.call_count, 3)
+        self.assertEqual(cave.analyze.call_count, 2)
+        # Only the trajectory changed, the incumbent did not
+        self.assertEqual(cave.analyze.call_args_list[0],
+                         mock.call(param_importance=[], parallel_coordinates=False,
+                                   feature_analysis=[]))
+        self.assertEqual(cave.analyze.call_args_list[1],
+                         mock.call(feature_analysis=["importance"]))
+
+    def test_watch_interrupt(self):
+        cave = CAVE.__new__(CAVE)
+        cave.logger = mock.Mock()
+        cave.runs = []
+        cave.watcher = mock.Mock()
+        cave.watcher.poll.side_effect = KeyboardInterrupt
+        cave.analyze = mock.Mock()
+        with mock.patch("cave.cavefacade.time.sleep"):
+            cave.watch(interval=5)
+        cave.analyze.assert_not_called()